@@ -0,0 +1,616 @@
+"""Columnar, categorical-encoded storage for parcel address records."""
+import codecs
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from canvass_store import ParcelSetOverlay, overlay_parts
+from search_index import SuggestionIndex
+from spatial_index import GridIndex
+
+# Columns every table carries, whether or not the source export had them
+REQUIRED_COLUMNS = [
+    'PARCEL_NUMBER', 'OWNER1', 'OWNER2', 'SITE_ADDRESS', 'SITE_CITYZIP',
+    'PROPERTY_USE', 'STR_NUM', 'STR_NAME', 'STR_UNIT', 'STR_ZIP',
+    'PRECINCT', 'SECTION', 'BUILDING_NAME', 'LAT', 'LON'
+]
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'STR_NAME', 'SECTION', 'PRECINCT', 'PROPERTY_USE', 'BUILDING_NAME',
+    'STR_ZIP', 'SITE_CITYZIP', 'SUBDIVISION', 'HX_YN', 'MAILING_CITY',
+    'MAILING_STATE', 'TAX_DIST_DSCR'
+]
+
+# Columns that must be numeric for sorting and mapping
+FLOAT_COLUMNS = ['LAT', 'LON']
+INTEGER_COLUMNS = ['STR_NUM']
+
+# Raw PROPERTY_USE fragments that identify each kind of property
+MULTI_FAMILY_MARKERS = ['0300', 'Multi-Family', 'Condo', 'Apartment']
+SINGLE_FAMILY_MARKERS = ['0100', '0110', 'Single Family', 'Home']
+BUSINESS_MARKERS = ['Commercial', 'Business', 'Office', 'Retail']
+
+# Fallback precinct by ZIP code and street number for parcels without coordinates
+FALLBACK_PRECINCT_BOUNDS = [200, 400, 600, 800]
+FALLBACK_PRECINCTS_BY_ZIP = {
+    '33705': ['106', '108', '109', '116', '117'],
+    '33701': ['118', '119', '121', '122', '123'],
+}
+DEFAULT_PRECINCT = '130'
+DEFAULT_SECTION = "North"
+
+# Placeholder coordinates near St. Petersburg, FL for parcels without a location
+BASE_LAT = 27.773056
+BASE_LON = -82.639999
+
+# Streaming loader: bytes read per chunk and records normalized per batch
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_BATCH_SIZE = 50_000
+
+# Characters that may sit between records of a JSON array or object stream
+RECORD_SEPARATORS = " \t\r\n,["
+
+# A record that still fails to parse with this many characters buffered is malformed, not cut off by a chunk
+MAX_RECORD_CHARS = 4 << 20
+
+# Characters that open or close strings and nesting, or separate records, when skipping a malformed record
+RECORD_SYNTAX = re.compile(r'["\\{}\[\],\n]')
+
+# Schema metadata keys written into compiled datasets
+COMPILED_FORMAT_VERSION = "2"
+COMPILED_METADATA_PREFIX = "district6."
+
+# Shared, read-only empty selection
+EMPTY_POSITIONS = np.array([], dtype=np.int64)
+EMPTY_POSITIONS.setflags(write=False)
+
+
+# Coerce a raw DataFrame into the table's compact column layout
+def prepare_frame(df):
+    for column in REQUIRED_COLUMNS:
+        if column not in df.columns:
+            df[column] = np.nan if column in FLOAT_COLUMNS else ""
+
+    for column in FLOAT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+
+    for column in INTEGER_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+
+    for column in df.columns:
+        if column in FLOAT_COLUMNS or column in INTEGER_COLUMNS:
+            continue
+        if df[column].dtype == object:
+            # Text columns: missing values become empty strings
+            df[column] = df[column].where(df[column].notna(), "").astype(str)
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(str).astype('category')
+
+    return df.reset_index(drop=True)
+
+
+# Read a file object in fixed-size chunks
+def iter_file_chunks(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+# Parse records one at a time from a stream of text (or UTF-8 bytes) chunks
+def iter_json_records(chunks, skipped=None):
+    """Yield the objects of a JSON array of records without loading the whole file.
+
+    Only the current record and one chunk are held in memory. Also accepts the
+    damaged exports fix_json_format used to patch up: missing brackets,
+    comma- or newline-separated objects, junk before the first record and a
+    truncated final record (which is dropped). A malformed record is skipped
+    once it fails to parse with MAX_RECORD_CHARS buffered, and reading goes
+    on from the next record of the array; skipped, if given, is a list that
+    collects the start of every record dropped this way.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    exhausted = False
+
+    # Append the next chunk, discarding everything already consumed
+    def read_more():
+        nonlocal buffer, position, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            chunk = utf8.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        # Skip separators (and any junk) up to the next object
+        while position < len(buffer) and buffer[position] in RECORD_SEPARATORS:
+            position += 1
+        if position >= len(buffer):
+            if exhausted:
+                return
+            read_more()
+            continue
+        if buffer[position] == ']':
+            return
+        if buffer[position] != '{':
+            next_object = buffer.find('{', position)
+            position = next_object if next_object >= 0 else len(buffer)
+            continue
+
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not exhausted and len(buffer) - position < MAX_RECORD_CHARS:
+                # Most likely the record continues in the next chunk
+                read_more()
+                continue
+            # Malformed, or truncated at the end: resync on the next record of the array,
+            # not on an object nested inside this one or a brace inside one of its strings
+            if skipped is not None:
+                skipped.append(buffer[position:position + 80])
+            next_object, state = next_record_start(buffer, position + 1, (1, False, False, False))
+            while next_object < 0 and not exhausted:
+                position = len(buffer)
+                read_more()
+                next_object, state = next_record_start(buffer, 0, state)
+            if next_object < 0:
+                return
+            position = next_object
+            continue
+
+        position = end
+        if isinstance(record, dict):
+            yield record
+
+
+# Scan text from start for the next record of the array after a malformed one: a '{' that follows
+# a ',' or newline at the array's own level, or the ']' closing it. Returns its index, or -1 and
+# the (depth, in_string, escaped, separated) state to carry into the next chunk.
+def next_record_start(text, start, state):
+    depth, in_string, escaped, separated = state
+    if escaped and start < len(text):
+        start += 1
+        escaped = False
+    skip = -1
+    for match in RECORD_SYNTAX.finditer(text, start):
+        index = match.start()
+        if index == skip:
+            continue
+        char = text[index]
+        if in_string:
+            if char == '\\':
+                skip = index + 1
+                escaped = skip == len(text)
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            if char == '{' and depth == 0 and separated:
+                return index, None
+            depth += 1
+        elif char in '}]':
+            if char == ']' and depth == 0:
+                return index, None
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            separated = True
+    return -1, (depth, in_string, escaped, separated)
+
+
+# Group an iterable of records into lists of at most batch_size
+def iter_record_batches(records, batch_size=DEFAULT_BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Factorize a text column into integer codes and its distinct string values
+def factorize_text(df, column):
+    if column not in df.columns:
+        return np.full(len(df), -1, dtype=np.intp), np.array([], dtype=object)
+    codes, uniques = pd.factorize(df[column])
+    return codes, np.asarray([str(value) for value in uniques], dtype=object)
+
+
+# True where a text column is absent, null or empty
+def missing_text(df, column):
+    codes, uniques = factorize_text(df, column)
+    empty = np.append(uniques == "", True)
+    return empty[codes]
+
+
+# A numeric column as floats, NaN where absent or unparseable
+def numeric_values(df, column):
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    values = df[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values, errors='coerce')
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+# Classify each distinct raw PROPERTY_USE once, then broadcast through the codes
+def classify_property_use(codes, uniques):
+    """Return (PROPERTY_USE as "Residential"/"Business", is-multi-family mask)."""
+    labels = []
+    multi_family = []
+    for property_use in uniques:
+        is_multi = any(marker in property_use for marker in MULTI_FAMILY_MARKERS)
+        is_single = any(marker in property_use for marker in SINGLE_FAMILY_MARKERS)
+        is_business = any(marker in property_use for marker in BUSINESS_MARKERS)
+        # Default to residential if unclear
+        labels.append("Business" if is_business and not (is_multi or is_single) else "Residential")
+        multi_family.append(is_multi)
+
+    labels = np.array(labels + ["Residential"], dtype=object)
+    multi_family = np.array(multi_family + [False], dtype=bool)
+    return labels[codes], multi_family[codes]
+
+
+# Precinct from ZIP code and street number, for parcels we cannot place on the map
+def fallback_precincts(zip_codes, street_numbers):
+    zip_codes = np.asarray(zip_codes, dtype=object)
+    bins = np.searchsorted(FALLBACK_PRECINCT_BOUNDS, np.asarray(street_numbers), side='right')
+    result = np.full(len(zip_codes), DEFAULT_PRECINCT, dtype=object)
+    for zip_code, precincts in FALLBACK_PRECINCTS_BY_ZIP.items():
+        in_zip = zip_codes == zip_code
+        result[in_zip] = np.asarray(precincts, dtype=object)[bins[in_zip]]
+    return result
+
+
+# Normalize a batch of raw parcel records in place of the old per-record loop
+def normalize_frame(df, section_by_precinct, precinct_index=None):
+    """Fill PROPERTY_USE, PRECINCT, BUILDING_NAME, LAT/LON and SECTION column-wise.
+
+    Text columns are factorized so each distinct value (property use, ZIP,
+    street name, precinct) is examined once and the result broadcast back
+    through the integer codes.
+    """
+    df = df.reset_index(drop=True)
+
+    street_num = np.nan_to_num(numeric_values(df, 'STR_NUM'))
+    lat = numeric_values(df, 'LAT')
+    lon = numeric_values(df, 'LON')
+
+    # Clean up property use to be either "Residential" or "Business"
+    property_use, multi_family = classify_property_use(*factorize_text(df, 'PROPERTY_USE'))
+    df['PROPERTY_USE'] = property_use
+
+    # Precincts: point-in-polygon where we have coordinates, ZIP pattern otherwise
+    codes, uniques = factorize_text(df, 'PRECINCT')
+    precinct = np.append(uniques, "")[codes]
+    needs_precinct = precinct == ""
+    if precinct_index is not None:
+        located = needs_precinct & ~np.isnan(lat) & ~np.isnan(lon)
+        if located.any():
+            precinct[located] = precinct_index.assign(lon[located], lat[located])
+            needs_precinct = precinct == ""
+    if needs_precinct.any():
+        zip_codes, zip_uniques = factorize_text(df, 'STR_ZIP')
+        zip_values = np.append(zip_uniques, "")[zip_codes]
+        precinct[needs_precinct] = fallback_precincts(zip_values[needs_precinct], street_num[needs_precinct])
+    df['PRECINCT'] = precinct
+    precinct_codes, precinct_uniques = pd.factorize(precinct)
+
+    # Add building name if not present for multi-family properties
+    needs_building = missing_text(df, 'BUILDING_NAME') & multi_family
+    if needs_building.any():
+        name_codes, name_uniques = factorize_text(df, 'STR_NAME')
+        titled = np.append([name.title() for name in name_uniques], "")
+        numbers = street_num[needs_building].astype(np.int64)
+
+        # Units of one building share (street, number), so format each pair once
+        building_name_codes = name_codes[needs_building]
+        span = int(numbers.max() - numbers.min()) + 1
+        pair_keys = (building_name_codes.astype(np.int64) + 1) * span + (numbers - numbers.min())
+        _, first, inverse = np.unique(pair_keys, return_index=True, return_inverse=True)
+        names = np.array([
+            f"{titled[code]} {number} Condos" if titled[code] else f"Building {number}"
+            for code, number in zip(building_name_codes[first], numbers[first])
+        ], dtype=object)
+
+        building = df['BUILDING_NAME'].to_numpy(dtype=object).copy() if 'BUILDING_NAME' in df.columns else np.full(len(df), "", dtype=object)
+        building[needs_building] = names[inverse.ravel()]
+        df['BUILDING_NAME'] = building
+
+    # Add placeholder coordinates for map if not present
+    needs_location = np.isnan(lat) | np.isnan(lon)
+    if needs_location.any():
+        precinct_numbers = pd.to_numeric(pd.Series(precinct_uniques), errors='coerce').fillna(106).astype(np.int64).to_numpy()
+        precinct_number = precinct_numbers[precinct_codes]
+        lat = np.where(needs_location, BASE_LAT + (street_num % 100) * 0.0001 + (precinct_number % 10) * 0.001, lat)
+        lon = np.where(needs_location, BASE_LON + (street_num % 50) * 0.0002 - (precinct_number % 5) * 0.001, lon)
+    df['LAT'] = lat
+    df['LON'] = lon
+
+    # Add geographic section based on precinct, defaulting to North
+    needs_section = missing_text(df, 'SECTION')
+    if needs_section.any():
+        sections = np.array([section_by_precinct.get(p, DEFAULT_SECTION) for p in precinct_uniques], dtype=object)[precinct_codes]
+        if 'SECTION' in df.columns:
+            sections = np.where(needs_section, sections, df['SECTION'].to_numpy(dtype=object))
+        df['SECTION'] = sections
+
+    return df
+
+
+# Key each row by building: multi-unit buildings (condos, apartments) by building, single-family homes by street
+def building_group_keys(table, positions=None):
+    street_num = table.values('STR_NUM', positions).astype(str)
+    street_name = table.values('STR_NAME', positions).astype(str)
+    building_name = table.values('BUILDING_NAME', positions).astype(str)
+    return np.where(
+        building_name != "",
+        np.char.add(np.char.add(np.char.add(street_num, "-"), np.char.add(street_name, "-")), building_name),
+        np.char.add(street_name, "-HOMES")
+    )
+
+
+class AddressTable:
+    """Read-mostly columnar address table addressed by integer row positions."""
+
+    def __init__(self, df):
+        self.df = df
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(prepare_frame(pd.DataFrame.from_records(list(records))))
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    def all_positions(self):
+        return np.arange(len(self.df))
+
+    def values(self, column, positions=None):
+        """Return a column as a NumPy array, optionally restricted to row positions."""
+        series = self.df[column]
+        if positions is not None:
+            series = series.iloc[positions]
+        return series.to_numpy()
+
+    def record(self, position):
+        """Materialize one row as a plain dict for display."""
+        record = {}
+        for column, value in self.df.iloc[int(position)].items():
+            if isinstance(value, float) and np.isnan(value):
+                value = None
+            elif isinstance(value, np.generic):
+                value = value.item()
+            record[column] = value
+        return record
+
+    def records(self, positions):
+        return [self.record(position) for position in positions]
+
+    def equals(self, column, value, positions=None):
+        """Boolean mask of rows whose column equals value."""
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Compare integer codes instead of strings
+            code = series.cat.categories.get_indexer([value])[0]
+            codes = series.cat.codes.to_numpy()
+            mask = codes == code if code >= 0 else np.zeros(len(codes), dtype=bool)
+        else:
+            mask = (series == value).to_numpy()
+        return mask if positions is None else mask[positions]
+
+    def isin(self, column, values, positions=None):
+        """Boolean mask of rows whose column is one of values."""
+        series = self.df[column]
+        if positions is not None:
+            series = series.iloc[positions]
+        return series.isin(list(values)).to_numpy()
+
+    def contains(self, columns, query, positions=None):
+        """Boolean mask of rows where any of the columns contains query (case-insensitive)."""
+        query = query.lower()
+        size = len(self.df) if positions is None else len(positions)
+        mask = np.zeros(size, dtype=bool)
+        for column in columns:
+            series = self.df[column]
+            if positions is not None:
+                series = series.iloc[positions]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Test each distinct value once, then broadcast through the codes
+                hits = series.cat.categories.astype(str).str.lower().str.contains(query, regex=False)
+                hits = np.append(np.asarray(hits, dtype=bool), False)
+                mask |= hits[series.cat.codes.to_numpy()]
+            else:
+                if not pd.api.types.is_string_dtype(series.dtype):
+                    series = series.astype(str)
+                mask |= series.str.lower().str.contains(query, regex=False).to_numpy(dtype=bool)
+        return mask
+
+
+class AddressDataset:
+    """Immutable address table plus its per-precinct row index, shared read-only by all sessions."""
+
+    def __init__(self, table, precinct_positions, is_sample=False):
+        self.table = table
+        self.precinct_positions = precinct_positions
+        self.is_sample = is_sample
+        for positions in precinct_positions.values():
+            positions.setflags(write=False)
+        self._search_index = None
+        self._search_index_lock = threading.Lock()
+        self._masks = {}
+        self._parcel_index = None
+        self._building_groups = None
+        self._spatial_index = None
+        self._spatial_index_lock = threading.Lock()
+
+    def positions(self, precinct_id):
+        """Row positions of the addresses in a precinct."""
+        return self.precinct_positions.get(precinct_id, EMPTY_POSITIONS)
+
+    def mask(self, column, value):
+        """Read-only boolean mask over the whole table of rows where column equals value.
+
+        Computed from the categorical codes the first time a (column, value)
+        pair is asked for, then reused by every session's filters.
+        """
+        key = (column, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self.table.equals(column, value)
+            mask.setflags(write=False)
+            self._masks[key] = mask
+        return mask
+
+    @property
+    def building_groups(self):
+        """Building group code of every row plus the group keys, computed once per dataset."""
+        if self._building_groups is None:
+            codes, keys = pd.factorize(building_group_keys(self.table))
+            codes = codes.astype(np.int32)
+            codes.setflags(write=False)
+            self._building_groups = (codes, np.asarray(keys, dtype=object))
+        return self._building_groups
+
+    def parcel_positions(self, parcel_numbers):
+        """Row positions of the given parcel numbers (unknown ones are skipped)."""
+        if self._parcel_index is None:
+            self._parcel_index = pd.Index(self.table.values('PARCEL_NUMBER'))
+        positions = self._parcel_index.get_indexer_for(list(parcel_numbers))
+        return positions[positions >= 0]
+
+    @property
+    def search_index(self):
+        """Suggestion index over the table, built on first use and then shared."""
+        with self._search_index_lock:
+            if self._search_index is None:
+                self._search_index = SuggestionIndex(self.table, self.precinct_positions)
+        return self._search_index
+
+    @property
+    def spatial_index(self):
+        """Grid index over the table's coordinates, built on first use and then shared."""
+        with self._spatial_index_lock:
+            if self._spatial_index is None:
+                self._spatial_index = GridIndex(self.table.values('LAT').astype(float), self.table.values('LON').astype(float))
+        return self._spatial_index
+
+
+class ParcelMask:
+    """Boolean row mask tracking a set of parcel numbers, such as a session's visited addresses.
+
+    sync() only touches the rows of parcels added or removed since the last
+    call, so keeping the mask current costs nothing between clicks.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.mask = np.zeros(len(dataset.table), dtype=bool)
+        self.parcels = frozenset()
+
+    def sync(self, parcel_numbers):
+        if parcel_numbers is self.parcels:
+            return self.mask
+        old_base, old_changed = overlay_parts(self.parcels)
+        new_base, new_changed = overlay_parts(parcel_numbers)
+        if old_base is new_base:
+            # Two overlays of one stored set can only differ where either changed it
+            candidates = old_changed | new_changed
+            removed = {parcel for parcel in candidates if parcel in self.parcels and parcel not in parcel_numbers}
+            added = {parcel for parcel in candidates if parcel in parcel_numbers and parcel not in self.parcels}
+        else:
+            removed = self.parcels - parcel_numbers
+            added = parcel_numbers - self.parcels
+        if removed:
+            self.mask[self.dataset.parcel_positions(removed)] = False
+        if added:
+            self.mask[self.dataset.parcel_positions(added)] = True
+        # A shared snapshot set is kept as is, so unchanged results skip the diff
+        self.parcels = parcel_numbers if isinstance(parcel_numbers, (frozenset, ParcelSetOverlay)) else frozenset(parcel_numbers)
+        return self.mask
+
+
+# Keep Arrow strings Arrow-backed so they stay in the memory-mapped file
+def arrow_string_dtype(arrow_type):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+# Write normalized addresses as an uncompressed Arrow IPC file
+def write_compiled_dataset(address_df, path, metadata=None):
+    """Compile a normalized address frame into a file that can be memory-mapped.
+
+    Rows are sorted by precinct so each precinct is one contiguous region of
+    the file. The write goes through a temporary file and a rename, so
+    running app processes never see a half-written dataset.
+    """
+    df = prepare_frame(address_df).sort_values('PRECINCT', kind='stable').reset_index(drop=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    schema_metadata = dict(table.schema.metadata or {})
+    compiled = {'format': COMPILED_FORMAT_VERSION, 'compiled_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'records': len(df)}
+    compiled.update(metadata or {})
+    for key, value in compiled.items():
+        schema_metadata[(COMPILED_METADATA_PREFIX + key).encode()] = str(value).encode()
+    table = table.replace_schema_metadata(schema_metadata)
+
+    temp_path = path + '.tmp'
+    with pa.OSFile(temp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, path)
+    return len(df)
+
+
+# Memory-map a compiled dataset
+def read_compiled_dataset(path):
+    """Return (address frame, compile metadata) for a file from write_compiled_dataset.
+
+    Text columns come back as Arrow-backed strings that point into the
+    mapping, so processes loading the same file share those pages through
+    the OS page cache. Only numeric columns and categorical codes are copied.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    metadata = {}
+    for key, value in (table.schema.metadata or {}).items():
+        key = key.decode()
+        if key.startswith(COMPILED_METADATA_PREFIX):
+            metadata[key[len(COMPILED_METADATA_PREFIX):]] = value.decode()
+    if metadata.get('format') != COMPILED_FORMAT_VERSION:
+        raise ValueError(f"unsupported compiled dataset format {metadata.get('format')!r}")
+
+    return table.to_pandas(types_mapper=arrow_string_dtype), metadata
+
+
+# True when the JSON a dataset was compiled from has changed since
+def compiled_dataset_is_stale(metadata):
+    source = metadata.get('source')
+    if not source or not os.path.exists(source):
+        return False
+    stat = os.stat(source)
+    return str(stat.st_size) != metadata.get('source_size') or str(stat.st_mtime_ns) != metadata.get('source_mtime_ns')
@@ -0,0 +1,162 @@
+"""Compare the per-record normalization loop with the vectorized pipeline.
+
+Usage:
+    python benchmarks/normalize_benchmark.py [--records 500000] [--with-geometry]
+
+Writes a synthetic parcel export of the requested size to a temporary file,
+loads it, and times the old loop from process_address_data against
+address_store.normalize_frame on identical copies of the records.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from address_store import normalize_frame  # noqa: E402
+from district6 import DISTRICT6_PRECINCTS as PRECINCTS  # noqa: E402
+
+PROPERTY_USES = [
+    "0110 Single Family Home",
+    "0436 Condo Conversion  - Apartments to Platted Condo (Predominately Owner-Occupied)",
+    "0310 Multi-Family 10 Units or More",
+    "1100 Retail Store",
+    "1710 Office Building",
+    "0000 Vacant Residential",
+]
+STREETS = ["3RD", "4TH", "BEACH", "CENTRAL", "TAYLOR", "MLK", "16TH", "OAK", "PALM", "BAYSHORE"]
+
+
+# Build a synthetic parcel export shaped like the property appraiser's
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        street_num = rng.randrange(100, 1200)
+        zip_code = rng.choice(["33701", "33705", "33711"])
+        record = {
+            "PARCEL_NUMBER": f"SYN-{i:07d}",
+            "OWNER1": f"OWNER {i}",
+            "OWNER2": None,
+            "SITE_ADDRESS": f"{street_num} {rng.choice(STREETS)} ST",
+            "SITE_CITYZIP": f"ST PETERSBURG, FL {zip_code}",
+            "PROPERTY_USE": rng.choice(PROPERTY_USES),
+            "HX_YN": rng.choice(["Yes", "No"]),
+            "STR_NUM": street_num,
+            "STR_NAME": rng.choice(STREETS),
+            "STR_UNIT": "",
+            "STR_ZIP": zip_code,
+        }
+        if i % 2 == 0:
+            record["LAT"] = 27.75 + rng.random() * 0.05
+            record["LON"] = -82.67 + rng.random() * 0.05
+        records.append(record)
+    return records
+
+
+# The per-record loop process_address_data used before the vectorized pipeline
+def legacy_normalize(address_data):
+    for address in address_data:
+        property_use = str(address.get('PROPERTY_USE', ''))
+        if '0300' in property_use or 'Multi-Family' in property_use or 'Condo' in property_use or 'Apartment' in property_use:
+            address['PROPERTY_USE'] = "Residential"
+        elif '0100' in property_use or '0110' in property_use or 'Single Family' in property_use or 'Home' in property_use:
+            address['PROPERTY_USE'] = "Residential"
+        elif 'Commercial' in property_use or 'Business' in property_use or 'Office' in property_use or 'Retail' in property_use:
+            address['PROPERTY_USE'] = "Business"
+        else:
+            address['PROPERTY_USE'] = "Residential"
+
+        if 'PRECINCT' not in address:
+            zip_code = str(address.get('STR_ZIP', ''))
+            street_num = int(address.get('STR_NUM', 0))
+            if zip_code == '33705':
+                address['PRECINCT'] = ['106', '108', '109', '116', '117'][min(street_num // 200, 4)]
+            elif zip_code == '33701':
+                address['PRECINCT'] = ['118', '119', '121', '122', '123'][min(street_num // 200, 4)]
+            else:
+                address['PRECINCT'] = '130'
+
+        if 'BUILDING_NAME' not in address:
+            property_use = str(address.get('PROPERTY_USE', ''))
+            if '0300' in property_use or 'Multi-Family' in property_use or 'Condo' in property_use or 'Apartment' in property_use:
+                street_num = str(address.get('STR_NUM', ''))
+                street_name = str(address.get('STR_NAME', ''))
+                address['BUILDING_NAME'] = f"{street_name.title()} {street_num} Condos" if street_name else f"Building {street_num}"
+
+        if 'LAT' not in address or 'LON' not in address:
+            street_num = float(address.get('STR_NUM', 0))
+            precinct_id = str(address.get('PRECINCT', '106'))
+            address['LAT'] = 27.773056 + (street_num % 100) * 0.0001 + (int(precinct_id) % 10) * 0.001
+            address['LON'] = -82.639999 + (street_num % 50) * 0.0002 - (int(precinct_id) % 5) * 0.001
+
+        if 'SECTION' not in address:
+            precinct_id = str(address.get('PRECINCT', ''))
+            precincts = [dict(p) for p in PRECINCTS]
+            precinct_info = next((p for p in precincts if p['id'] == precinct_id), None)
+            address['SECTION'] = precinct_info['section'] if precinct_info else "North"
+
+    for address in address_data:
+        if (address.get('STR_NUM') == 315 and
+                'TAYLOR' in str(address.get('STR_NAME', '')) and
+                address.get('STR_ZIP') == '33705'):
+            address['SECTION'] = "North"
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--with-geometry", action="store_true",
+                        help="also assign precincts by point-in-polygon in the vectorized run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic_addresses.json")
+        with open(path, "w") as f:
+            json.dump(make_records(args.records), f)
+        size_mb = os.path.getsize(path) / 1e6
+
+        start = time.perf_counter()
+        with open(path) as f:
+            records = json.load(f)
+        load_seconds = time.perf_counter() - start
+
+    print(f"{len(records):,} records ({size_mb:.0f} MB), json.load {load_seconds:.2f}s")
+
+    legacy_records = copy.deepcopy(records)
+    start = time.perf_counter()
+    legacy_normalize(legacy_records)
+    legacy_seconds = time.perf_counter() - start
+    del legacy_records
+
+    precinct_index = None
+    if args.with_geometry:
+        from precinct_geometry import load_precinct_index
+        precinct_index = load_precinct_index()
+
+    # The address table is built from a DataFrame either way, so time that separately
+    start = time.perf_counter()
+    df = pd.DataFrame.from_records(records)
+    frame_seconds = time.perf_counter() - start
+
+    section_by_precinct = {p["id"]: p["section"] for p in PRECINCTS}
+    start = time.perf_counter()
+    normalize_frame(df, section_by_precinct, precinct_index)
+    vectorized_seconds = time.perf_counter() - start
+
+    print(f"DataFrame build:     {frame_seconds:.2f}s (paid by both paths when building the address table)")
+    print(f"per-record loop:     {legacy_seconds:.2f}s")
+    print(f"vectorized pipeline: {vectorized_seconds:.2f}s")
+    print(f"speedup:             {legacy_seconds / vectorized_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Canvass progress counters per precinct, per section and district-wide."""
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+DISTRICT = ('district', None)
+
+
+# Counter deltas for one parcel's result, added when it is set and subtracted when replaced
+def result_counts(state):
+    visited, support_level, donation, follow_up = state
+    counts = Counter()
+    if visited:
+        counts['visited'] += 1
+    if support_level and support_level != "unknown":
+        counts['support:' + support_level] += 1
+    if donation:
+        counts['donation_total'] += donation
+        counts['donors'] += 1
+    if follow_up:
+        counts['follow_ups'] += 1
+    return counts
+
+
+class CanvassStats:
+    """Running totals of canvass results, updated per interaction event.
+
+    Each parcel's last known result is kept, so an event only moves the
+    counters of the precinct, section and district that parcel belongs
+    to, by the difference between its old and new result. sync() pulls
+    the events logged since the last call; unflushed updates are layered
+    on a copy of the few counters they touch when stats are read.
+    """
+
+    def __init__(self, dataset, section_by_precinct):
+        self.dataset = dataset
+        table = dataset.table
+        self.precinct_ids = list(dataset.precinct_positions)
+        self.section_by_precinct = dict(section_by_precinct)
+
+        # Precinct of every parcel (first row wins when a parcel number repeats)
+        row_precinct = np.full(len(table), -1, dtype=np.int32)
+        for code, positions in enumerate(dataset.precinct_positions.values()):
+            row_precinct[positions] = code
+        parcels = pd.Index(table.values('PARCEL_NUMBER'))
+        first = ~parcels.duplicated()
+        self._parcel_index = parcels[first]
+        self._parcel_precinct = row_precinct[first]
+
+        # Address totals never change with results, so count them once
+        self.addresses = Counter()
+        for precinct_id, positions in dataset.precinct_positions.items():
+            for scope in self._scopes_of(precinct_id):
+                self.addresses[scope] += len(positions)
+
+        self._lock = threading.Lock()
+        self._states = {}
+        self._scopes = {}
+        self._counters = {}
+        self._last_event_id = None
+
+    def _scopes_of(self, precinct_id):
+        scopes = [DISTRICT, ('precinct', precinct_id)]
+        section = self.section_by_precinct.get(precinct_id)
+        if section:
+            scopes.append(('section', section))
+        return scopes
+
+    def _parcel_scopes(self, parcel_numbers):
+        # Look up the scopes of parcels not seen before, in one batch
+        new_parcels = [parcel for parcel in dict.fromkeys(parcel_numbers) if parcel not in self._scopes]
+        if new_parcels:
+            index = self._parcel_index.get_indexer(new_parcels)
+            codes = np.where(index >= 0, self._parcel_precinct[index], -1)
+            for parcel, code in zip(new_parcels, codes):
+                # Results for parcels outside this dataset are not counted anywhere
+                self._scopes[parcel] = self._scopes_of(self.precinct_ids[code]) if code >= 0 else []
+
+    def _apply(self, updates, states, counters):
+        self._parcel_scopes(parcel for parcel, _ in updates)
+        for parcel_number, fields in updates:
+            old = states.get(parcel_number, (False, None, None, False))
+            new = (
+                fields.get('visited', old[0]),
+                fields.get('support_level', old[1]),
+                fields.get('donation', old[2]),
+                fields.get('follow_up', old[3])
+            )
+            if new == old:
+                continue
+            states[parcel_number] = new
+
+            delta = result_counts(new)
+            delta.subtract(result_counts(old))
+            for scope in self._scopes[parcel_number]:
+                counter = counters.setdefault(scope, Counter())
+                counter.update(delta)
+
+    def sync(self, store):
+        """Apply every event committed to the store since the last sync."""
+        with self._lock:
+            updates, self._last_event_id = store.changes(self._last_event_id)
+            if updates:
+                self._apply(updates, self._states, self._counters)
+
+    def stats(self, precinct_id=None, section=None, unflushed=()):
+        """Progress for a precinct, a section, or (by default) the whole district.
+
+        unflushed updates (see WriteBehindQueue.unflushed) are counted
+        without being applied to the running totals.
+        """
+        if precinct_id is not None:
+            scope = ('precinct', precinct_id)
+        elif section is not None:
+            scope = ('section', section)
+        else:
+            scope = DISTRICT
+
+        with self._lock:
+            counter = self._counters.get(scope, Counter())
+            if unflushed:
+                # Replay the pending updates on copies of just the parcels and counters involved
+                states = {parcel: self._states[parcel] for parcel, _ in unflushed if parcel in self._states}
+                counters = {scope: Counter(counter)}
+                self._apply(list(unflushed), states, counters)
+                counter = counters[scope]
+
+        support_levels = {key.split(':', 1)[1]: count for key, count in counter.items() if key.startswith('support:') and count}
+        return {
+            'addresses': self.addresses[scope],
+            'visited': counter['visited'],
+            'support_levels': support_levels,
+            'donation_total': counter['donation_total'],
+            'donors': counter['donors'],
+            'follow_ups': counter['follow_ups']
+        }
@@ -0,0 +1,534 @@
+"""Durable canvass results shared by every volunteer session, stored in SQLite.
+
+Every interaction is appended to the canvass_events log and never changed
+afterwards. canvass_results holds the current state of each parcel,
+compacted from the log up to the event id recorded in canvass_meta; reads
+combine it with the few events logged since.
+"""
+import atexit
+import collections.abc
+import logging
+import os
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+
+# Database file, next to the app unless CANVASS_DB_PATH says otherwise
+DEFAULT_DB_PATH = os.environ.get(
+    "CANVASS_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "canvass_results.db")
+)
+
+# How long a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT_MS = 5000
+
+# Result fields a volunteer can set on a parcel
+RESULT_FIELDS = ['visited', 'support_level', 'donation', 'notes', 'follow_up']
+
+# Fields stored as 0/1 integers
+FLAG_FIELDS = ['visited', 'follow_up']
+
+# Compact the event log once this many events are past the last compaction,
+# or when any are and this many seconds have passed
+COMPACT_EVERY = 500
+COMPACT_INTERVAL = 60
+
+# Write-behind flushes after this many seconds, or sooner once this many parcels are pending
+FLUSH_INTERVAL = 0.5
+MAX_PENDING = 200
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS canvass_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at REAL NOT NULL,
+    volunteer TEXT,
+    parcel_number TEXT NOT NULL,
+    visited INTEGER,
+    support_level TEXT,
+    donation REAL,
+    notes TEXT,
+    follow_up INTEGER
+);
+CREATE TABLE IF NOT EXISTS canvass_results (
+    parcel_number TEXT PRIMARY KEY,
+    visited INTEGER NOT NULL DEFAULT 0,
+    support_level TEXT,
+    donation REAL,
+    notes TEXT,
+    volunteer TEXT,
+    updated_at REAL NOT NULL,
+    follow_up INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS canvass_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Columns read back from events and results, in this order
+EVENT_COLUMNS = ['event_id', 'recorded_at', 'volunteer', 'parcel_number'] + RESULT_FIELDS
+
+
+# The fields an event or result row sets, skipping the ones it left NULL
+def row_fields(row):
+    fields = {}
+    for column, value in zip(RESULT_FIELDS, row):
+        if value is not None:
+            fields[column] = bool(value) if column in FLAG_FIELDS else value
+    return fields
+
+
+class ParcelSetOverlay(collections.abc.Set):
+    """Read-only set of parcel numbers: a frozenset with a few members added and removed, without copying it."""
+
+    def __init__(self, base, added=(), removed=()):
+        self.base = base
+        self.added = frozenset(added) - base
+        self.removed = frozenset(removed) & base
+        # The only members whose presence can differ from base
+        self.changed = self.added | self.removed
+
+    def __contains__(self, parcel_number):
+        return parcel_number in self.added or (parcel_number in self.base and parcel_number not in self.removed)
+
+    def __iter__(self):
+        for parcel_number in self.base:
+            if parcel_number not in self.removed:
+                yield parcel_number
+        yield from self.added
+
+    def __len__(self):
+        return len(self.base) - len(self.removed) + len(self.added)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return frozenset(iterable)
+
+
+# The stored set a parcel set reads through to, and the members that may differ from it
+def overlay_parts(parcels):
+    if isinstance(parcels, ParcelSetOverlay):
+        return parcels.base, parcels.changed
+    return parcels, frozenset()
+
+
+class CanvassResults:
+    """Read-only snapshot of every parcel's canvass result.
+
+    visited and follow_ups are frozensets (or ParcelSetOverlays) and the
+    other fields are read-only mappings, so one snapshot can be handed to
+    every session without copying.
+    """
+
+    def __init__(self, visited=frozenset(), support_levels=None, donations=None, notes=None, follow_ups=frozenset()):
+        self.visited = visited if isinstance(visited, ParcelSetOverlay) else frozenset(visited)
+        self.support_levels = MappingProxyType(support_levels or {})
+        self.donations = MappingProxyType(donations or {})
+        self.notes = MappingProxyType(notes or {})
+        self.follow_ups = follow_ups if isinstance(follow_ups, ParcelSetOverlay) else frozenset(follow_ups)
+
+    def with_updates(self, updates):
+        """A new snapshot with (parcel_number, fields) updates applied on top of this one."""
+        visited = set(self.visited)
+        support_levels = dict(self.support_levels)
+        donations = dict(self.donations)
+        notes = dict(self.notes)
+        follow_ups = set(self.follow_ups)
+        for parcel_number, fields in updates:
+            for flag, members in (('visited', visited), ('follow_up', follow_ups)):
+                if flag in fields:
+                    if fields[flag]:
+                        members.add(parcel_number)
+                    else:
+                        members.discard(parcel_number)
+            if 'support_level' in fields:
+                support_levels[parcel_number] = fields['support_level']
+            if 'donation' in fields:
+                donations[parcel_number] = fields['donation']
+            if 'notes' in fields:
+                notes[parcel_number] = fields['notes']
+        return CanvassResults(visited, support_levels, donations, notes, follow_ups)
+
+    def overlay(self, updates):
+        """Like with_updates, but the new snapshot reads through to this one instead of copying it.
+
+        Building it costs only the size of updates, which suits a few
+        unsaved taps laid over many stored results.
+        """
+        added = {flag: set() for flag in FLAG_FIELDS}
+        removed = {flag: set() for flag in FLAG_FIELDS}
+        changes = {'support_level': {}, 'donation': {}, 'notes': {}}
+        for parcel_number, fields in updates:
+            for flag in FLAG_FIELDS:
+                if flag in fields:
+                    (added if fields[flag] else removed)[flag].add(parcel_number)
+                    (removed if fields[flag] else added)[flag].discard(parcel_number)
+            for field, values in changes.items():
+                if field in fields:
+                    values[parcel_number] = fields[field]
+        return CanvassResults(
+            ParcelSetOverlay(self.visited, added['visited'], removed['visited']),
+            collections.ChainMap(changes['support_level'], self.support_levels),
+            collections.ChainMap(changes['donation'], self.donations),
+            collections.ChainMap(changes['notes'], self.notes),
+            ParcelSetOverlay(self.follow_ups, added['follow_up'], removed['follow_up'])
+        )
+
+
+class CanvassStore:
+    """Canvass event log and compacted results in a WAL-mode SQLite database.
+
+    Writes only ever append events, so their cost does not grow with the
+    number of doors knocked. WAL lets readers run alongside the single
+    writer, so volunteers saving at the same time queue for milliseconds
+    rather than blocking page loads. Reads go through a cached snapshot
+    that, after a commit from this process or any other, is brought up to
+    date with the events logged since it was built.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+        # Databases created before the follow-up flag existed
+        result_columns = [row[1] for row in self._connection.execute("PRAGMA table_info(canvass_results)")]
+        if 'follow_up' not in result_columns:
+            self._connection.execute("ALTER TABLE canvass_results ADD COLUMN follow_up INTEGER NOT NULL DEFAULT 0")
+
+        self._snapshot = None
+        self._snapshot_version = None
+        self._snapshot_event_id = None
+        self._writes = 0
+        self._last_compaction = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _compacted_through(self):
+        row = self._connection.execute("SELECT value FROM canvass_meta WHERE key = 'compacted_through'").fetchone()
+        return row[0] if row else 0
+
+    def update_many(self, updates, volunteer=""):
+        """Append one event per (parcel_number, fields) pair, in one transaction.
+
+        Fields not named in a pair are left NULL in the event and keep
+        their current value, so marking a door visited does not clear a
+        support level recorded earlier. An update may also be a
+        (parcel_number, fields, recorded_at) triple for a result recorded
+        earlier (offline); it is logged at that time instead of now.
+        """
+        now = time.time()
+        rows = []
+        for parcel_number, fields, *recorded_at in updates:
+            values = []
+            for column in RESULT_FIELDS:
+                value = fields.get(column)
+                values.append(int(bool(value)) if value is not None and column in FLAG_FIELDS else value)
+            rows.append([recorded_at[0] if recorded_at and recorded_at[0] is not None else now, volunteer, parcel_number] + values)
+        if not rows:
+            return
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    f"INSERT INTO canvass_events (recorded_at, volunteer, parcel_number, {', '.join(RESULT_FIELDS)}) "
+                    f"VALUES (?, ?, ?{', ?' * len(RESULT_FIELDS)})",
+                    rows
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._writes += 1
+
+    def update(self, parcel_number, volunteer="", **fields):
+        """Record some result fields of one parcel."""
+        self.update_many([(parcel_number, fields)], volunteer=volunteer)
+
+    def events(self, parcel_number=None, after=0):
+        """Logged events in order, as dicts, optionally for one parcel or after an event id."""
+        query = f"SELECT {', '.join(EVENT_COLUMNS)} FROM canvass_events WHERE event_id > ?"
+        params = [after]
+        if parcel_number is not None:
+            query += " AND parcel_number = ?"
+            params.append(parcel_number)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY event_id", params).fetchall()
+        return [dict(zip(EVENT_COLUMNS, row)) for row in rows]
+
+    def changes(self, after=None):
+        """Result updates since an event id, and the id to pass next time.
+
+        With after=None this is the whole current state: the compacted
+        results followed by the events logged since compaction.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                rows = []
+                if after is None:
+                    after = self._compacted_through()
+                    rows = self._connection.execute(
+                        f"SELECT parcel_number, {', '.join(RESULT_FIELDS)} FROM canvass_results"
+                    ).fetchall()
+                tail = self._connection.execute(
+                    f"SELECT event_id, parcel_number, {', '.join(RESULT_FIELDS)} FROM canvass_events WHERE event_id > ? ORDER BY event_id",
+                    (after,)
+                ).fetchall()
+            finally:
+                self._connection.execute("COMMIT")
+        updates = [(row[0], row_fields(row[1:])) for row in rows]
+        updates += [(row[1], row_fields(row[2:])) for row in tail]
+        return updates, tail[-1][0] if tail else after
+
+    def updated_at(self):
+        """When each parcel's result last changed, as {parcel_number: recorded_at}."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                rows = self._connection.execute("SELECT parcel_number, updated_at FROM canvass_results").fetchall()
+                rows += self._connection.execute(
+                    "SELECT parcel_number, MAX(recorded_at) FROM canvass_events WHERE event_id > ? GROUP BY parcel_number",
+                    (self._compacted_through(),)
+                ).fetchall()
+            finally:
+                self._connection.execute("COMMIT")
+        updated_at = {}
+        for parcel_number, recorded_at in rows:
+            updated_at[parcel_number] = max(recorded_at, updated_at.get(parcel_number, recorded_at))
+        return updated_at
+
+    def replay(self, through=None):
+        """Rebuild results from the event log alone, optionally only up to an event id."""
+        query = f"SELECT parcel_number, {', '.join(RESULT_FIELDS)} FROM canvass_events"
+        params = []
+        if through is not None:
+            query += " WHERE event_id <= ?"
+            params.append(through)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY event_id", params).fetchall()
+        return CanvassResults().with_updates((row[0], row_fields(row[1:])) for row in rows)
+
+    def compact(self):
+        """Fold events logged since the last compaction into canvass_results; returns how many."""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                compacted_through = self._compacted_through()
+                rows = self._connection.execute(
+                    f"SELECT event_id, recorded_at, volunteer, parcel_number, {', '.join(RESULT_FIELDS)} "
+                    "FROM canvass_events WHERE event_id > ? ORDER BY event_id",
+                    (compacted_through,)
+                ).fetchall()
+
+                # Latest value of each field per parcel, then one upsert per parcel
+                latest = {}
+                for event_id, recorded_at, volunteer, parcel_number, *values in rows:
+                    _, _, fields = latest.get(parcel_number, (None, None, {}))
+                    latest[parcel_number] = (volunteer, recorded_at, {**fields, **row_fields(values)})
+
+                statements = {}
+                for parcel_number, (volunteer, recorded_at, fields) in latest.items():
+                    columns = tuple(column for column in RESULT_FIELDS if column in fields)
+                    values = [int(fields[column]) if column in FLAG_FIELDS else fields[column] for column in columns]
+                    statements.setdefault(columns, []).append([parcel_number, volunteer, recorded_at] + values)
+                for columns, upserts in statements.items():
+                    assignments = "".join(f", {column} = excluded.{column}" for column in columns)
+                    self._connection.executemany(
+                        f"INSERT INTO canvass_results (parcel_number, volunteer, updated_at{''.join(', ' + column for column in columns)}) "
+                        f"VALUES (?, ?, ?{', ?' * len(columns)}) "
+                        f"ON CONFLICT (parcel_number) DO UPDATE SET volunteer = excluded.volunteer, updated_at = excluded.updated_at{assignments}",
+                        upserts
+                    )
+
+                if rows:
+                    self._connection.execute(
+                        "INSERT INTO canvass_meta (key, value) VALUES ('compacted_through', ?) "
+                        "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                        (rows[-1][0],)
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            self._last_compaction = time.monotonic()
+        return len(rows)
+
+    def compact_if_due(self, every=COMPACT_EVERY, interval=COMPACT_INTERVAL):
+        """Compact when enough events have piled up, or some have waited long enough."""
+        with self._lock:
+            backlog = self._connection.execute(
+                "SELECT COUNT(*) FROM canvass_events WHERE event_id > ?", (self._compacted_through(),)
+            ).fetchone()[0]
+            overdue = time.monotonic() - self._last_compaction >= interval
+        if backlog >= every or (backlog and overdue):
+            return self.compact()
+        return 0
+
+    def snapshot(self):
+        """Current results, updated only when the database has changed since the last call."""
+        with self._lock:
+            # data_version moves when another connection commits; _writes covers our own
+            version = (self._connection.execute("PRAGMA data_version").fetchone()[0], self._writes)
+            if self._snapshot is not None and version == self._snapshot_version:
+                return self._snapshot
+            snapshot, last_event_id = self._snapshot, self._snapshot_event_id
+
+        # Only the events logged since the cached snapshot (the whole state the first time)
+        updates, last_event_id = self.changes(last_event_id)
+        if snapshot is None or updates:
+            snapshot = (snapshot or CanvassResults()).with_updates(updates)
+        with self._lock:
+            # A slower call that read fewer events must not replace a newer snapshot
+            if self._snapshot_event_id is None or last_event_id >= self._snapshot_event_id:
+                self._snapshot = snapshot
+                self._snapshot_version = version
+                self._snapshot_event_id = last_event_id
+        return snapshot
+
+
+class WriteBehindQueue:
+    """Coalescing write-behind buffer in front of a CanvassStore.
+
+    put() only merges the fields into a pending entry per parcel and
+    volunteer, so a burst of taps on the same door becomes one row write
+    credited to whoever made them. A background thread flushes the pending
+    entries, one batched transaction per volunteer, every flush_interval
+    seconds or as soon as max_pending parcels are waiting.
+    snapshot() overlays unflushed entries on the stored results, so a
+    volunteer sees their own taps before they reach the database; the
+    overlay is a view, so a tap does not copy every stored result.
+    """
+
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._flushing = {}
+        self._version = 0
+        self._overlay = None
+
+        self._thread = threading.Thread(target=self._run, name="canvass-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    # Merge fields into a volunteer's pending entry for a parcel, taking them out of other
+    # volunteers' entries so each field is queued once, for whoever set it last (lock held)
+    def _merge(self, parcel_number, volunteer, fields):
+        entries = self._pending.setdefault(parcel_number, {})
+        for other, other_fields in list(entries.items()):
+            if other != volunteer:
+                remaining = {field: value for field, value in other_fields.items() if field not in fields}
+                if remaining:
+                    entries[other] = remaining
+                else:
+                    del entries[other]
+        entries[volunteer] = {**entries.get(volunteer, {}), **fields}
+
+    def put(self, parcel_number, volunteer="", **fields):
+        """Queue result fields for a parcel, merging them with the volunteer's still pending."""
+        with self._lock:
+            self._merge(parcel_number, volunteer, fields)
+            self._version += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write every pending entry to the store now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                # Entries being written stay visible to snapshot() until they commit
+                self._flushing, self._pending = self._pending, {}
+
+            by_volunteer = {}
+            for parcel_number, entries in self._flushing.items():
+                for volunteer, fields in entries.items():
+                    by_volunteer.setdefault(volunteer, []).append((parcel_number, fields))
+            committed = set()
+            try:
+                for volunteer, updates in by_volunteer.items():
+                    self.store.update_many(updates, volunteer=volunteer)
+                    committed.add(volunteer)
+            except Exception:
+                # Put the batches that did not commit back under anything queued since, and retry them next time
+                with self._lock:
+                    newer, self._pending = self._pending, {}
+                    for parcel_number, entries in self._flushing.items():
+                        for volunteer, fields in entries.items():
+                            if volunteer not in committed:
+                                self._merge(parcel_number, volunteer, fields)
+                    for parcel_number, entries in newer.items():
+                        for volunteer, fields in entries.items():
+                            self._merge(parcel_number, volunteer, fields)
+                    self._flushing = {}
+                    self._version += 1
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self._version += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.store.compact_if_due()
+            except Exception:
+                logger.exception("Could not flush canvass results; will retry")
+
+    # Entries being written, then queued ones, as (parcel_number, fields) updates (lock held)
+    def _updates(self):
+        return [
+            (parcel_number, fields)
+            for queued in (self._flushing, self._pending)
+            for parcel_number, entries in queued.items()
+            for fields in entries.values()
+        ]
+
+    def unflushed(self):
+        """(parcel_number, fields) updates queued or being written, oldest first."""
+        with self._lock:
+            return self._updates()
+
+    def snapshot(self):
+        """Stored results with every unflushed update applied.
+
+        The unflushed entries are copied before the stored results are
+        read, so an entry a flush commits in between is in both rather
+        than in neither. The store is read outside the queue's lock, so
+        taps and flushes never wait on it.
+        """
+        with self._lock:
+            version = self._version
+            cached = self._overlay
+            updates = self._updates()
+
+        base = self.store.snapshot()
+        if not updates:
+            return base
+        if cached is not None and cached[0] is base and cached[1] == version:
+            return cached[2]
+        overlay = base.overlay(updates)
+        with self._lock:
+            self._overlay = (base, version, overlay)
+        return overlay
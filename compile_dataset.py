@@ -0,0 +1,69 @@
+"""Compile a raw parcel export into the memory-mapped dataset the app loads.
+
+Usage:
+    python compile_dataset.py SOURCE.json [--output addresses.arrow] [--voters VOTERS.xlsx]
+
+Streams SOURCE.json, runs the same normalization the app does (property use,
+point-in-polygon precincts, sections, coordinates, building names, household
+deduplication) and writes
+an Arrow IPC file. The app memory-maps that file at startup instead of parsing
+and normalizing the JSON again; recompile whenever the export changes.
+
+With --voters, registered voters from a voter workbook are joined onto the
+doors by address, adding VOTER_COUNT and VOTER_NAMES columns; recompile with
+the new workbook to refresh them.
+"""
+import argparse
+import os
+import time
+import zipfile
+
+from address_store import iter_file_chunks, iter_json_records, write_compiled_dataset
+from district6 import normalize_district_addresses
+from precinct_geometry import load_precinct_index
+from voter_file import iter_voters, join_voters
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addresses.arrow')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a parcel JSON export for fast app startup.")
+    parser.add_argument("source", help="raw parcel export (JSON array or newline-separated records)")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT, help="compiled dataset path (default: %(default)s)")
+    parser.add_argument("--voters", help="voter workbook (.xlsx) to join onto the doors by address")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    source = os.path.abspath(args.source)
+    stat = os.stat(source)
+
+    skipped = []
+    with open(source, 'rb') as f:
+        address_df, added_ariel, merged = normalize_district_addresses(iter_json_records(iter_file_chunks(f), skipped), load_precinct_index())
+
+    metadata = {
+        'source': source,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+    }
+    if args.voters:
+        try:
+            address_df, matched, unmatched = join_voters(address_df, iter_voters(args.voters))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            parser.error(f"could not read voters from {args.voters}: {e}")
+        metadata['voters'] = os.path.abspath(args.voters)
+        print(f"Matched {matched} voters to doors; {unmatched} had no matching address")
+
+    count = write_compiled_dataset(address_df, args.output, metadata)
+
+    print(f"Compiled {count} addresses from {source} into {args.output} in {time.perf_counter() - start:.1f}s")
+    if skipped:
+        print(f"Skipped {len(skipped)} malformed records")
+    if merged:
+        print(f"Merged {merged} duplicate parcel records into their households")
+    if added_ariel:
+        print("Added Ariel Fernandez's address to the dataset")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""District 6 precinct roster and the address rules specific to the district."""
+import numpy as np
+import pandas as pd
+
+from address_store import iter_record_batches, missing_text, normalize_frame
+from households import deduplicate_households
+
+# Real District 6 precinct data - removed strategy tags
+DISTRICT6_PRECINCTS = [
+    {"id": "106", "name": "Precinct 106", "total_addresses": 760, "turnout": "88.55%", "zip_codes": ["33701", "33705"], "section": "North"},
+    {"id": "108", "name": "Precinct 108", "total_addresses": 2773, "turnout": "81.79%", "zip_codes": ["33701", "33705"], "section": "North"},
+    {"id": "109", "name": "Precinct 109", "total_addresses": 2151, "turnout": "77.59%", "zip_codes": ["33701", "33705"], "section": "East"},
+    {"id": "116", "name": "Precinct 116", "total_addresses": 1511, "turnout": "67.97%", "zip_codes": ["33701", "33705"], "section": "East"},
+    {"id": "117", "name": "Precinct 117", "total_addresses": 1105, "turnout": "62.53%", "zip_codes": ["33701", "33705"], "section": "South"},
+    {"id": "118", "name": "Precinct 118", "total_addresses": 1175, "turnout": "85.36%", "zip_codes": ["33701", "33705"], "section": "South"},
+    {"id": "119", "name": "Precinct 119", "total_addresses": 2684, "turnout": "65.31%", "zip_codes": ["33701", "33705"], "section": "West"},
+    {"id": "121", "name": "Precinct 121", "total_addresses": 922, "turnout": "77.55%", "zip_codes": ["33701", "33705"], "section": "West"},
+    {"id": "122", "name": "Precinct 122", "total_addresses": 258, "turnout": "87.60%", "zip_codes": ["33701", "33705"], "section": "North"},
+    {"id": "123", "name": "Precinct 123", "total_addresses": 4627, "turnout": "85.35%", "zip_codes": ["33701", "33705"], "section": "East"},
+    {"id": "125", "name": "Precinct 125", "total_addresses": 1301, "turnout": "79.94%", "zip_codes": ["33701", "33705"], "section": "South"},
+    {"id": "126", "name": "Precinct 126", "total_addresses": 1958, "turnout": "77.07%", "zip_codes": ["33701", "33705"], "section": "West"},
+    {"id": "130", "name": "Precinct 130", "total_addresses": 3764, "turnout": "86.16%", "zip_codes": ["33701", "33705"], "section": "North"}
+]
+
+# Ariel's address, added to the dataset when an export does not include it
+ARIEL_ADDRESS = {
+    "PARCEL_NUMBER": "ARIEL-RESIDENCE",
+    "OWNER1": "FERNANDEZ, ARIEL",
+    "OWNER2": "",
+    "SITE_ADDRESS": "315 TAYLOR AVE S",
+    "SITE_CITYZIP": "ST PETERSBURG, FL 33705",
+    "SUBDIVISION": "DISTRICT 6",
+    "MAILING_ADDRESS_1": "315 TAYLOR AVE S",
+    "MAILING_CITY": "ST PETERSBURG",
+    "MAILING_STATE": "FL",
+    "MAILING_ZIP": "33705",
+    "PROPERTY_USE": "Residential",
+    "HX_YN": "Yes",
+    "STR_NUM": 315,
+    "STR_NAME": "TAYLOR",
+    "STR_UNIT": "",
+    "STR_ZIP": "33705",
+    "PRECINCT": "106",  # Explicitly assign precinct
+    "LAT": 27.773056,  # Add coordinates for map
+    "LON": -82.639999,
+    "SECTION": "North"  # Assign geographic section
+}
+
+
+# Geographic section of each District 6 precinct
+def section_by_precinct():
+    return {precinct['id']: precinct['section'] for precinct in DISTRICT6_PRECINCTS}
+
+
+# Find Ariel's address (315 Taylor, 33705) in a batch of records
+def ariel_address_mask(df):
+    if df.empty or not {'STR_NUM', 'STR_NAME', 'STR_ZIP'}.issubset(df.columns):
+        return np.zeros(len(df), dtype=bool)
+    return ((df['STR_NUM'] == 315) &
+            df['STR_NAME'].astype(str).str.contains('TAYLOR', regex=False) &
+            (df['STR_ZIP'] == '33705')).to_numpy()
+
+
+# Normalize raw records (any iterable) into a DataFrame ready for the address table
+def normalize_district_addresses(address_data, precinct_index=None):
+    """Return (normalized DataFrame, whether Ariel's address had to be added, duplicate rows merged)."""
+    sections = section_by_precinct()
+
+    # Normalize in batches so raw records never have to be held all at once
+    frames = []
+    for batch in iter_record_batches(address_data):
+        df = pd.DataFrame.from_records(batch)
+
+        # Special case for Ariel's address when it comes without a precinct
+        is_ariel = ariel_address_mask(df) & missing_text(df, 'PRECINCT')
+        if is_ariel.any():
+            if 'PRECINCT' not in df.columns:
+                df['PRECINCT'] = ""
+            df.loc[is_ariel, 'PRECINCT'] = '106'
+            df.loc[is_ariel, 'OWNER1'] = 'FERNANDEZ, ARIEL'
+
+        # Classify property use, assign precincts, building names, coordinates and sections
+        frames.append(normalize_frame(df, sections, precinct_index))
+
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = normalize_frame(pd.DataFrame(), sections, precinct_index)
+
+    # One row per door: parcels of the same household collapse into one
+    df, merged = deduplicate_households(df)
+
+    # Make sure Ariel's address is included and has a section
+    ariel_rows = np.flatnonzero(ariel_address_mask(df))
+    if len(ariel_rows) > 0:
+        df.loc[ariel_rows[0], 'SECTION'] = "North"
+        return df, False, merged
+
+    df = pd.concat([df, pd.DataFrame([ARIEL_ADDRESS])], ignore_index=True)
+    return df, True, merged
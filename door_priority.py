@@ -0,0 +1,217 @@
+"""Door priority scores and the highest-value unvisited doors of each precinct."""
+import heapq
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Precinct targets file shipped with the app
+PRECINCT_TARGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'precincts.json')
+
+# Weight of each door attribute in the score; every attribute is scaled to 0..1 first
+SCORE_WEIGHTS = {
+    'turnout': 1.0,
+    'priority': 1.0,
+    'target_share': 0.5,
+    'homestead': 1.0,
+    'value': 0.5,
+    'residential': 0.5,
+    'registered': 1.0
+}
+
+# Added to a door's score by its last contact outcome; persuadable doors come back first
+OUTCOME_WEIGHTS = {
+    'unknown': 0.0,
+    'strong_support': -0.5,
+    'lean_support': 0.5,
+    'undecided': 1.0,
+    'lean_against': -0.5,
+    'strong_against': -2.0
+}
+FOLLOW_UP_WEIGHT = 1.0
+
+# Heaps are rebuilt once stale entries outnumber live ones by this factor
+HEAP_SLACK = 2
+
+
+# Precinct targets from precincts.json, keyed by precinct id ("106.0" becomes "106")
+def load_precinct_targets(path=PRECINCT_TARGETS_PATH):
+    with open(path) as f:
+        precincts = json.load(f)
+    targets = {}
+    for precinct in precincts:
+        precinct_id = str(precinct.get('precinct_id', '')).removesuffix('.0')
+        targets[precinct_id] = {
+            'priority_score': float(precinct.get('priority_score') or 0),
+            'target_households': float(precinct.get('target_households') or 0)
+        }
+    return targets
+
+
+# Turnout text such as "88.55%" as a fraction
+def turnout_fraction(turnout):
+    try:
+        return float(str(turnout).rstrip('%')) / 100
+    except ValueError:
+        return 0.0
+
+
+# Score change of one parcel's (support level, follow-up) outcome
+def outcome_weight(outcome):
+    support_level, follow_up = outcome
+    return OUTCOME_WEIGHTS.get(support_level or 'unknown', 0.0) + (FOLLOW_UP_WEIGHT if follow_up else 0.0)
+
+
+class DoorPriority:
+    """Priority score of every row and a max-heap of each precinct's rows by score.
+
+    The base score combines precinct turnout, priority_score and the share
+    of doors that are target households with each door's homestead flag,
+    just value (as a district-wide percentile), property use and, once a
+    voter file has been joined, whether anyone is registered there, all in one
+    vectorized pass. sync() pulls the contact outcomes logged since the
+    last call and rescores only those parcels, pushing their new scores
+    onto the heap; entries left behind by a rescore are skipped when they
+    surface, so top() never re-sorts a precinct. Doors logged as visited
+    leave their heap the first time they surface, and go back on it if
+    the visit is undone.
+    """
+
+    def __init__(self, dataset, precincts, targets):
+        self.dataset = dataset
+        table = dataset.table
+        count = len(table)
+
+        # Precinct attributes broadcast to their rows
+        turnout = np.zeros(count)
+        priority = np.zeros(count)
+        target_share = np.zeros(count)
+        precinct_turnout = {precinct['id']: turnout_fraction(precinct.get('turnout')) for precinct in precincts}
+        for precinct_id, positions in dataset.precinct_positions.items():
+            target = targets.get(precinct_id, {})
+            turnout[positions] = precinct_turnout.get(precinct_id, 0.0)
+            priority[positions] = target.get('priority_score', 0.0) / 100
+            if len(positions):
+                target_share[positions] = min(target.get('target_households', 0.0) / len(positions), 1.0)
+
+        homestead = pd.Series(table.values('HX_YN') if 'HX_YN' in table.columns else np.full(count, ""), dtype=object).astype(str).str.upper().isin(['YES', 'Y']).to_numpy()
+        value = pd.to_numeric(pd.Series(table.values('CNTY_JST_VALUE') if 'CNTY_JST_VALUE' in table.columns else np.full(count, np.nan)), errors='coerce')
+        value_rank = value.rank(pct=True).fillna(0).to_numpy()
+        residential = table.values('PROPERTY_USE').astype(str) == "Residential"
+        # Doors with registered voters, when a voter file has been joined (see voter_file)
+        registered = pd.to_numeric(pd.Series(table.values('VOTER_COUNT')), errors='coerce').fillna(0).to_numpy() > 0 if 'VOTER_COUNT' in table.columns else np.zeros(count, dtype=bool)
+
+        self.base = (
+            SCORE_WEIGHTS['turnout'] * turnout +
+            SCORE_WEIGHTS['priority'] * priority +
+            SCORE_WEIGHTS['target_share'] * target_share +
+            SCORE_WEIGHTS['homestead'] * homestead +
+            SCORE_WEIGHTS['value'] * value_rank +
+            SCORE_WEIGHTS['residential'] * residential +
+            SCORE_WEIGHTS['registered'] * registered
+        )
+        self.scores = self.base.copy()
+        self._visited = np.zeros(count, dtype=bool)
+
+        # Precinct of every row, for pushing rescored rows onto the right heap
+        self.precinct_ids = list(dataset.precinct_positions)
+        self._row_precinct = np.full(count, -1, dtype=np.int32)
+        for code, positions in enumerate(dataset.precinct_positions.values()):
+            self._row_precinct[positions] = code
+
+        # Max-heaps as (negated score, row) lists, built in linear time
+        self._heaps = {precinct_id: self._build_heap(precinct_id) for precinct_id in self.precinct_ids}
+
+        self._lock = threading.Lock()
+        self._outcomes = {}
+        self._last_event_id = None
+
+    def _build_heap(self, precinct_id):
+        positions = np.asarray(self.dataset.precinct_positions[precinct_id])
+        positions = positions[~self._visited[positions]]
+        heap = list(zip((-self.scores[positions]).tolist(), positions.tolist()))
+        heapq.heapify(heap)
+        return heap
+
+    def _push(self, positions, touched):
+        for position, score, code in zip(positions.tolist(), self.scores[positions].tolist(), self._row_precinct[positions].tolist()):
+            if code >= 0:
+                heapq.heappush(self._heaps[self.precinct_ids[code]], (-score, position))
+                touched.add(self.precinct_ids[code])
+
+    def _apply(self, updates):
+        changed = {}
+        visited = {}
+        for parcel_number, fields in updates:
+            if 'visited' in fields:
+                visited[parcel_number] = bool(fields['visited'])
+            old = self._outcomes.get(parcel_number, (None, False))
+            new = (fields.get('support_level', old[0]), fields.get('follow_up', old[1]))
+            if new != old:
+                self._outcomes[parcel_number] = new
+                changed[parcel_number] = outcome_weight(new)
+
+        touched = set()
+        if visited:
+            # Visited rows are dropped by top(); rows whose visit was undone go back on their heap
+            positions = self.dataset.parcel_positions(visited)
+            flags = pd.Series(self.dataset.table.values('PARCEL_NUMBER', positions), dtype=object).map(visited).to_numpy(dtype=bool)
+            returning = positions[self._visited[positions] & ~flags]
+            self._visited[positions] = flags
+            self._push(returning, touched)
+
+        if changed:
+            # Every row of a changed parcel is rescored at once
+            positions = self.dataset.parcel_positions(changed)
+            weights = pd.Series(self.dataset.table.values('PARCEL_NUMBER', positions), dtype=object).map(changed).to_numpy(dtype=float)
+            self.scores[positions] = self.base[positions] + weights
+
+            # New entries go on top of the old ones, which top() skips
+            self._push(positions[~self._visited[positions]], touched)
+
+        # Rebuild a heap once stale entries dominate it
+        for precinct_id in touched:
+            if len(self._heaps[precinct_id]) > HEAP_SLACK * max(len(self.dataset.precinct_positions[precinct_id]), 1):
+                self._heaps[precinct_id] = self._build_heap(precinct_id)
+
+    def sync(self, store):
+        """Rescore the parcels whose outcomes were logged since the last sync."""
+        with self._lock:
+            updates, self._last_event_id = store.changes(self._last_event_id)
+            if updates:
+                self._apply(updates)
+
+    def top(self, precinct_id, count, exclude=None):
+        """Up to count rows of a precinct with the highest scores, best first, and their scores.
+
+        exclude is a boolean mask over the whole table of rows to skip
+        (such as doors visited in this session but not yet synced). Only
+        the entries above the last row returned are popped; the ones still
+        unvisited go back on the heap afterwards.
+        """
+        with self._lock:
+            heap = self._heaps.get(precinct_id, [])
+            popped = []
+            rows = []
+            seen = set()
+            while heap and len(rows) < count:
+                entry = heapq.heappop(heap)
+                negated, position = entry
+                # A rescored row leaves its old entry behind; only the current one counts
+                if -negated != self.scores[position] or position in seen or self._visited[position]:
+                    continue
+                popped.append(entry)
+                seen.add(position)
+                if exclude is None or not exclude[position]:
+                    rows.append(position)
+            for entry in popped:
+                heapq.heappush(heap, entry)
+            rows = np.array(rows, dtype=np.int64)
+            return rows, self.scores[rows]
+
+    def order(self, positions):
+        """positions sorted from highest score to lowest (ties keep their order)."""
+        positions = np.asarray(positions)
+        return positions[np.argsort(-self.scores[positions], kind='stable')]
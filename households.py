@@ -0,0 +1,205 @@
+"""Blocking-based deduplication of parcel records into door-level households."""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Words in owner names that say nothing about who lives there
+OWNER_NOISE_WORDS = {
+    'ETAL', 'ET', 'AL', 'UX', 'VIR', 'TR', 'TRE', 'TRS', 'TRUSTEE', 'TRUSTEES',
+    'TRUST', 'REV', 'LIV', 'LIVING', 'EST', 'ESTATE', 'LE', 'JR', 'SR', 'II', 'III'
+}
+
+# Unit designators dropped so "# 404", "UNIT 404" and "APT 404" agree
+UNIT_WORDS = re.compile(r'\b(?:UNIT|APT|STE|SUITE|NO)\b')
+
+# Street words written more than one way in parcel exports
+STREET_ABBREVIATIONS = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'AV': 'AVE', 'BOULEVARD': 'BLVD', 'DRIVE': 'DR',
+    'TERRACE': 'TER', 'PLACE': 'PL', 'COURT': 'CT', 'LANE': 'LN', 'ROAD': 'RD',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW'
+}
+
+NON_ALPHANUMERIC = re.compile(r'[^A-Z0-9]+')
+
+
+# Upper-case words of a text value, punctuation removed
+def text_words(value):
+    return NON_ALPHANUMERIC.sub(' ', str(value).upper()).split()
+
+
+# Owner name key: noise words dropped and the rest sorted, so "SMITH, JOHN" matches "JOHN SMITH"
+def owner_key(value):
+    return ' '.join(sorted(word for word in text_words(value) if word not in OWNER_NOISE_WORDS))
+
+
+# Street or mailing address key with common abbreviations folded together
+def street_key(value):
+    return ' '.join(STREET_ABBREVIATIONS.get(word, word) for word in text_words(value))
+
+
+# House number key: "315", "315.0" and "0315" agree, and 0 means unknown
+def number_key(value):
+    value = value.strip().removesuffix('.0').lstrip('0')
+    return ''.join(text_words(value))
+
+
+# Unit key: designators and punctuation dropped, so "# 404" matches "UNIT 404"
+def unit_key(value):
+    return ''.join(text_words(UNIT_WORDS.sub(' ', ' '.join(text_words(value)))))
+
+
+# A column's values as strings, blank where missing or absent
+def text_column(df, column):
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    values = df[column].astype(object)
+    return values.where(values.notna(), "").astype(str).to_numpy(dtype=object)
+
+
+# TOTAL_LIVING_UNITS as numbers, NaN where unknown
+def living_unit_counts(df):
+    if 'TOTAL_LIVING_UNITS' not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df['TOTAL_LIVING_UNITS'], errors='coerce').to_numpy(dtype=float)
+
+
+# Apply a key function to each distinct value of a column once, returning integer codes (-1 for blank keys)
+def key_codes(df, column, key):
+    if column not in df.columns:
+        return np.full(len(df), -1, dtype=np.int64)
+    codes, uniques = pd.factorize(text_column(df, column))
+    keys = pd.Series([key(value) for value in uniques], dtype=object)
+    key_ids, _ = pd.factorize(keys)
+    key_ids = np.where(keys.to_numpy() == "", -1, key_ids)
+    return np.append(key_ids, -1)[codes].astype(np.int64)
+
+
+# Link every row of each group of equal keys to the group's first row; rows with a -1 key are left out
+def group_links(*keys):
+    keys = np.column_stack(keys)
+    rows = np.flatnonzero((keys >= 0).all(axis=1))
+    if len(rows) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    groups = pd.DataFrame(keys[rows]).groupby(list(range(keys.shape[1])), sort=False).ngroup().to_numpy()
+    first = np.full(groups.max() + 1, -1, dtype=np.int64)
+    # Reversed assignment leaves the first row of each group in place
+    first[groups[::-1]] = rows[::-1]
+    return np.column_stack([rows, first[groups]])
+
+
+# Connected components of rows joined by links, labeled by their lowest row
+def link_components(count, links):
+    labels = np.arange(count)
+    if len(links) == 0:
+        return labels
+    left, right = links[:, 0], links[:, 1]
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, lowest)
+        np.minimum.at(updated, right, lowest)
+        # Pointer jumping: follow each label to its own label until they settle
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def find_households(df):
+    """Household label of each row: rows sharing a label are one door.
+
+    Rows are first hashed into blocks by normalized street number, street
+    name, ZIP and precinct, and only rows in the same block are compared. Within a
+    block two rows are the same household when they are the same parcel,
+    when they are the same unit and share an owner (OWNER1 or OWNER2) or
+    a mailing address, or when one of them has no living units (a parking
+    space, storage unit or side lot) and they share an owner. Comparisons
+    are made by hashing those fields inside each block, so the work grows
+    with the number of rows rather than the number of pairs.
+    """
+    count = len(df)
+    if count == 0 or not {'STR_NUM', 'STR_NAME'}.issubset(df.columns):
+        return np.arange(count)
+
+    number = key_codes(df, 'STR_NUM', number_key)
+    name = key_codes(df, 'STR_NAME', street_key)
+    zip_code = key_codes(df, 'STR_ZIP', lambda value: ''.join(text_words(value))[:5])
+    precinct = key_codes(df, 'PRECINCT', str.strip)
+    # A missing ZIP or precinct still blocks on street and number
+    zip_code = np.where(zip_code < 0, zip_code.max() + 1, zip_code)
+    precinct = np.where(precinct < 0, precinct.max() + 1, precinct)
+    block = group_links(number, name, zip_code, precinct)
+    block_id = np.full(count, -1, dtype=np.int64)
+    block_id[block[:, 0]] = block[:, 1]
+
+    unit = key_codes(df, 'STR_UNIT', unit_key)
+    # A blank unit is its own key, so single-family homes still compare
+    unit = np.where(unit < 0, unit.max() + 1, unit)
+    mailing = key_codes(df, 'MAILING_ADDRESS_1', street_key)
+    parcel = key_codes(df, 'PARCEL_NUMBER', str.strip)
+
+    # OWNER1 and OWNER2 name the same people in either order, so both are keyed in one code space
+    owners = pd.DataFrame({'OWNER': np.concatenate([text_column(df, 'OWNER1'), text_column(df, 'OWNER2')])})
+    owner_names = key_codes(owners, 'OWNER', owner_key)
+    either_owner = np.concatenate([np.arange(count), np.arange(count)])
+
+    no_living_units = living_unit_counts(df) == 0
+
+    links = [
+        group_links(parcel),
+        group_links(block_id, unit, mailing)
+    ]
+
+    # Same unit and a shared owner name
+    same_unit = group_links(block_id[either_owner], unit[either_owner], owner_names)
+    links.append(either_owner[same_unit])
+
+    # Rows without living units join a living row of the same block and owner
+    same_owner = group_links(block_id[either_owner], owner_names)
+    if no_living_units.any() and len(same_owner):
+        rows = either_owner[same_owner]
+        groups = same_owner[:, 1]
+        living = ~no_living_units[rows[:, 0]]
+        anchor = np.full(2 * count, -1, dtype=np.int64)
+        anchor[groups[living][::-1]] = rows[living, 0][::-1]
+        attach = no_living_units[rows[:, 0]] & (anchor[groups] >= 0)
+        links.append(np.column_stack([rows[attach, 0], anchor[groups[attach]]]))
+
+    return link_components(count, np.concatenate(links))
+
+
+def deduplicate_households(df):
+    """Collapse rows of the same household (see find_households) into one row per door.
+
+    The kept row is the homestead one if any, otherwise one with living
+    units, otherwise the first. The parcel numbers of the rows folded into
+    it are listed in HOUSEHOLD_PARCELS. Returns (frame, rows removed).
+    """
+    labels = find_households(df)
+    if len(np.unique(labels)) == len(df):
+        df = df.copy()
+        df['HOUSEHOLD_PARCELS'] = ""
+        return df, 0
+
+    homestead = pd.Series(text_column(df, 'HX_YN')).str.upper().isin(['YES', 'Y']).to_numpy()
+    rank = np.where(homestead, 0, np.where(living_unit_counts(df) == 0, 2, 1))
+    order = np.lexsort((np.arange(len(df)), rank, labels))
+    first_of_label = np.ones(len(order), dtype=bool)
+    first_of_label[1:] = labels[order][1:] != labels[order][:-1]
+    kept = order[first_of_label]
+
+    # Parcel numbers of the folded rows, listed on the row that replaces them
+    folded = order[~first_of_label]
+    parcels = text_column(df, 'PARCEL_NUMBER')
+    keeper = np.empty(len(df), dtype=np.int64)
+    keeper[labels[kept]] = kept
+    # A repeated copy of the kept parcel is not another parcel
+    folded = folded[parcels[folded] != parcels[keeper[labels[folded]]]]
+    household_parcels = pd.Series(parcels[folded]).groupby(keeper[labels[folded]]).agg(lambda values: ';'.join(dict.fromkeys(values)))
+
+    kept = np.sort(kept)
+    result = df.iloc[kept].reset_index(drop=True)
+    result['HOUSEHOLD_PARCELS'] = household_parcels.reindex(kept).fillna("").to_numpy(dtype=object)
+    return result, len(df) - len(kept)
@@ -0,0 +1,46 @@
+"""Merge results files exported from offline walk packets into the canvass database.
+
+Usage:
+    python import_results.py RESULTS.json [RESULTS.json ...] [--db canvass_results.db]
+
+Each file is merged by PARCEL_NUMBER and only fields that differ from the
+stored results are written, so importing a file again (or a folder of
+files that overlap) changes nothing the second time. Doors whose stored
+result changed after the packet recorded them keep the stored result.
+"""
+import argparse
+import sys
+
+from canvass_store import DEFAULT_DB_PATH, CanvassStore
+from walk_packets import read_results, merge_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import offline walk packet results.")
+    parser.add_argument("files", nargs="+", help="results files downloaded from walk packets")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="canvass results database (default: %(default)s)")
+    parser.add_argument("--volunteer", default="", help="volunteer to record when a file names none")
+    args = parser.parse_args()
+
+    store = CanvassStore(args.db)
+    failed = 0
+    try:
+        for path in args.files:
+            try:
+                with open(path, 'rb') as f:
+                    volunteer, updates = read_results(f.read())
+                changed, unchanged = merge_results(store, updates, volunteer or args.volunteer)
+            except (OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            print(f"{path}: {changed} doors updated, {unchanged} already up to date")
+    finally:
+        store.close()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Level-of-detail clustering of address points for the map."""
+import numpy as np
+import pandas as pd
+
+# Deepest zoom level points are projected at (a Web Mercator world 256 * 2**MAX_ZOOM pixels wide)
+MAX_ZOOM = 20
+
+# Clusters are cells this many screen pixels across (a power of two)
+CLUSTER_PIXELS = 32
+
+# Auto detail keeps the map under this many points
+MAX_MAP_POINTS = 1500
+
+# Finest zoom level the auto detail will pick, where clusters are single doors
+DOOR_ZOOM = 19
+
+# Meters per pixel at the equator at zoom 0
+EQUATOR_METERS_PER_PIXEL = 156543.03
+
+# Zoom level used to frame a single point
+DEFAULT_ZOOM = 15
+
+# RGB values of the color names used for support levels
+CSS_COLORS = {
+    "darkgreen": [0, 100, 0],
+    "lightgreen": [144, 238, 144],
+    "gray": [128, 128, 128],
+    "orange": [255, 165, 0],
+    "red": [255, 0, 0],
+    "lightgray": [211, 211, 211]
+}
+
+
+# Pixel position of each coordinate on the Web Mercator world at MAX_ZOOM
+def mercator_pixels(lats, lons):
+    world = 256 * (1 << MAX_ZOOM)
+    phi = np.radians(np.clip(lats, -85.05, 85.05))
+    x = (lons + 180.0) / 360.0 * world
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / np.pi) / 2.0 * world
+    return x.astype(np.int64), y.astype(np.int64)
+
+
+# Zoom level at which the span of the given coordinates fits one map tile
+def fit_zoom(lats, lons):
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if len(lats) == 0:
+        return DEFAULT_ZOOM
+    span = max(lats.max() - lats.min(), lons.max() - lons.min())
+    if span <= 0:
+        return DEFAULT_ZOOM
+    return int(np.clip(np.floor(np.log2(360.0 / span)), 1, DOOR_ZOOM))
+
+
+class PointPyramid:
+    """Every row's map position at the deepest zoom, so clustering at any zoom is a bit shift.
+
+    Clusters at a zoom level are the cells of a CLUSTER_PIXELS grid at that
+    level; each is drawn at the mean position of its rows, sized by its row
+    count and colored by its most common status.
+    """
+
+    def __init__(self, lats, lons):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        self.located = np.isfinite(lats) & np.isfinite(lons) & (lats != 0) & (lons != 0)
+        self.lats = np.where(self.located, lats, 0.0)
+        self.lons = np.where(self.located, lons, 0.0)
+        self.x, self.y = mercator_pixels(self.lats, self.lons)
+
+    def _cells(self, positions, zoom):
+        shift = MAX_ZOOM - zoom + int(np.log2(CLUSTER_PIXELS))
+        return (self.x[positions] >> shift) << 32 | (self.y[positions] >> shift)
+
+    def located_positions(self, positions):
+        positions = np.asarray(positions)
+        return positions[self.located[positions]]
+
+    def auto_zoom(self, positions, max_points=MAX_MAP_POINTS):
+        """Finest zoom level at which positions fall into at most max_points clusters."""
+        positions = self.located_positions(positions)
+        if len(positions) <= max_points:
+            return DOOR_ZOOM
+
+        # Cluster counts only shrink as the zoom level drops, so binary search it
+        low, high = 1, DOOR_ZOOM
+        while low < high:
+            zoom = (low + high + 1) // 2
+            if len(np.unique(self._cells(positions, zoom))) <= max_points:
+                low = zoom
+            else:
+                high = zoom - 1
+        return low
+
+    def cluster(self, positions, statuses, palette, zoom):
+        """Clusters of positions at a zoom level as a DataFrame for a deck.gl scatterplot.
+
+        statuses holds a small integer per position indexing palette, a list
+        of RGB colors. Sizes are radii in meters, up to half a cluster cell.
+        """
+        positions = np.asarray(positions)
+        located = self.located[positions]
+        positions = positions[located]
+        statuses = np.asarray(statuses)[located]
+        if len(positions) == 0:
+            return pd.DataFrame({"lat": [], "lon": [], "count": [], "color": [], "size": []})
+
+        cells, inverse = np.unique(self._cells(positions, zoom), return_inverse=True)
+        counts = np.bincount(inverse)
+        lats = np.bincount(inverse, weights=self.lats[positions]) / counts
+        lons = np.bincount(inverse, weights=self.lons[positions]) / counts
+
+        # Most common status per cluster
+        status_counts = np.bincount(inverse * len(palette) + statuses, minlength=len(cells) * len(palette))
+        dominant = status_counts.reshape(len(cells), len(palette)).argmax(axis=1)
+
+        # Area grows with the number of doors, up to filling the cell
+        cell_meters = EQUATOR_METERS_PER_PIXEL * np.cos(np.radians(lats.mean())) / (1 << zoom) * CLUSTER_PIXELS
+        sizes = np.maximum(cell_meters / 2 * np.sqrt(counts / counts.max()), cell_meters / 8)
+
+        return pd.DataFrame({
+            "lat": lats,
+            "lon": lons,
+            "count": counts,
+            "color": [palette[status] for status in dominant],
+            "size": sizes
+        })
@@ -0,0 +1,329 @@
+"""Precinct boundary geometry and point-in-polygon precinct assignment."""
+import json
+import os
+import struct
+
+import numpy as np
+
+# Bundled precinct geometry, tried in order
+SHAPEFILE_PATH = "PrecinctsDistrict6.shp"
+GEOJSON_PATH = "Voting Precincts 2022.geojson"
+
+# Grid cell size in degrees (~1 km at St. Petersburg's latitude)
+DEFAULT_CELL_SIZE = 0.01
+
+# Upper bound on point x edge cells evaluated at once by the crossing test
+MAX_BATCH_CELLS = 2_000_000
+
+# Outlines are simplified until no point moves more than this many screen pixels
+SIMPLIFY_PIXELS = 1.0
+
+
+# Normalize precinct ids so "106", "106.0" and " 106 " all match
+def normalize_precinct_id(value):
+    if value is None:
+        return ""
+    precinct_id = str(value).strip()
+    if precinct_id.endswith(".0"):
+        precinct_id = precinct_id[:-2]
+    return precinct_id
+
+
+# Read the attribute table of a dBASE (.dbf) file
+def read_dbf(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    num_records, header_length, record_length = struct.unpack('<IHH', data[4:12])
+
+    fields = []
+    offset = 32
+    while data[offset] != 0x0D:
+        name = data[offset:offset + 11].split(b'\0')[0].decode('ascii')
+        fields.append((name, data[offset + 16]))
+        offset += 32
+
+    records = []
+    for i in range(num_records):
+        start = header_length + i * record_length
+        record = data[start:start + record_length]
+        if record[:1] == b'*':
+            # Deleted record
+            continue
+        values = {}
+        position = 1
+        for name, length in fields:
+            values[name] = record[position:position + length].decode('latin-1').strip()
+            position += length
+        records.append(values)
+
+    return records
+
+
+# Read polygon rings from an ESRI shapefile (.shp) plus its .dbf attributes
+def read_shapefile(path, id_field="PRECINCTID"):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    attributes = read_dbf(os.path.splitext(path)[0] + '.dbf')
+
+    shapes = []
+    offset = 100
+    record_index = 0
+    while offset + 8 <= len(data):
+        content_length = struct.unpack('>i', data[offset + 4:offset + 8])[0] * 2
+        content = data[offset + 8:offset + 8 + content_length]
+        offset += 8 + content_length
+
+        shape_type = struct.unpack('<i', content[:4])[0]
+        if shape_type in (5, 15, 25):
+            num_parts, num_points = struct.unpack('<ii', content[36:44])
+            parts = list(struct.unpack(f'<{num_parts}i', content[44:44 + 4 * num_parts]))
+            points_start = 44 + 4 * num_parts
+            points = np.frombuffer(content, dtype='<f8', count=num_points * 2, offset=points_start).reshape(-1, 2)
+            parts.append(num_points)
+            rings = [points[parts[i]:parts[i + 1]] for i in range(num_parts)]
+
+            if record_index < len(attributes):
+                precinct_id = normalize_precinct_id(attributes[record_index].get(id_field))
+                shapes.append((precinct_id, rings))
+        record_index += 1
+
+    return shapes
+
+
+# Read polygon rings from a GeoJSON FeatureCollection
+def read_geojson(path, id_field="PRECINCTID"):
+    with open(path, 'r') as f:
+        collection = json.load(f)
+
+    shapes = []
+    for feature in collection.get('features', []):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+
+        rings = [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon]
+        precinct_id = normalize_precinct_id(feature.get('properties', {}).get(id_field))
+        shapes.append((precinct_id, rings))
+
+    return shapes
+
+
+# Load precinct shapes from the bundled shapefile, falling back to the GeoJSON
+def load_precinct_shapes(base_dir=None):
+    if base_dir is None:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    shapefile_path = os.path.join(base_dir, SHAPEFILE_PATH)
+    if os.path.exists(shapefile_path):
+        return read_shapefile(shapefile_path)
+
+    geojson_path = os.path.join(base_dir, GEOJSON_PATH)
+    if os.path.exists(geojson_path):
+        return read_geojson(geojson_path)
+
+    raise FileNotFoundError("No precinct geometry found (looked for %s and %s)" % (SHAPEFILE_PATH, GEOJSON_PATH))
+
+
+# Even-odd crossing test of many points against one polygon's edges
+def points_in_polygon(px, py, x1, y1, x2, y2):
+    inside = np.zeros(len(px), dtype=bool)
+    if len(px) == 0 or len(x1) == 0:
+        return inside
+
+    step = max(1, MAX_BATCH_CELLS // len(x1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, len(px), step):
+            bx = px[start:start + step, None]
+            by = py[start:start + step, None]
+            straddles = (y1 > by) != (y2 > by)
+            x_cross = x1 + (by - y1) * (x2 - x1) / (y2 - y1)
+            crossings = np.count_nonzero(straddles & (bx < x_cross), axis=1)
+            inside[start:start + step] = (crossings & 1) == 1
+
+    return inside
+
+
+class PrecinctIndex:
+    """Uniform-grid index over precinct polygons for batched point lookups."""
+
+    def __init__(self, shapes, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.precinct_ids = []
+        self.edges = []
+        self.bboxes = []
+
+        for precinct_id, rings in shapes:
+            closed_rings = []
+            for ring in rings:
+                ring = np.asarray(ring, dtype=float)
+                if len(ring) < 3:
+                    continue
+                if not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack([ring, ring[:1]])
+                closed_rings.append(ring)
+            if not closed_rings:
+                continue
+            starts = np.concatenate([ring[:-1] for ring in closed_rings])
+            ends = np.concatenate([ring[1:] for ring in closed_rings])
+            all_points = np.concatenate(closed_rings)
+
+            self.precinct_ids.append(precinct_id)
+            self.edges.append((starts[:, 0].copy(), starts[:, 1].copy(), ends[:, 0].copy(), ends[:, 1].copy()))
+            self.bboxes.append((all_points[:, 0].min(), all_points[:, 1].min(), all_points[:, 0].max(), all_points[:, 1].max()))
+
+        self.bboxes = np.array(self.bboxes, dtype=float).reshape(-1, 4)
+        if len(self.bboxes):
+            self.min_x = self.bboxes[:, 0].min()
+            self.min_y = self.bboxes[:, 1].min()
+            self.nx = int(np.floor((self.bboxes[:, 2].max() - self.min_x) / cell_size)) + 1
+            self.ny = int(np.floor((self.bboxes[:, 3].max() - self.min_y) / cell_size)) + 1
+        else:
+            self.min_x = self.min_y = 0.0
+            self.nx = self.ny = 0
+
+        # Cells covered by each polygon's bounding box
+        self.polygon_cells = []
+        for min_x, min_y, max_x, max_y in self.bboxes:
+            cx0, cy0 = self._cell_coords(min_x, min_y)
+            cx1, cy1 = self._cell_coords(max_x, max_y)
+            xs, ys = np.meshgrid(np.arange(cx0, cx1 + 1), np.arange(cy0, cy1 + 1))
+            self.polygon_cells.append((ys * self.nx + xs).ravel())
+
+    def __len__(self):
+        return len(self.precinct_ids)
+
+    def _cell_coords(self, x, y):
+        cx = int(np.floor((x - self.min_x) / self.cell_size))
+        cy = int(np.floor((y - self.min_y) / self.cell_size))
+        return min(max(cx, 0), self.nx - 1), min(max(cy, 0), self.ny - 1)
+
+    def assign(self, lons, lats):
+        """Return the precinct id containing each point ("" when outside every precinct)."""
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        result = np.full(len(lons), "", dtype=object)
+        if len(lons) == 0 or len(self) == 0:
+            return result
+
+        # Bucket points into grid cells; points off the grid cannot match
+        cx = np.floor((lons - self.min_x) / self.cell_size)
+        cy = np.floor((lats - self.min_y) / self.cell_size)
+        on_grid = np.isfinite(cx) & np.isfinite(cy) & (cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny)
+        point_index = np.flatnonzero(on_grid)
+        cell_ids = (cy[on_grid] * self.nx + cx[on_grid]).astype(np.int64)
+
+        order = np.argsort(cell_ids, kind='stable')
+        sorted_cells = cell_ids[order]
+        sorted_points = point_index[order]
+
+        assigned = np.zeros(len(lons), dtype=bool)
+        for polygon, cells in enumerate(self.polygon_cells):
+            lo = np.searchsorted(sorted_cells, cells, side='left')
+            hi = np.searchsorted(sorted_cells, cells, side='right')
+            occupied = hi > lo
+            if not occupied.any():
+                continue
+            candidates = np.concatenate([sorted_points[a:b] for a, b in zip(lo[occupied], hi[occupied])])
+
+            # Bounding-box and already-assigned prefilter before the exact test
+            min_x, min_y, max_x, max_y = self.bboxes[polygon]
+            px = lons[candidates]
+            py = lats[candidates]
+            keep = ~assigned[candidates] & (px >= min_x) & (px <= max_x) & (py >= min_y) & (py <= max_y)
+            candidates = candidates[keep]
+            if len(candidates) == 0:
+                continue
+
+            inside = points_in_polygon(lons[candidates], lats[candidates], *self.edges[polygon])
+            hits = candidates[inside]
+            result[hits] = self.precinct_ids[polygon]
+            assigned[hits] = True
+
+        return result
+
+    def locate(self, lon, lat):
+        """Return the precinct id containing a single point, or "" if none."""
+        return self.assign([lon], [lat])[0]
+
+
+# Build the precinct index from the bundled geometry
+def load_precinct_index(base_dir=None, cell_size=DEFAULT_CELL_SIZE):
+    return PrecinctIndex(load_precinct_shapes(base_dir), cell_size=cell_size)
+
+
+# Douglas-Peucker: drop points closer than tolerance to the line kept between their neighbors
+def simplify_ring(ring, tolerance):
+    ring = np.asarray(ring, dtype=float)
+    if len(ring) < 4:
+        return ring
+
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = ring[first], ring[last]
+        points = ring[first + 1:last]
+
+        # Distance to the segment (a closed ring's first anchor is a single point)
+        segment = end - start
+        length = float(segment @ segment)
+        if length > 0:
+            t = np.clip((points - start) @ segment / length, 0.0, 1.0)
+            distances = np.hypot(*(points - (start + t[:, None] * segment)).T)
+        else:
+            distances = np.hypot(*(points - start).T)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return ring[keep]
+
+
+class PrecinctOutlines:
+    """Boundary rings of a set of precincts, simplified per map zoom level on first use.
+
+    Only the precincts asked for are kept, so the rest of the county's
+    geometry is dropped when the outlines are loaded.
+    """
+
+    def __init__(self, shapes, precinct_ids=None):
+        wanted = None if precinct_ids is None else {normalize_precinct_id(precinct_id) for precinct_id in precinct_ids}
+        self.rings = [
+            (precinct_id, np.asarray(ring, dtype=float))
+            for precinct_id, rings in shapes
+            if wanted is None or precinct_id in wanted
+            for ring in rings
+            if len(ring) >= 3
+        ]
+        self._by_zoom = {}
+
+    def __len__(self):
+        return len(self.rings)
+
+    def at_zoom(self, zoom):
+        """(precinct id, ring) pairs simplified to about SIMPLIFY_PIXELS at a Web Mercator zoom level."""
+        outlines = self._by_zoom.get(zoom)
+        if outlines is None:
+            # Degrees of longitude per screen pixel at this zoom
+            tolerance = 360.0 / (256 * 2 ** zoom) * SIMPLIFY_PIXELS
+            outlines = [(precinct_id, simplify_ring(ring, tolerance)) for precinct_id, ring in self.rings]
+            self._by_zoom[zoom] = outlines
+        return outlines
+
+
+# Load the outlines of the given precincts from the bundled geometry
+def load_precinct_outlines(precinct_ids=None, base_dir=None):
+    return PrecinctOutlines(load_precinct_shapes(base_dir), precinct_ids)
@@ -0,0 +1,192 @@
+"""Pooled, time-bounded HTTP fetching with an on-disk conditional-request cache."""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Where the app's fallback data lives; point it at a local server to test without GitHub
+DEFAULT_BASE_URL = os.environ.get(
+    "ADDRESS_DATA_BASE_URL",
+    "https://raw.githubusercontent.com/ARCHITECTARIEL/district6-canvassing-app-test/main"
+)
+
+# Downloaded files, next to the app unless REMOTE_CACHE_DIR says otherwise
+DEFAULT_CACHE_DIR = os.environ.get(
+    "REMOTE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".remote_cache")
+)
+
+# Seconds to connect, and to wait between bytes once connected
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+
+# Seconds fetch_first waits for any candidate to answer
+PROBE_DEADLINE = 10
+
+# Connections kept open per host, which is also how many candidates are probed at once
+POOL_SIZE = 4
+
+# Bytes written to the cache per read
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+# A session that reuses connections and retries transient server errors
+def make_session(pool_size=POOL_SIZE):
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET", "HEAD"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Close the response of a request that finished after it was given up on
+def close_response(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+class HttpCache:
+    """Response bodies on disk with the validators needed to revalidate them.
+
+    Each URL is stored as a body file plus a small JSON file holding its
+    ETag and Last-Modified headers. Bodies are written to a temporary
+    file and renamed into place, so readers never see a partial download.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+
+    def _paths(self, url):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name), os.path.join(self.directory, name + ".json")
+
+    def body_path(self, url):
+        """Path of the cached body for url, or None if it has not been downloaded."""
+        body_path, meta_path = self._paths(url)
+        return body_path if os.path.exists(body_path) and os.path.exists(meta_path) else None
+
+    def validators(self, url):
+        """Conditional request headers for url's cached copy (empty when there is none)."""
+        if self.body_path(url) is None:
+            return {}
+        try:
+            with open(self._paths(url)[1]) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, response):
+        """Stream a 200 response's body into the cache and return its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, body_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        return body_path
+
+
+class RemoteFetcher:
+    """Fetches files through one pooled session, revalidating against the disk cache.
+
+    fetch() returns a local path: a 304 reuses the cached body without
+    downloading it again, and when the server cannot be reached a cached
+    copy is used as is. Every request is bounded by the connect and read
+    timeouts.
+    """
+
+    def __init__(self, session=None, cache=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), pool_size=POOL_SIZE):
+        self.session = session or make_session(pool_size)
+        self.cache = cache or HttpCache()
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+    def _request(self, url):
+        # Headers only; the body is read later, and only for the candidate that is used
+        return self.session.get(url, headers=self.cache.validators(url), timeout=self.timeout, stream=True)
+
+    def _resolve(self, url, response):
+        # Returns (path, status), or None when url has nothing usable
+        with response:
+            if response.status_code == 200:
+                return self.cache.store(url, response), 200
+            # Closing an unread response drops its connection; reading the short body of a 304 or 404 returns it to the pool
+            response.content
+            if response.status_code == 304 and self.cache.body_path(url):
+                return self.cache.body_path(url), 304
+        return None
+
+    def fetch(self, url):
+        """Local path of url's current content and the HTTP status that produced it (None if unavailable)."""
+        try:
+            response = self._request(url)
+        except requests.RequestException:
+            cached = self.cache.body_path(url)
+            return (cached, None) if cached else None
+        return self._resolve(url, response)
+
+    def fetch_first(self, urls, deadline=PROBE_DEADLINE):
+        """(url, path, status) for the first of urls, in order of preference, that can be fetched.
+
+        Every candidate is requested at once, so a missing file costs one
+        round trip in parallel with the others instead of one in sequence.
+        Candidates that have not answered within deadline seconds are
+        treated as unavailable, apart from any cached copy.
+        """
+        if not urls:
+            return None
+        executor = ThreadPoolExecutor(max_workers=min(self.pool_size, len(urls)))
+        futures = [executor.submit(self._request, url) for url in urls]
+        # Do not wait for stragglers; they are closed when they finish
+        executor.shutdown(wait=False)
+
+        # Take answers in order of preference, so a preferred hit returns without waiting on the rest
+        end = time.monotonic() + deadline
+        chosen = None
+        for url, future in zip(urls, futures):
+            if chosen is None:
+                wait([future], timeout=max(0.0, end - time.monotonic()))
+            response = None
+            if not future.done():
+                future.add_done_callback(close_response)
+            elif future.exception() is None:
+                response = future.result()
+
+            if chosen is not None:
+                if response is not None:
+                    response.close()
+            elif response is not None:
+                resolved = self._resolve(url, response)
+                if resolved is not None:
+                    chosen = (url,) + resolved
+            elif self.cache.body_path(url):
+                # No answer in time, but an earlier download is better than nothing
+                chosen = (url, self.cache.body_path(url), None)
+        return chosen
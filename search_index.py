@@ -0,0 +1,209 @@
+"""Prefix and n-gram index over owner and address fields for search suggestions."""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Fields offered as suggestions, as in generate_search_suggestions
+SUGGESTION_COLUMNS = ['OWNER1', 'OWNER2', 'SITE_ADDRESS', 'STR_NAME']
+
+# Match quality tiers, best first
+EXACT_MATCH = 0
+VALUE_PREFIX = 1
+WORD_PREFIX = 2
+SUBSTRING = 3
+
+# Group code used for district-wide entries
+ALL_GROUPS = -1
+
+# Length of the n-grams used for substring matches
+NGRAM_SIZE = 3
+
+# Prefixes short enough to match thousands of keys get precomputed top lists
+SHORT_PREFIX_LENGTHS = (2, 3)
+SHORT_PREFIX_TOP = 20
+
+WORD_START = re.compile(r'(?<=[\s,&/\-#])(?=\S)')
+
+
+class SuggestionIndex:
+    """Ranked autocomplete over the distinct values of the suggestion columns.
+
+    Every distinct value is indexed under its full lowercase text and under
+    each word it contains, in one sorted key array, so a query's prefix
+    matches are a single binary-searched range. Entries are repeated per
+    group (precinct) plus once district-wide, so group filtering is one
+    vectorized comparison. Values containing the query mid-word are found
+    through an n-gram index, built the first time it is needed. The
+    shortest prefixes, whose ranges span much of the index, have their
+    ranked candidates precomputed per group.
+    """
+
+    def __init__(self, table, group_positions, columns=SUGGESTION_COLUMNS):
+        self.group_ids = list(group_positions)
+        self.group_codes = {group_id: code for code, group_id in enumerate(self.group_ids)}
+
+        row_group = np.full(len(table), ALL_GROUPS, dtype=np.int32)
+        for code, positions in enumerate(group_positions.values()):
+            row_group[positions] = code
+
+        # Occurrences of each distinct value per group
+        frames = []
+        for column in columns:
+            if column not in table.columns:
+                continue
+            frames.append(pd.DataFrame({'value': table.values(column), 'group': row_group}))
+        occurrences = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'value': [], 'group': []})
+        occurrences['value'] = occurrences['value'].astype(str)
+        occurrences = occurrences[(occurrences['group'] != ALL_GROUPS) & (occurrences['value'].str.strip() != "")]
+        counts = occurrences.groupby(['value', 'group'], observed=True).size().reset_index(name='count')
+
+        value_ids, values = pd.factorize(counts['value'], sort=True)
+        self.values = np.asarray(values, dtype=object)
+        self.lowered = np.array([value.lower() for value in self.values], dtype=object)
+        counts['value_id'] = value_ids
+
+        # District-wide rows; a value's groups are kept for the substring path
+        totals = counts.groupby('value_id')['count'].sum().reset_index()
+        totals['group'] = ALL_GROUPS
+        grouped = pd.concat([counts[['value_id', 'group', 'count']], totals], ignore_index=True)
+        # The last column is the district-wide group, so ALL_GROUPS indexes it directly
+        self.value_groups = np.zeros((len(self.values), len(self.group_ids) + 1), dtype=bool)
+        self.value_groups[grouped['value_id'].to_numpy(), grouped['group'].to_numpy()] = True
+
+        # Keys: the whole value, then every later word start
+        keys = []
+        key_value_ids = []
+        key_tiers = []
+        for value_id, lowered in enumerate(self.lowered):
+            keys.append(lowered)
+            key_value_ids.append(value_id)
+            key_tiers.append(VALUE_PREFIX)
+            for match in WORD_START.finditer(lowered):
+                keys.append(lowered[match.start():])
+                key_value_ids.append(value_id)
+                key_tiers.append(WORD_PREFIX)
+        key_frame = pd.DataFrame({'key': keys, 'value_id': key_value_ids, 'tier': key_tiers})
+
+        entries = key_frame.merge(grouped, on='value_id').sort_values('key', kind='stable')
+        self.keys = entries['key'].to_numpy(dtype=object)
+        self.entry_value_ids = entries['value_id'].to_numpy(dtype=np.int64)
+        self.entry_tiers = entries['tier'].to_numpy(dtype=np.int8)
+        self.entry_groups = entries['group'].to_numpy(dtype=np.int32)
+        self.entry_counts = entries['count'].to_numpy(dtype=np.int64)
+        self.value_lengths = np.array([len(value) for value in self.values], dtype=np.int64)
+        # Values are sorted, so the value id doubles as the alphabetical tie-break
+
+        self.short_prefixes = {}
+        for length in SHORT_PREFIX_LENGTHS:
+            self._precompute_prefixes(length)
+
+        self._ngrams = None
+        self._ngram_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def _rank_order(self, entries, exact):
+        # Best tier first, then most common, then shortest, then alphabetical
+        value_ids = self.entry_value_ids[entries]
+        tiers = self.entry_tiers[entries].astype(np.int64)
+        tiers[(tiers == VALUE_PREFIX) & exact] = EXACT_MATCH
+        return np.lexsort((value_ids, self.value_lengths[value_ids], -self.entry_counts[entries], tiers))
+
+    def _precompute_prefixes(self, length):
+        keys = pd.Series(self.keys, dtype=object)
+        long_enough = np.flatnonzero(keys.str.len().to_numpy() >= length)
+        if len(long_enough) == 0:
+            return
+        prefixes = keys.iloc[long_enough].str[:length].to_numpy(dtype=object)
+        exact = self.keys[long_enough] == prefixes
+
+        # Keys are sorted, so the factorized prefix codes are already grouped
+        prefix_codes, prefix_values = pd.factorize(prefixes)
+        order = self._rank_order(long_enough, exact)
+        order = order[np.lexsort((self.entry_groups[long_enough][order], prefix_codes[order]))]
+
+        # Keep the leading entries of each (prefix, group) run
+        run_prefix = prefix_codes[order]
+        run_group = self.entry_groups[long_enough][order]
+        starts = np.flatnonzero(np.r_[True, (run_prefix[1:] != run_prefix[:-1]) | (run_group[1:] != run_group[:-1])])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts, ends):
+            top = long_enough[order[start:min(end, start + SHORT_PREFIX_TOP)]]
+            self.short_prefixes[(prefix_values[run_prefix[start]], int(run_group[start]))] = (
+                self.entry_value_ids[top], end - start > SHORT_PREFIX_TOP
+            )
+
+    def _group_code(self, group_id):
+        if group_id is None:
+            return ALL_GROUPS
+        return self.group_codes.get(group_id)
+
+    def _ngram_postings(self):
+        # Built on first use: only queries with no prefix matches need it
+        with self._ngram_lock:
+            if self._ngrams is None:
+                postings = {}
+                for value_id, lowered in enumerate(self.lowered):
+                    for gram in {lowered[i:i + NGRAM_SIZE] for i in range(len(lowered) - NGRAM_SIZE + 1)}:
+                        postings.setdefault(gram, []).append(value_id)
+                self._ngrams = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+        return self._ngrams
+
+    def _substring_matches(self, query, group_code, exclude, limit):
+        if len(query) < NGRAM_SIZE:
+            return []
+
+        # Candidates contain every n-gram of the query; intersect smallest postings first
+        ngrams = self._ngram_postings()
+        grams = {query[i:i + NGRAM_SIZE] for i in range(len(query) - NGRAM_SIZE + 1)}
+        postings = sorted((ngrams.get(gram, np.array([], dtype=np.int64)) for gram in grams), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        # Shorter values first, then alphabetical; stop once enough verify
+        candidates = candidates[np.lexsort((candidates, self.value_lengths[candidates]))]
+        matches = []
+        for value_id in candidates:
+            if value_id not in exclude and self.value_groups[value_id, group_code] and query in self.lowered[value_id]:
+                matches.append(value_id)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def suggest(self, query, group_id=None, limit=10):
+        """Top suggestions for query within a precinct (or district-wide when group_id is None)."""
+        query = query.strip().lower()
+        group_code = self._group_code(group_id)
+        if len(query) < 2 or group_code is None or len(self.keys) == 0:
+            return []
+
+        precomputed = self.short_prefixes.get((query, group_code))
+        if precomputed is not None and (len(set(precomputed[0])) >= limit or not precomputed[1]):
+            candidates = precomputed[0]
+        else:
+            # Every key starting with the query is in one contiguous range
+            lo = np.searchsorted(self.keys, query, side='left')
+            hi = np.searchsorted(self.keys, query + '\uffff', side='left')
+            in_group = np.flatnonzero(self.entry_groups[lo:hi] == group_code) + lo
+            candidates = self.entry_value_ids[in_group][self._rank_order(in_group, self.keys[in_group] == query)]
+
+        # A value can match on several of its keys; keep its best-ranked one
+        ranked = []
+        seen = set()
+        for value_id in candidates:
+            if value_id not in seen:
+                seen.add(value_id)
+                ranked.append(value_id)
+                if len(ranked) == limit:
+                    break
+
+        if len(ranked) < limit:
+            ranked.extend(self._substring_matches(query, group_code, set(ranked), limit - len(ranked)))
+
+        return [self.values[value_id] for value_id in ranked]
@@ -0,0 +1,95 @@
+"""Grid-hash index over address coordinates for nearby-door lookups."""
+import numpy as np
+
+from walk_routes import to_meters
+
+# Side of a grid cell in meters (roughly a city block)
+CELL_METERS = 100.0
+
+
+class GridIndex:
+    """Rows bucketed by the grid cell their coordinates fall in.
+
+    Cells are keyed by a single integer and rows are sorted by that key,
+    so the rows of any cell are one searchsorted range. A radius query
+    only reads the cells overlapping its bounding box and measures
+    exact distances for those rows alone. Rows without coordinates are
+    not indexed.
+    """
+
+    def __init__(self, lats, lons, cell_meters=CELL_METERS):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        located = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons) & (lats != 0) & (lons != 0))
+        self.cell_meters = cell_meters
+        self.origin_lat = float(lats[located].mean()) if len(located) else 0.0
+
+        points = to_meters(lats[located], lons[located], self.origin_lat)
+        self.origin = points.min(axis=0) if len(points) else np.zeros(2)
+        points = points - self.origin
+        cells = np.floor(points / cell_meters).astype(np.int64)
+        self.columns = int(cells[:, 0].max()) + 1 if len(cells) else 1
+        self.rows = int(cells[:, 1].max()) + 1 if len(cells) else 1
+
+        keys = cells[:, 1] * self.columns + cells[:, 0]
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.positions = located[order]
+        self.points = points[order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _project(self, lat, lon):
+        return to_meters(np.array([lat]), np.array([lon]), self.origin_lat)[0] - self.origin
+
+    def within(self, lat, lon, radius):
+        """Row positions within radius meters of (lat, lon), nearest first, and their distances."""
+        center = self._project(lat, lon)
+        low = np.floor((center - radius) / self.cell_meters).astype(np.int64)
+        high = np.floor((center + radius) / self.cell_meters).astype(np.int64)
+        low = np.maximum(low, 0)
+        high = np.minimum(high, [self.columns - 1, self.rows - 1])
+        if len(self.keys) == 0 or (low > high).any():
+            return self.positions[:0], np.zeros(0)
+
+        # Each grid row of the box is one contiguous run of cell keys
+        grid_rows = np.arange(low[1], high[1] + 1)
+        starts = np.searchsorted(self.keys, grid_rows * self.columns + low[0], side='left')
+        ends = np.searchsorted(self.keys, grid_rows * self.columns + high[0], side='right')
+        candidates = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+
+        distances = np.hypot(*(self.points[candidates] - center).T)
+        inside = distances <= radius
+        candidates = candidates[inside]
+        distances = distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return self.positions[candidates[order]], distances[order]
+
+    def nearest(self, lat, lon, count, radius=None, exclude=None):
+        """Up to count row positions nearest (lat, lon), optionally within radius meters.
+
+        exclude is a boolean mask over the whole table of rows to skip
+        (such as visited doors). The search starts at one cell and doubles
+        its radius until enough rows are found, so the full index is only
+        read when there are too few rows nearby.
+        """
+        center = self._project(lat, lon)
+        extent = np.array([self.columns, self.rows]) * self.cell_meters
+        if radius is not None:
+            limit = radius
+        else:
+            # Far enough to reach the farthest corner of the grid
+            limit = float(np.hypot(*np.maximum(center, extent - center)))
+        # Start no closer than the edge of the grid, for someone outside it
+        gap = float(np.hypot(*np.maximum(np.maximum(-center, center - extent), 0)))
+        search = min(max(self.cell_meters, gap + self.cell_meters), limit)
+        while True:
+            positions, distances = self.within(lat, lon, search)
+            if exclude is not None:
+                keep = ~exclude[positions]
+                positions = positions[keep]
+                distances = distances[keep]
+            if len(positions) >= count or search >= limit:
+                return positions[:count], distances[:count]
+            search = min(search * 2, limit)
@@ -1,11 +1,26 @@
 import streamlit as st
 import pandas as pd
-import json
+import numpy as np
 import os
 import re
-import requests
+import pydeck as pdk
 from urllib.parse import quote
 from collections import defaultdict
+from types import MappingProxyType
+from precinct_geometry import load_precinct_index, load_precinct_outlines
+from canvass_store import CanvassStore, WriteBehindQueue
+from canvass_stats import CanvassStats
+from walk_routes import plan_walk_route, to_meters
+from turf_cutting import TurfCutter
+from map_layers import PointPyramid, CSS_COLORS, fit_zoom
+from door_priority import DoorPriority, load_precinct_targets
+from remote_fetch import RemoteFetcher, DEFAULT_BASE_URL
+from walk_packets import build_walk_packet, render_packet_html, read_results, merge_results
+from district6 import DISTRICT6_PRECINCTS, ARIEL_ADDRESS, normalize_district_addresses, section_by_precinct
+from address_store import (
+    AddressTable, AddressDataset, ParcelMask, prepare_frame, iter_json_records, iter_file_chunks,
+    read_compiled_dataset, compiled_dataset_is_stale
+)
 
 # Set page configuration
 st.set_page_config(
@@ -24,14 +39,50 @@ if 'visited_addresses' not in st.session_state:
     st.session_state.visited_addresses = set()
 if 'interaction_notes' not in st.session_state:
     st.session_state.interaction_notes = {}
-if 'address_data' not in st.session_state:
-    st.session_state.address_data = None
+if 'uploaded_dataset' not in st.session_state:
+    st.session_state.uploaded_dataset = None
+if 'visited_mask' not in st.session_state:
+    st.session_state.visited_mask = None
+if 'building_groups' not in st.session_state:
+    st.session_state.building_groups = None
+if 'page_size' not in st.session_state:
+    st.session_state.page_size = 25
+if 'address_page' not in st.session_state:
+    st.session_state.address_page = 0
+if 'address_list_state' not in st.session_state:
+    st.session_state.address_list_state = None
+if 'expanded_buildings' not in st.session_state:
+    st.session_state.expanded_buildings = {}
+if 'walk_route' not in st.session_state:
+    st.session_state.walk_route = None
+if 'near_me_count' not in st.session_state:
+    st.session_state.near_me_count = 10
+if 'near_me_radius' not in st.session_state:
+    st.session_state.near_me_radius = 500
+if 'sort_by_distance' not in st.session_state:
+    st.session_state.sort_by_distance = False
+if 'sort_by_priority' not in st.session_state:
+    st.session_state.sort_by_priority = False
+if 'priority_count' not in st.session_state:
+    st.session_state.priority_count = 10
+if 'map_detail' not in st.session_state:
+    st.session_state.map_detail = "Auto"
+if 'map_layer' not in st.session_state:
+    st.session_state.map_layer = None
+if 'offline_packet' not in st.session_state:
+    st.session_state.offline_packet = None
+if 'imported_results' not in st.session_state:
+    st.session_state.imported_results = {}
+if 'turf_packets' not in st.session_state:
+    st.session_state.turf_packets = 1
+if 'turf_packet' not in st.session_state:
+    st.session_state.turf_packet = None
 if 'search_query' not in st.session_state:
     st.session_state.search_query = ""
 if 'search_suggestions' not in st.session_state:
     st.session_state.search_suggestions = []
-if 'precinct_addresses' not in st.session_state:
-    st.session_state.precinct_addresses = {}
+if 'search_all_precincts' not in st.session_state:
+    st.session_state.search_all_precincts = False
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
 if 'cluster_view' not in st.session_state:
@@ -42,6 +93,8 @@ if 'support_levels' not in st.session_state:
     st.session_state.support_levels = {}
 if 'donations' not in st.session_state:
     st.session_state.donations = {}
+if 'follow_ups' not in st.session_state:
+    st.session_state.follow_ups = frozenset()
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "home"
 if 'contact_address' not in st.session_state:
@@ -53,11 +106,45 @@ if 'geographic_section' not in st.session_state:
 if 'user_location' not in st.session_state:
     st.session_state.user_location = None
 
-# Function to navigate between pages
-def navigate_to(page, address=None):
+# Page sizes offered for the address list
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+# Map detail levels and the zoom level each clusters at (None picks one from the point count)
+MAP_DETAIL_LEVELS = {"Auto": None, "District": 13, "Neighborhood": 15, "Block": 17, "Doors": 19}
+
+# Support levels a volunteer can record
+SUPPORT_LEVELS = ["unknown", "strong_support", "lean_support", "undecided", "lean_against", "strong_against"]
+
+# Map point statuses: not visited, then visited with each support level
+MAP_STATUSES = [None] + SUPPORT_LEVELS
+NOT_VISITED_COLOR = [30, 136, 229]
+USER_LOCATION_COLOR = [142, 36, 170]
+
+# Precinct boundary colors on the map (the selected precinct is drawn darker and wider)
+OUTLINE_COLOR = [90, 90, 90]
+SELECTED_OUTLINE_COLOR = [20, 20, 20]
+
+# Most stops one walking route plans; longer lists are planned from the top
+MAX_ROUTE_STOPS = 300
+
+# Seconds between refreshes of the precinct header's progress
+PROGRESS_REFRESH_SECONDS = 15
+
+# Fragment-scoped reruns: st.experimental_fragment from Streamlit 1.33, renamed st.fragment in 1.37
+STREAMLIT_FRAGMENT = getattr(st, "fragment", None) or st.experimental_fragment
+
+def fragment(run_every=None):
+    return STREAMLIT_FRAGMENT(run_every=run_every)
+
+# Switch pages (as a button callback, so the click's own rerun draws the new page)
+def open_page(page, address=None):
     if address is not None:
         st.session_state.contact_address = address
     st.session_state.current_page = page
+
+# Function to navigate between pages
+def navigate_to(page, address=None):
+    open_page(page, address)
     # Use st.rerun() instead of st.experimental_rerun() which is deprecated
     st.rerun()
 
@@ -66,21 +153,7 @@ st.sidebar.title("District 6 Canvassing")
 
 # Real District 6 precinct data - removed strategy tags
 def get_district6_precincts():
-    return [
-        {"id": "106", "name": "Precinct 106", "total_addresses": 760, "turnout": "88.55%", "zip_codes": ["33701", "33705"], "section": "North"},
-        {"id": "108", "name": "Precinct 108", "total_addresses": 2773, "turnout": "81.79%", "zip_codes": ["33701", "33705"], "section": "North"},
-        {"id": "109", "name": "Precinct 109", "total_addresses": 2151, "turnout": "77.59%", "zip_codes": ["33701", "33705"], "section": "East"},
-        {"id": "116", "name": "Precinct 116", "total_addresses": 1511, "turnout": "67.97%", "zip_codes": ["33701", "33705"], "section": "East"},
-        {"id": "117", "name": "Precinct 117", "total_addresses": 1105, "turnout": "62.53%", "zip_codes": ["33701", "33705"], "section": "South"},
-        {"id": "118", "name": "Precinct 118", "total_addresses": 1175, "turnout": "85.36%", "zip_codes": ["33701", "33705"], "section": "South"},
-        {"id": "119", "name": "Precinct 119", "total_addresses": 2684, "turnout": "65.31%", "zip_codes": ["33701", "33705"], "section": "West"},
-        {"id": "121", "name": "Precinct 121", "total_addresses": 922, "turnout": "77.55%", "zip_codes": ["33701", "33705"], "section": "West"},
-        {"id": "122", "name": "Precinct 122", "total_addresses": 258, "turnout": "87.60%", "zip_codes": ["33701", "33705"], "section": "North"},
-        {"id": "123", "name": "Precinct 123", "total_addresses": 4627, "turnout": "85.35%", "zip_codes": ["33701", "33705"], "section": "East"},
-        {"id": "125", "name": "Precinct 125", "total_addresses": 1301, "turnout": "79.94%", "zip_codes": ["33701", "33705"], "section": "South"},
-        {"id": "126", "name": "Precinct 126", "total_addresses": 1958, "turnout": "77.07%", "zip_codes": ["33701", "33705"], "section": "West"},
-        {"id": "130", "name": "Precinct 130", "total_addresses": 3764, "turnout": "86.16%", "zip_codes": ["33701", "33705"], "section": "North"}
-    ]
+    return [dict(precinct) for precinct in DISTRICT6_PRECINCTS]
 
 # Generate sample addresses as fallback
 def generate_sample_addresses():
@@ -88,28 +161,7 @@ def generate_sample_addresses():
     sample_data = []
     
     # Add Ariel's address to the sample data
-    sample_data.append({
-        "PARCEL_NUMBER": "ARIEL-RESIDENCE",
-        "OWNER1": "FERNANDEZ, ARIEL",
-        "OWNER2": "",
-        "SITE_ADDRESS": "315 TAYLOR AVE S",
-        "SITE_CITYZIP": "ST PETERSBURG, FL 33705",
-        "SUBDIVISION": "DISTRICT 6",
-        "MAILING_ADDRESS_1": "315 TAYLOR AVE S",
-        "MAILING_CITY": "ST PETERSBURG",
-        "MAILING_STATE": "FL",
-        "MAILING_ZIP": "33705",
-        "PROPERTY_USE": "Residential",
-        "HX_YN": "Yes",
-        "STR_NUM": 315,
-        "STR_NAME": "TAYLOR",
-        "STR_UNIT": "",
-        "STR_ZIP": "33705",
-        "PRECINCT": "106",  # Explicitly assign precinct
-        "LAT": 27.773056,  # Add coordinates for map
-        "LON": -82.639999,
-        "SECTION": "North"  # Assign geographic section
-    })
+    sample_data.append(dict(ARIEL_ADDRESS))
     
     # Generate additional sample addresses for each precinct
     precincts = get_district6_precincts()
@@ -213,38 +265,13 @@ def generate_sample_addresses():
     
     return sample_data
 
-# Function to fix JSON formatting issues
-def fix_json_format(content):
-    """Fix common JSON formatting issues"""
-    try:
-        # Check if the content is already valid JSON
-        json.loads(content)
-        return content
-    except json.JSONDecodeError:
-        # Fix common issues
-        fixed_content = content
-        
-        # Ensure content starts with '[' and ends with ']'
-        fixed_content = fixed_content.strip()
-        if not fixed_content.startswith('['):
-            fixed_content = '[' + fixed_content
-        if not fixed_content.endswith(']'):
-            fixed_content = fixed_content + ']'
-        
-        # Remove any problematic characters at the beginning
-        if fixed_content[0] != '[':
-            fixed_content = '[' + fixed_content[fixed_content.find('{'): fixed_content.rfind('}')+1] + ']'
-        
-        # Try to parse the fixed content
-        try:
-            json.loads(fixed_content)
-            return fixed_content
-        except json.JSONDecodeError:
-            # If still invalid, return None
-            return None
-
-# Load addresses from local file or GitHub
-@st.cache_data
+# Compiled datasets written by compile_dataset.py, tried before any JSON
+COMPILED_DATASET_PATHS = [
+    '/home/ubuntu/addresses.arrow',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addresses.arrow')
+]
+
+# Load addresses from a compiled dataset, local file or GitHub
 def load_addresses():
     # File paths to try in order
     file_paths = [
@@ -254,33 +281,28 @@ def load_addresses():
         '/home/ubuntu/upload/Advanced Search 4-11-2025 (1).json'
     ]
     
-    # Try local files first
+    # Prefer a compiled dataset: already normalized, and memory-mapped rather than parsed
+    for compiled_path in COMPILED_DATASET_PATHS:
+        if not os.path.exists(compiled_path):
+            continue
+        try:
+            address_df, metadata = read_compiled_dataset(compiled_path)
+            if compiled_dataset_is_stale(metadata):
+                st.sidebar.warning(f"{compiled_path} is older than {metadata.get('source')}; run compile_dataset.py again")
+                continue
+            st.sidebar.success(f"Successfully loaded {len(address_df)} precompiled addresses from {compiled_path}")
+            return address_df
+        except Exception as e:
+            st.sidebar.warning(f"Could not load {compiled_path}: {str(e)}")
+    
+    # Try local files next, streaming records straight into normalization
     for file_path in file_paths:
         try:
             st.sidebar.info(f"Attempting to load: {file_path}")
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-                # Try to parse as is
-                try:
-                    address_data = json.loads(content)
-                    st.sidebar.success(f"Successfully loaded {len(address_data)} addresses from {file_path}")
-                    process_address_data(address_data)
-                    return address_data
-                except json.JSONDecodeError as e:
-                    # Try to fix the JSON format
-                    st.sidebar.warning(f"JSON parsing error: {str(e)}. Attempting to fix...")
-                    fixed_content = fix_json_format(content)
-                    if fixed_content:
-                        try:
-                            address_data = json.loads(fixed_content)
-                            st.sidebar.success(f"Successfully fixed and loaded {len(address_data)} addresses from {file_path}")
-                            process_address_data(address_data)
-                            return address_data
-                        except json.JSONDecodeError as e2:
-                            st.sidebar.error(f"Could not fix JSON format: {str(e2)}")
-                    else:
-                        st.sidebar.error("Could not fix JSON format")
+            with open(file_path, 'rb') as f:
+                address_df = read_address_records(f)
+            st.sidebar.success(f"Successfully loaded {len(address_df)} addresses from {file_path}")
+            return address_df
         except Exception as e:
             st.sidebar.warning(f"Could not load {file_path}: {str(e)}")
     
@@ -294,219 +316,74 @@ def load_addresses():
             "Advanced_Search_4-11-2025_(1).json"
         ]
         
-        for filename in filenames:
-            encoded_filename = quote(filename)
-            github_url = f"https://raw.githubusercontent.com/ARCHITECTARIEL/district6-canvassing-app-test/main/{encoded_filename}"
-            
-            st.sidebar.info(f"Attempting to load from GitHub: {github_url}")
-            
-            # Fetch the file from GitHub
-            response = requests.get(github_url)
-            
-            # Check if the request was successful
-            if response.status_code == 200:
-                content = response.text
-                
-                # Try to parse as is
-                try:
-                    address_data = json.loads(content)
-                    st.sidebar.success(f"Successfully loaded {len(address_data)} addresses from GitHub")
-                    process_address_data(address_data)
-                    return address_data
-                except json.JSONDecodeError as e:
-                    # Try to fix the JSON format
-                    st.sidebar.warning(f"JSON parsing error: {str(e)}. Attempting to fix...")
-                    fixed_content = fix_json_format(content)
-                    if fixed_content:
-                        try:
-                            address_data = json.loads(fixed_content)
-                            st.sidebar.success(f"Successfully fixed and loaded {len(address_data)} addresses from GitHub")
-                            process_address_data(address_data)
-                            return address_data
-                        except json.JSONDecodeError as e2:
-                            st.sidebar.error(f"Could not fix JSON format: {str(e2)}")
-                    else:
-                        st.sidebar.error("Could not fix JSON format")
+        # Every filename is requested at once; a file unchanged since the last download costs a 304
+        st.sidebar.info(f"Attempting to load from GitHub: {DEFAULT_BASE_URL}")
+        fetched = get_remote_fetcher().fetch_first([f"{DEFAULT_BASE_URL}/{quote(filename)}" for filename in filenames])
+        if fetched is not None:
+            github_url, cached_path, status = fetched
+            with open(cached_path, 'rb') as f:
+                address_df = read_address_records(f)
+            source = "GitHub" if status == 200 else "GitHub (unchanged, cached copy)" if status == 304 else "the cached copy of GitHub data (GitHub unreachable)"
+            st.sidebar.success(f"Successfully loaded {len(address_df)} addresses from {source}: {github_url}")
+            return address_df
     except Exception as e:
         st.sidebar.error(f"Error loading addresses from GitHub: {str(e)}")
     
-    # File upload option as last resort
-    st.sidebar.warning("Could not load address data from files or GitHub. Please upload a file.")
-    uploaded_file = st.sidebar.file_uploader("Upload address data (JSON format)", type=["json"])
+    # Nothing found; the caller decides what to fall back to
+    return None
+
+# One pooled HTTP session and disk cache per server process
+@st.cache_resource
+def get_remote_fetcher():
+    return RemoteFetcher()
+
+# Load addresses from a file uploaded by this volunteer
+def load_uploaded_addresses(uploaded_file):
     if uploaded_file is not None:
         try:
-            content = uploaded_file.read().decode()
-            
-            # Try to parse as is
-            try:
-                address_data = json.loads(content)
-                st.sidebar.success(f"Successfully loaded {len(address_data)} addresses from uploaded file")
-                process_address_data(address_data)
-                return address_data
-            except json.JSONDecodeError as e:
-                # Try to fix the JSON format
-                st.sidebar.warning(f"JSON parsing error: {str(e)}. Attempting to fix...")
-                fixed_content = fix_json_format(content)
-                if fixed_content:
-                    try:
-                        address_data = json.loads(fixed_content)
-                        st.sidebar.success(f"Successfully fixed and loaded {len(address_data)} addresses from uploaded file")
-                        process_address_data(address_data)
-                        return address_data
-                    except json.JSONDecodeError as e2:
-                        st.sidebar.error(f"Could not fix JSON format: {str(e2)}")
-                        st.session_state.json_load_error = str(e2)
-                else:
-                    st.sidebar.error("Could not fix JSON format")
-                    st.session_state.json_load_error = "Could not fix JSON format"
+            address_df = read_address_records(uploaded_file)
+            st.sidebar.success(f"Successfully loaded {len(address_df)} addresses from uploaded file")
+            return address_df
         except Exception as e:
             st.sidebar.error(f"Error processing uploaded file: {str(e)}")
             st.session_state.json_load_error = str(e)
     
-    # If all else fails, use sample data
-    st.sidebar.error("All attempts to load address data failed. Using sample data instead.")
-    return generate_sample_addresses()
+    return None
 
-# Process address data
+# Load the precinct polygons and spatial index once per server process
+@st.cache_resource
+def get_precinct_index():
+    try:
+        return load_precinct_index()
+    except Exception as e:
+        st.sidebar.warning(f"Could not load precinct geometry: {str(e)}")
+        return None
+
+# Load District 6's precinct boundaries once per server process, dropping the rest of the county
+@st.cache_resource
+def get_precinct_outlines():
+    try:
+        return load_precinct_outlines([precinct["id"] for precinct in get_district6_precincts()])
+    except Exception as e:
+        st.sidebar.warning(f"Could not load precinct boundaries: {str(e)}")
+        return None
+
+# Process address data (any iterable of records) into a normalized DataFrame
 def process_address_data(address_data):
-    # Add precinct information if not present
-    for address in address_data:
-        # Clean up property use to be either "Residential" or "Business"
-        property_use = str(address.get('PROPERTY_USE', ''))
-        if '0300' in property_use or 'Multi-Family' in property_use or 'Condo' in property_use or 'Apartment' in property_use:
-            address['PROPERTY_USE'] = "Residential"
-        elif '0100' in property_use or '0110' in property_use or 'Single Family' in property_use or 'Home' in property_use:
-            address['PROPERTY_USE'] = "Residential"
-        elif 'Commercial' in property_use or 'Business' in property_use or 'Office' in property_use or 'Retail' in property_use:
-            address['PROPERTY_USE'] = "Business"
-        else:
-            # Default to residential if unclear
-            address['PROPERTY_USE'] = "Residential"
-        
-        # Check if address already has precinct info
-        if 'PRECINCT' not in address:
-            # Assign precinct based on ZIP code
-            zip_code = str(address.get('STR_ZIP', ''))
-            
-            # Simple assignment logic - in a real app, this would use geospatial data
-            # For now, we'll assign based on a simple pattern
-            if zip_code == '33705':
-                # Distribute 33705 addresses across precincts
-                street_num = int(address.get('STR_NUM', 0))
-                if street_num < 200:
-                    address['PRECINCT'] = '106'
-                elif street_num < 400:
-                    address['PRECINCT'] = '108'
-                elif street_num < 600:
-                    address['PRECINCT'] = '109'
-                elif street_num < 800:
-                    address['PRECINCT'] = '116'
-                else:
-                    address['PRECINCT'] = '117'
-            elif zip_code == '33701':
-                # Distribute 33701 addresses across precincts
-                street_num = int(address.get('STR_NUM', 0))
-                if street_num < 200:
-                    address['PRECINCT'] = '118'
-                elif street_num < 400:
-                    address['PRECINCT'] = '119'
-                elif street_num < 600:
-                    address['PRECINCT'] = '121'
-                elif street_num < 800:
-                    address['PRECINCT'] = '122'
-                else:
-                    address['PRECINCT'] = '123'
-            else:
-                # Default precinct for other ZIP codes
-                address['PRECINCT'] = '130'
-            
-            # Special case for Ariel's address
-            if (address.get('STR_NUM') == 315 and 
-                'TAYLOR' in str(address.get('STR_NAME', '')) and 
-                address.get('STR_ZIP') == '33705'):
-                address['PRECINCT'] = '106'
-                address['OWNER1'] = 'FERNANDEZ, ARIEL'
-        
-        # Add building name if not present for multi-family properties
-        if 'BUILDING_NAME' not in address:
-            property_use = str(address.get('PROPERTY_USE', ''))
-            if '0300' in property_use or 'Multi-Family' in property_use or 'Condo' in property_use or 'Apartment' in property_use:
-                # Extract building name from address or create one
-                street_num = str(address.get('STR_NUM', ''))
-                street_name = str(address.get('STR_NAME', ''))
-                if street_name:
-                    address['BUILDING_NAME'] = f"{street_name.title()} {street_num} Condos"
-                else:
-                    address['BUILDING_NAME'] = f"Building {street_num}"
-        
-        # Add coordinates for map if not present
-        if 'LAT' not in address or 'LON' not in address:
-            # Generate a latitude and longitude near St. Petersburg, FL
-            # This is just for demonstration - real app would use actual coordinates
-            base_lat = 27.773056  # St. Petersburg latitude
-            base_lon = -82.639999  # St. Petersburg longitude
-            
-            # Add small offsets based on street number and precinct to create a scatter effect
-            street_num = float(address.get('STR_NUM', 0))
-            precinct_id = str(address.get('PRECINCT', '106'))
-            
-            address['LAT'] = base_lat + (street_num % 100) * 0.0001 + (int(precinct_id) % 10) * 0.001
-            address['LON'] = base_lon + (street_num % 50) * 0.0002 - (int(precinct_id) % 5) * 0.001
-        
-        # Add geographic section based on precinct
-        if 'SECTION' not in address:
-            precinct_id = str(address.get('PRECINCT', ''))
-            precincts = get_district6_precincts()
-            precinct_info = next((p for p in precincts if p['id'] == precinct_id), None)
-            
-            if precinct_info:
-                address['SECTION'] = precinct_info['section']
-            else:
-                # Default to North if precinct not found
-                address['SECTION'] = "North"
-    
-    # Make sure Ariel's address is included
-    ariel_exists = False
-    for address in address_data:
-        owner1 = str(address.get('OWNER1', ''))
-        if (address.get('STR_NUM') == 315 and 
-            'TAYLOR' in str(address.get('STR_NAME', '')) and 
-            address.get('STR_ZIP') == '33705'):
-            ariel_exists = True
-            # Make sure Ariel's address has coordinates
-            if 'LAT' not in address or 'LON' not in address:
-                address['LAT'] = 27.773056  # St. Petersburg latitude
-                address['LON'] = -82.639999  # St. Petersburg longitude
-            # Make sure Ariel's address has a section
-            address['SECTION'] = "North"
-            break
-    
-    # Add Ariel's address if not found
-    if not ariel_exists:
-        ariel_address = {
-            "PARCEL_NUMBER": "ARIEL-RESIDENCE",
-            "OWNER1": "FERNANDEZ, ARIEL",
-            "OWNER2": "",
-            "SITE_ADDRESS": "315 TAYLOR AVE S",
-            "SITE_CITYZIP": "ST PETERSBURG, FL 33705",
-            "SUBDIVISION": "DISTRICT 6",
-            "MAILING_ADDRESS_1": "315 TAYLOR AVE S",
-            "MAILING_CITY": "ST PETERSBURG",
-            "MAILING_STATE": "FL",
-            "MAILING_ZIP": "33705",
-            "PROPERTY_USE": "Residential",
-            "HX_YN": "Yes",
-            "STR_NUM": 315,
-            "STR_NAME": "TAYLOR",
-            "STR_UNIT": "",
-            "STR_ZIP": "33705",
-            "PRECINCT": "106",  # Explicitly assign precinct
-            "LAT": 27.773056,  # Add coordinates for map
-            "LON": -82.639999,
-            "SECTION": "North"  # Assign geographic section
-        }
-        address_data.append(ariel_address)
+    address_df, added_ariel, merged = normalize_district_addresses(address_data, get_precinct_index())
+    if merged:
+        st.sidebar.info(f"Merged {merged} duplicate parcel records into their households")
+    if added_ariel:
         st.sidebar.success("Added Ariel Fernandez's address to the dataset")
+    return address_df
+
+# Stream a JSON export from a file object into process_address_data, noting any malformed records skipped
+def read_address_records(f):
+    skipped = []
+    address_df = process_address_data(iter_json_records(iter_file_chunks(f), skipped))
+    if skipped:
+        st.sidebar.warning(f"Skipped {len(skipped)} malformed records")
+    return address_df
 
 # Simple function to group addresses by proximity without using sklearn
 def simple_group_addresses(addresses):
@@ -536,147 +413,452 @@ def simple_group_addresses(addresses):
     
     return building_groups
 
-# Load address data when the app starts
-if not st.session_state.data_loaded:
-    st.session_state.address_data = load_addresses()
-    st.session_state.data_loaded = True
+# Organize addresses by precinct (row positions into the address table)
+def organize_addresses_by_precinct(table):
+    precinct_ids = [precinct["id"] for precinct in get_district6_precincts()]
+    
+    # If precinct is not specified or invalid, fall back to a default based on ZIP code
+    precinct = table.values('PRECINCT').astype(str)
+    zip_code = table.values('STR_ZIP').astype(str)
+    fallback = np.where(zip_code == '33705', '106', np.where(zip_code == '33701', '118', '130'))
+    assigned = np.where(np.isin(precinct, precinct_ids), precinct, fallback)
+    
+    return {precinct_id: np.flatnonzero(assigned == precinct_id) for precinct_id in precinct_ids}
+
+# Build the columnar table and precinct index from normalized addresses
+def build_address_dataset(address_df, is_sample=False):
+    table = AddressTable(prepare_frame(address_df))
+    return AddressDataset(table, organize_addresses_by_precinct(table), is_sample=is_sample)
 
-# Organize addresses by precinct
-def organize_addresses_by_precinct():
-    if 'precinct_addresses' not in st.session_state or not st.session_state.precinct_addresses:
-        st.session_state.precinct_addresses = {}
-        
-        # Get all precincts
-        precincts = get_district6_precincts()
-        for precinct in precincts:
-            precinct_id = precinct["id"]
-            st.session_state.precinct_addresses[precinct_id] = []
-        
-        # Assign addresses to precincts
-        for address in st.session_state.address_data:
-            precinct_id = str(address.get('PRECINCT', ''))
-            
-            # If precinct is not specified or invalid, try to determine it
-            if precinct_id not in st.session_state.precinct_addresses:
-                # Simple assignment logic based on ZIP code
-                zip_code = str(address.get('STR_ZIP', ''))
-                if zip_code == '33705':
-                    precinct_id = '106'  # Default for 33705
-                elif zip_code == '33701':
-                    precinct_id = '118'  # Default for 33701
-                else:
-                    precinct_id = '130'  # Default for other ZIP codes
-            
-            # Add address to the appropriate precinct
-            if precinct_id in st.session_state.precinct_addresses:
-                st.session_state.precinct_addresses[precinct_id].append(address)
+# Load, normalize and index the address data once per server process
+@st.cache_resource
+def load_shared_dataset():
+    address_df = load_addresses()
+    if address_df is None:
+        # If all else fails, use sample data
+        st.sidebar.error("All attempts to load address data failed. Using sample data instead.")
+        return build_address_dataset(process_address_data(generate_sample_addresses()), is_sample=True)
+    return build_address_dataset(address_df)
+
+# Get the dataset for this session: the shared one unless the volunteer uploaded their own
+def get_address_dataset():
+    dataset = load_shared_dataset()
+    
+    if dataset.is_sample:
+        # File upload option as last resort
+        st.sidebar.warning("Could not load address data from files or GitHub. Please upload a file.")
+        uploaded_file = st.sidebar.file_uploader("Upload address data (JSON format)", type=["json"])
+        if uploaded_file is None:
+            st.session_state.uploaded_dataset = None
+        elif st.session_state.uploaded_dataset is None or st.session_state.uploaded_dataset[0] != uploaded_file.file_id:
+            address_df = load_uploaded_addresses(uploaded_file)
+            if address_df is not None:
+                st.session_state.uploaded_dataset = (uploaded_file.file_id, build_address_dataset(address_df))
+    
+    if st.session_state.uploaded_dataset is not None:
+        return st.session_state.uploaded_dataset[1]
+    return dataset
+
+# Open the shared canvass results database once per server process
+@st.cache_resource
+def get_canvass_store():
+    try:
+        return CanvassStore()
+    except Exception as e:
+        st.sidebar.warning(f"Could not open the canvass results database, results will not be saved: {str(e)}")
+        return CanvassStore(":memory:")
+
+# Queue result writes so taps return immediately; flushed to the store in batches
+@st.cache_resource
+def get_canvass_writer():
+    return WriteBehindQueue(get_canvass_store())
+
+# Record a result for a door (runs as a button callback, before the page is rebuilt)
+def record_result(address_key, **fields):
+    get_canvass_writer().put(address_key, st.session_state.volunteer_name, **fields)
+
+# Point this session at the latest results recorded by every volunteer
+def load_canvass_results():
+    results = get_canvass_writer().snapshot()
+    st.session_state.visited_addresses = results.visited
+    st.session_state.support_levels = results.support_levels
+    st.session_state.donations = results.donations
+    st.session_state.interaction_notes = results.notes
+    st.session_state.follow_ups = results.follow_ups
+
+# Merge a results file from an offline walk packet into the shared results (safe to repeat)
+def import_offline_results(uploaded_file):
+    volunteer, updates = read_results(uploaded_file.getvalue())
+    return merge_results(get_canvass_store(), updates, volunteer or st.session_state.volunteer_name)
+
+# Running progress totals for a dataset, shared by every session using it
+@st.cache_resource(hash_funcs={AddressDataset: id}, max_entries=8)
+def get_canvass_stats(dataset):
+    return CanvassStats(dataset, section_by_precinct())
+
+# Progress for a precinct, section or the district, including this process's unsaved taps
+def get_progress(precinct_id=None, section=None):
+    canvass_stats = get_canvass_stats(address_dataset)
+    # Unsaved taps are read before syncing: one flushed in between is then counted once either way, never missed
+    unflushed = get_canvass_writer().unflushed()
+    canvass_stats.sync(get_canvass_store())
+    return canvass_stats.stats(precinct_id, section, unflushed=unflushed)
+
+# Keep this session's visited-address mask in step with visited_addresses
+def get_visited_mask(dataset):
+    if st.session_state.visited_mask is None or st.session_state.visited_mask.dataset is not dataset:
+        st.session_state.visited_mask = ParcelMask(dataset)
+    return st.session_state.visited_mask.sync(st.session_state.visited_addresses)
+
+# Attach this session to the address data when the app starts
+address_dataset = get_address_dataset()
+st.session_state.data_loaded = True
+
+# Results collected offline are merged before this session's results are loaded
+with st.sidebar.expander("Offline Results"):
+    results_file = st.file_uploader("Import walk packet results (JSON)", type=["json"])
+    if results_file is not None:
+        if results_file.file_id not in st.session_state.imported_results:
+            try:
+                changed, unchanged = import_offline_results(results_file)
+                st.session_state.imported_results[results_file.file_id] = f"Imported {changed} updated doors ({unchanged} already up to date)."
+            except ValueError as e:
+                st.session_state.imported_results[results_file.file_id] = f"Could not import {results_file.name}: {str(e)}"
+        st.write(st.session_state.imported_results[results_file.file_id])
+load_canvass_results()
+get_canvass_stats(address_dataset).sync(get_canvass_store())
 
 # Group addresses by building/neighborhood
-def group_addresses():
-    if st.session_state.selected_precinct:
-        precinct_id = st.session_state.selected_precinct
-        addresses = st.session_state.precinct_addresses.get(precinct_id, [])
-        
-        # Dictionary to store buildings and their addresses
-        buildings = defaultdict(list)
-        
-        # Group addresses by building
-        for address in addresses:
-            # For multi-unit buildings (condos, apartments)
-            if 'BUILDING_NAME' in address:
-                building_key = f"{address.get('STR_NUM')}-{address.get('STR_NAME')}-{address.get('BUILDING_NAME')}"
-                buildings[building_key].append(address)
-            # For single-family homes, group by street
-            else:
-                street_key = f"{address.get('STR_NAME')}-HOMES"
-                buildings[street_key].append(address)
-        
-        # Sort buildings by number of addresses (descending)
-        sorted_buildings = sorted(buildings.items(), key=lambda x: len(x[1]), reverse=True)
-        
-        return sorted_buildings
-    return []
+def group_addresses(dataset, positions):
+    if len(positions) == 0:
+        return []
+    
+    # Project the dataset-wide building codes onto these addresses
+    building_codes, building_keys = dataset.building_groups
+    codes, group_codes = pd.factorize(building_codes[positions])
+    
+    # Split positions by group, keeping first-seen order within and across groups
+    order = np.argsort(codes, kind='stable')
+    groups = np.split(np.asarray(positions)[order], np.cumsum(np.bincount(codes, minlength=len(group_codes)))[:-1])
+    
+    # Sort buildings by number of addresses (descending)
+    sorted_buildings = sorted(zip(building_keys[group_codes], groups), key=lambda x: len(x[1]), reverse=True)
+    
+    return sorted_buildings
+
+# Reuse this session's last grouping while the filtered addresses are unchanged
+def get_building_groups(dataset, positions):
+    cache_key = np.asarray(positions).tobytes()
+    cached = st.session_state.building_groups
+    if cached is None or cached[0] is not dataset or cached[1] != cache_key:
+        cached = (dataset, cache_key, group_addresses(dataset, positions))
+        st.session_state.building_groups = cached
+    return cached[2]
 
 # Generate search suggestions based on partial input
-def generate_search_suggestions(addresses, partial_query):
+def generate_search_suggestions(dataset, precinct_id, partial_query):
     if not partial_query or len(partial_query) < 2:
         return []
     
-    suggestions = set()
-    partial_query = partial_query.lower()
+    # Ranked lookup in the prebuilt index (precinct_id None searches the whole district)
+    return dataset.search_index.suggest(partial_query, precinct_id, limit=10)
+
+# Filter addresses based on search query and filters
+def filter_addresses(dataset, positions, search_query="", show_visited=True, show_not_visited=True, property_type="All", geographic_section="All"):
+    positions = np.asarray(positions)
+    keep = np.ones(len(positions), dtype=bool)
     
-    for address in addresses:
-        # Check owner names
-        owner1 = str(address.get('OWNER1', '')).lower()
-        if partial_query in owner1:
-            suggestions.add(address.get('OWNER1', ''))
-        
-        owner2 = str(address.get('OWNER2', '')).lower()
-        if owner2 and partial_query in owner2:
-            suggestions.add(address.get('OWNER2', ''))
-        
-        # Check street address
-        street_address = str(address.get('SITE_ADDRESS', '')).lower()
-        if partial_query in street_address:
-            suggestions.add(address.get('SITE_ADDRESS', ''))
-        
-        # Check street name
-        street_name = str(address.get('STR_NAME', '')).lower()
-        if partial_query in street_name:
-            suggestions.add(address.get('STR_NAME', ''))
+    # Check which addresses have been visited
+    if not show_visited or not show_not_visited:
+        is_visited = get_visited_mask(dataset)[positions]
+        if not show_visited:
+            keep &= ~is_visited
+        if not show_not_visited:
+            keep &= is_visited
     
-    # Convert to list and sort
-    suggestion_list = sorted(list(suggestions))
+    # Filter by property type
+    if property_type != "All":
+        keep &= dataset.mask('PROPERTY_USE', property_type)[positions]
     
-    # Limit to top 10 suggestions
-    return suggestion_list[:10]
+    # Filter by geographic section
+    if geographic_section != "All":
+        keep &= dataset.mask('SECTION', geographic_section)[positions]
+    
+    survivors = positions[keep]
+    
+    # Filter by search query, only over the addresses that passed the other filters
+    if search_query and len(survivors) > 0:
+        survivors = survivors[dataset.table.contains(['OWNER1', 'OWNER2', 'SITE_ADDRESS', 'SITE_CITYZIP'], search_query, survivors)]
+    
+    return survivors
 
-# Filter addresses based on search query and filters
-def filter_addresses(addresses, search_query="", show_visited=True, show_not_visited=True, property_type="All", geographic_section="All"):
-    filtered = []
+# Show one address card with its contact and visit buttons
+# Each card reruns on its own when its buttons are pressed, so it reads the latest results itself
+@fragment()
+def render_address_card(address, i):
+    address_key = address.get('PARCEL_NUMBER', '')
+    results = get_canvass_writer().snapshot()
+    is_visited = address_key in results.visited
     
-    for address in addresses:
-        # Check if address has been visited
-        address_key = address.get('PARCEL_NUMBER', '')
-        is_visited = address_key in st.session_state.visited_addresses
+    # Get support level if available
+    support_level = results.support_levels.get(address_key, "unknown")
+    support_label = get_support_level_label(support_level)
+    support_color = get_support_level_color(support_level)
+    
+    # Check if this is Ariel's address
+    is_ariel = False
+    owner1 = str(address.get('OWNER1', ''))
+    if "FERNANDEZ, ARIEL" in owner1:
+        is_ariel = True
+    
+    # Create a card-like display for each address
+    col1, col2, col3 = st.columns([3, 1, 1])
+    
+    with col1:
+        # Format address display
+        site_address = address.get('SITE_ADDRESS', '')
+        site_cityzip = address.get('SITE_CITYZIP', '')
+        owner1 = address.get('OWNER1', '')
+        owner2 = address.get('OWNER2', '')
+        section = address.get('SECTION', '')
         
-        # Skip if we're not showing visited addresses and this one has been visited
-        if not show_visited and is_visited:
-            continue
+        # Highlight Ariel's address
+        if is_ariel:
+            st.markdown(f"⭐ **{owner1}** ⭐")
+            st.markdown(f"**{site_address}**  \n{site_cityzip}")
+            st.markdown(f"Section: {section}")
+        else:
+            st.markdown(f"**{owner1}**{' & ' + owner2 if owner2 else ''}")
+            st.markdown(f"{site_address}  \n{site_cityzip}")
+            st.markdown(f"Section: {section}")
         
-        # Skip if we're not showing unvisited addresses and this one hasn't been visited
-        if not show_not_visited and not is_visited:
-            continue
+        # Show property type
+        property_use = address.get('PROPERTY_USE', '')
+        st.markdown(f"*{property_use}*")
         
-        # Filter by property type
-        if property_type != "All":
-            address_property_type = address.get('PROPERTY_USE', '')
-            if property_type == "Residential" and address_property_type != "Residential":
-                continue
-            if property_type == "Business" and address_property_type != "Business":
-                continue
+        # Registered voters at this door, from the voter file joined at compile time
+        voter_count = address.get('VOTER_COUNT', 0)
+        if voter_count:
+            voter_names = address.get('VOTER_NAMES', '')
+            st.markdown(f"🗳️ {voter_count} registered voter{'s' if voter_count != 1 else ''}{': ' + voter_names if voter_names else ''}")
         
-        # Filter by geographic section
-        if geographic_section != "All":
-            address_section = address.get('SECTION', '')
-            if geographic_section != address_section:
-                continue
+        # Other parcels of the same household (parking spaces, side lots, duplicate records)
+        household_parcels = address.get('HOUSEHOLD_PARCELS', '')
+        if household_parcels:
+            st.caption(f"Also covers parcels: {household_parcels.replace(';', ', ')}")
         
-        # Filter by search query
-        if search_query:
-            query = search_query.lower()
-            owner1 = str(address.get('OWNER1', '')).lower()
-            owner2 = str(address.get('OWNER2', '')).lower()
-            addr = str(address.get('SITE_ADDRESS', '')).lower()
-            city_zip = str(address.get('SITE_CITYZIP', '')).lower()
-            
-            if (query in owner1 or query in owner2 or 
-                query in addr or query in city_zip):
-                filtered.append(address)
+        # Show support level if available
+        if support_level != "unknown":
+            st.markdown(f"Support Level: <span style='color:{support_color};font-weight:bold'>{support_label}</span>", unsafe_allow_html=True)
+        
+        # Show donation amount if available
+        donation = results.donations.get(address_key, 0)
+        if donation > 0:
+            st.markdown(f"Donation: **${donation:.2f}**")
+        
+        # Show follow-up flag if set
+        if address_key in results.follow_ups:
+            st.markdown("🚩 **Follow up**")
+    
+    with col2:
+        # Contact button
+        if st.button(f"Contact {i}", key=f"contact_{address_key}"):
+            navigate_to("contact", address)
+    
+    with col3:
+        # Mark as visited/not visited
+        if is_visited:
+            st.button(f"✓ Visited {i}", key=f"visited_{address_key}", on_click=record_result, args=(address_key,), kwargs={'visited': False})
         else:
-            filtered.append(address)
+            col3a, col3b = st.columns(2)
+            with col3a:
+                st.button(f"Not Home {i}", key=f"nothome_{address_key}", on_click=record_result, args=(address_key,), kwargs={'visited': True, 'notes': "Not home"})
+            with col3b:
+                st.button(f"Skip {i}", key=f"skip_{address_key}", on_click=record_result, args=(address_key,), kwargs={'visited': True, 'notes': "Skipped"})
+    
+    st.markdown("---")
+
+# Precinct summary; refreshes its progress on a timer without rerunning the page
+@fragment(run_every=PROGRESS_REFRESH_SECONDS)
+def render_precinct_header(precinct_info):
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Registered Voters", precinct_info['total_addresses'])
+    
+    with col2:
+        st.metric("Turnout", precinct_info['turnout'])
+    
+    with col3:
+        # Visited addresses in this precinct, from the running counters
+        precinct_progress = get_progress(precinct_info['id'])
+        st.metric("Addresses Visited", f"{precinct_progress['visited']}/{precinct_progress['addresses']}")
     
-    return filtered
+    with col4:
+        st.metric("Geographic Section", precinct_info['section'])
+
+# Use a search suggestion (runs as a button callback, before the search box is drawn)
+def use_search_suggestion(suggestion):
+    st.session_state.search_query = suggestion
+
+# Callbacks for the address list's page and building buttons
+def set_address_page(page):
+    st.session_state.address_page = page
+
+def show_building_addresses(building_key, count):
+    st.session_state.expanded_buildings[building_key] = count
+
+# Show the controls for a paged list and return the current page's items and start index
+def paginate(items, key):
+    page_size = st.session_state.page_size
+    page_count = max(1, -(-len(items) // page_size))
+    page = min(st.session_state.address_page, page_count - 1)
+    st.session_state.address_page = page
+    
+    # Buttons change the page in callbacks, so a click costs one script run
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Previous", key=f"{key}_previous", disabled=page == 0, on_click=set_address_page, args=(page - 1,))
+        with col2:
+            st.caption(f"Page {page + 1} of {page_count} ({len(items)} total)")
+        with col3:
+            st.button("Next ▶", key=f"{key}_next", disabled=page == page_count - 1, on_click=set_address_page, args=(page + 1,))
+    
+    start = page * page_size
+    return items[start:start + page_size], start
+
+# Plan a walking order for the unvisited doors in a list (on the volunteer's click), at most MAX_ROUTE_STOPS stops
+def plan_route(dataset, positions, start, list_state):
+    unvisited = np.asarray(positions)[~get_visited_mask(dataset)[positions]]
+    stops, distance = plan_walk_route(dataset.table, unvisited, start, max_stops=MAX_ROUTE_STOPS)
+    left_out = len(unvisited) - sum(len(stop) for stop in stops)
+    st.session_state.walk_route = (dataset, list_state, stops, distance, left_out)
+
+# The route planned for this list, without the doors visited since, as (stops, distance, doors left out); None if not planned
+def get_walk_route(dataset, list_state):
+    cached = st.session_state.walk_route
+    if cached is None or cached[0] is not dataset or cached[1] != list_state:
+        return None
+    visited = get_visited_mask(dataset)
+    stops = [stop[~visited[stop]] for stop in cached[2]]
+    return [stop for stop in stops if len(stop)], cached[3], cached[4]
+
+# Closest unvisited doors anywhere in the district, from the shared grid index
+def find_doors_near(dataset, location, count, radius):
+    return dataset.spatial_index.nearest(location['lat'], location['lon'], count, radius, exclude=get_visited_mask(dataset))
+
+# Order addresses by distance from a location; addresses without coordinates go last
+def sort_by_distance(dataset, positions, location):
+    positions = np.asarray(positions)
+    points = to_meters(dataset.table.values('LAT', positions).astype(float), dataset.table.values('LON', positions).astype(float), location['lat'])
+    here = to_meters(np.array([location['lat']]), np.array([location['lon']]), location['lat'])[0]
+    distances = np.hypot(*(points - here).T)
+    return positions[np.argsort(np.nan_to_num(distances, nan=np.inf), kind='stable')]
+
+# Map positions of every address, projected once per dataset and shared by every session
+@st.cache_resource(hash_funcs={AddressDataset: id}, max_entries=8)
+def get_point_pyramid(dataset):
+    pyramid = PointPyramid(dataset.table.values('LAT').astype(float), dataset.table.values('LON').astype(float))
+    # Holding the dataset keeps its id, the cache key, from passing to another dataset while this entry lives
+    pyramid.dataset = dataset
+    return pyramid
+
+# Index into MAP_STATUSES of every address's recorded support level (-1 for none), built once per
+# results snapshot and shared by every session: snapshots only change when results are saved or tapped
+@st.cache_resource(hash_funcs={AddressDataset: id, MappingProxyType: id}, max_entries=4)
+def get_support_level_rows(dataset, support_levels):
+    row_level = np.full(len(dataset.table), -1, dtype=np.int64)
+    if support_levels:
+        levels = pd.Series(dict(support_levels))
+        for level, parcels in levels.groupby(levels, sort=False).groups.items():
+            if level in MAP_STATUSES:
+                row_level[dataset.parcel_positions(parcels)] = MAP_STATUSES.index(level)
+    row_level.setflags(write=False)
+    # Holding the dataset and levels keeps their ids, the cache key, from passing to others while this entry lives
+    return dataset, support_levels, row_level
+
+# Index into MAP_STATUSES of each address: visited or not, and the support level recorded
+def get_map_statuses(dataset, positions):
+    visited = get_visited_mask(dataset)[positions]
+    statuses = np.where(visited, MAP_STATUSES.index("unknown"), 0).astype(np.int64)
+    if st.session_state.support_levels:
+        row_level = get_support_level_rows(dataset, st.session_state.support_levels)[2][positions]
+        supported = visited & (row_level >= 0)
+        statuses[supported] = row_level[supported]
+    return statuses
+
+# Clustered map points for a list of addresses, reused while the list, statuses and detail are unchanged
+def get_map_layer(dataset, positions, detail):
+    pyramid = get_point_pyramid(dataset)
+    statuses = get_map_statuses(dataset, positions)
+    cache_key = (np.asarray(positions).tobytes(), statuses.tobytes(), detail)
+    cached = st.session_state.map_layer
+    if cached is not None and cached[0] is dataset and cached[1] == cache_key:
+        return cached[2]
+    
+    zoom = MAP_DETAIL_LEVELS[detail] or pyramid.auto_zoom(positions)
+    palette = [NOT_VISITED_COLOR] + [CSS_COLORS[get_support_level_color(level)] for level in MAP_STATUSES[1:]]
+    map_df = pyramid.cluster(positions, statuses, palette, zoom)
+    map_df["label"] = map_df["count"].astype(int).astype(str) + " addresses"
+    st.session_state.map_layer = (dataset, cache_key, map_df)
+    return map_df
+
+# Precinct boundary paths for the map, simplified for the zoom level it opens at
+def get_outline_paths(zoom, selected_precinct):
+    outlines = get_precinct_outlines()
+    if outlines is None:
+        return []
+    return [{
+        "path": ring.tolist(),
+        "label": f"Precinct {precinct_id}",
+        "color": SELECTED_OUTLINE_COLOR if precinct_id == selected_precinct else OUTLINE_COLOR,
+        "width": 3 if precinct_id == selected_precinct else 1
+    } for precinct_id, ring in outlines.at_zoom(zoom)]
+
+# Build a downloadable offline packet for a list of addresses, reusing it while the list is unchanged
+def prepare_offline_packet(dataset, positions, packet_id, title):
+    stops, _ = plan_walk_route(dataset.table, positions, st.session_state.user_location)
+    packet = build_walk_packet(
+        dataset.table, stops, get_canvass_writer().snapshot(), packet_id, title,
+        {level: get_support_level_label(level) for level in SUPPORT_LEVELS}, st.session_state.volunteer_name
+    )
+    st.session_state.offline_packet = (dataset, np.asarray(positions).tobytes(), packet_id, render_packet_html(packet))
+
+# Curve order of a precinct's doors for turf cutting, built once per precinct and shared by every session
+@st.cache_resource(hash_funcs={AddressDataset: id}, max_entries=64)
+def get_turf_cutter(dataset, precinct_id):
+    positions = dataset.positions(precinct_id)
+    cutter = TurfCutter(dataset.table, positions, dataset.building_groups[0][positions])
+    # Holding the dataset keeps its id, the cache key, from passing to another dataset while this entry lives
+    cutter.dataset = dataset
+    return cutter
+
+# Split a precinct's unvisited doors into packets, one per volunteer
+def cut_turf(dataset, precinct_id, packets):
+    return get_turf_cutter(dataset, precinct_id).cut(packets, get_visited_mask(dataset))
+
+# Door scores and per-precinct heaps, built once per dataset and shared by every session
+@st.cache_resource(hash_funcs={AddressDataset: id}, max_entries=8)
+def get_door_priority(dataset):
+    try:
+        targets = load_precinct_targets()
+    except (OSError, ValueError) as e:
+        st.sidebar.warning(f"Could not load precinct targets: {str(e)}")
+        targets = {}
+    return DoorPriority(dataset, get_district6_precincts(), targets)
+
+# Highest-value unvisited doors of a precinct, rescored with the outcomes logged so far
+def find_priority_doors(dataset, precinct_id, count):
+    door_priority = get_door_priority(dataset)
+    door_priority.sync(get_canvass_store())
+    return door_priority.top(precinct_id, count, exclude=get_visited_mask(dataset))
+
+# Order addresses from the highest priority score to the lowest
+def sort_by_priority(dataset, positions):
+    door_priority = get_door_priority(dataset)
+    door_priority.sync(get_canvass_store())
+    return door_priority.order(positions)
 
 # Get support level label
 def get_support_level_label(level):
@@ -728,8 +910,8 @@ def get_user_location():
 
 # Main app layout
 if st.session_state.current_page == "home":
-    # Organize addresses by precinct if not already done
-    organize_addresses_by_precinct()
+    # Addresses are organized by precinct once, when the dataset is built
+    address_table = address_dataset.table
     
     # Main content area
     st.title("District 6 Canvassing App")
@@ -761,7 +943,7 @@ if st.session_state.current_page == "home":
         else:
             filtered_precincts = precincts
         
-        precinct_options = [f"{p['name']} ({len(st.session_state.precinct_addresses.get(p['id'], []))} addresses)" for p in filtered_precincts]
+        precinct_options = [f"{p['name']} ({len(address_dataset.positions(p['id']))} addresses)" for p in filtered_precincts]
         
         if precinct_options:
             selected_index = 0
@@ -803,31 +985,86 @@ if st.session_state.current_page == "home":
         else:
             st.write("Click 'Find My Location' to see your position on the map and find nearby addresses.")
     
+    # Nearest doors still to knock, district-wide
+    if st.session_state.user_location:
+        with st.expander("📍 Doors Near Me"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.session_state.near_me_count = st.number_input("Doors:", min_value=1, max_value=100, value=st.session_state.near_me_count)
+            with col2:
+                st.session_state.near_me_radius = st.number_input("Within (meters):", min_value=50, max_value=5000, step=50, value=st.session_state.near_me_radius)
+            
+            near_positions, near_distances = find_doors_near(address_dataset, st.session_state.user_location, st.session_state.near_me_count, st.session_state.near_me_radius)
+            if len(near_positions) > 0:
+                st.dataframe(pd.DataFrame({
+                    "Distance (m)": near_distances.round().astype(int),
+                    "Address": address_table.values('SITE_ADDRESS', near_positions),
+                    "Owner": address_table.values('OWNER1', near_positions),
+                    "Precinct": address_table.values('PRECINCT', near_positions)
+                }), hide_index=True, use_container_width=True)
+            else:
+                st.info("No unvisited addresses within that distance.")
+    
     # Display precinct information
     if st.session_state.selected_precinct:
         precinct_id = st.session_state.selected_precinct
         precinct_info = next((p for p in precincts if p['id'] == precinct_id), None)
         
         if precinct_info:
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Registered Voters", precinct_info['total_addresses'])
-            
-            with col2:
-                st.metric("Turnout", precinct_info['turnout'])
-            
-            with col3:
-                # Count visited addresses in this precinct
-                precinct_addresses = st.session_state.precinct_addresses.get(precinct_id, [])
-                visited_count = sum(1 for addr in precinct_addresses if addr.get('PARCEL_NUMBER', '') in st.session_state.visited_addresses)
-                st.metric("Addresses Visited", f"{visited_count}/{len(precinct_addresses)}")
-            
-            with col4:
-                st.metric("Geographic Section", precinct_info['section'])
+            render_precinct_header(precinct_info)
         
         # Get addresses for the selected precinct
-        precinct_addresses = st.session_state.precinct_addresses.get(precinct_id, [])
+        precinct_addresses = address_dataset.positions(precinct_id)
+        
+        # The doors most worth knocking next: high-turnout, target precincts, homesteads, persuadable contacts
+        with st.expander("🎯 Priority Doors"):
+            st.session_state.priority_count = st.number_input("Top doors:", min_value=1, max_value=100, value=st.session_state.priority_count)
+            priority_positions, priority_scores = find_priority_doors(address_dataset, precinct_id, st.session_state.priority_count)
+            if len(priority_positions) > 0:
+                st.dataframe(pd.DataFrame({
+                    "Score": priority_scores.round(2),
+                    "Address": address_table.values('SITE_ADDRESS', priority_positions),
+                    "Owner": address_table.values('OWNER1', priority_positions),
+                    "Homestead": address_table.values('HX_YN', priority_positions) if 'HX_YN' in address_table.columns else ""
+                }), hide_index=True, use_container_width=True)
+            else:
+                st.info("Every address in this precinct has been visited.")
+        
+        # Split the precinct into walk packets so each volunteer gets their own patch
+        with st.expander("✂️ Turf Packets"):
+            st.write("Cuts the unvisited doors in this precinct into compact packets of about the same size. Buildings are never split, and packets are re-cut as doors are visited.")
+            st.session_state.turf_packets = st.number_input("Number of volunteers:", min_value=1, max_value=50, value=st.session_state.turf_packets)
+            packets = cut_turf(address_dataset, precinct_id, st.session_state.turf_packets)
+            if packets:
+                st.dataframe(pd.DataFrame({
+                    "Packet": np.arange(1, len(packets) + 1),
+                    "Doors": [len(packet) for packet in packets],
+                    "Streets": [", ".join(pd.Series(address_table.values('STR_NAME', packet)).value_counts().index[:3].astype(str)) for packet in packets]
+                }), hide_index=True, use_container_width=True)
+                
+                packet_options = ["All addresses"] + [f"Packet {k}" for k in range(1, len(packets) + 1)]
+                packet_index = st.session_state.turf_packet + 1 if st.session_state.turf_packet is not None and st.session_state.turf_packet < len(packets) else 0
+                selected_packet = st.selectbox("Work packet:", packet_options, index=packet_index)
+                st.session_state.turf_packet = packet_options.index(selected_packet) - 1 if selected_packet != "All addresses" else None
+                if st.session_state.turf_packet is not None:
+                    precinct_addresses = packets[st.session_state.turf_packet]
+            else:
+                st.info("Every address in this precinct has been visited.")
+                st.session_state.turf_packet = None
+        
+        # A self-contained page of this turf for walking without signal
+        with st.expander("📦 Offline Walk Packet"):
+            if st.session_state.turf_packet is not None:
+                packet_id = f"precinct-{precinct_id}-packet-{st.session_state.turf_packet + 1}-of-{len(packets)}"
+                packet_title = f"Precinct {precinct_id}, packet {st.session_state.turf_packet + 1} of {len(packets)}"
+            else:
+                packet_id = f"precinct-{precinct_id}"
+                packet_title = f"Precinct {precinct_id}"
+            st.write(f"Download {packet_title} as one HTML page with the addresses in walking order and the results so far. It works offline on a phone and keeps your taps on the device; use its Download results button and import the file under Offline Results in the sidebar once you are back online.")
+            st.button("Prepare Offline Packet", on_click=prepare_offline_packet, args=(address_dataset, precinct_addresses, packet_id, packet_title))
+            offline_packet = st.session_state.offline_packet
+            if offline_packet is not None and offline_packet[0] is address_dataset and offline_packet[1] == np.asarray(precinct_addresses).tobytes():
+                st.download_button("Download Walk Packet", data=offline_packet[3], file_name=f"{offline_packet[2]}.html", mime="text/html")
         
         # Search and filter options
         col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
@@ -835,10 +1072,12 @@ if st.session_state.current_page == "home":
         with col1:
             # Predictive search with autocomplete
             search_query = st.text_input("Search by name or address:", value=st.session_state.search_query)
+            search_all_precincts = st.checkbox("Search all District 6 precincts", value=st.session_state.search_all_precincts)
             
             # Generate suggestions based on partial input
-            if search_query and len(search_query) >= 2 and search_query != st.session_state.search_query:
-                st.session_state.search_suggestions = generate_search_suggestions(precinct_addresses, search_query)
+            if search_query and len(search_query) >= 2 and (search_query != st.session_state.search_query or search_all_precincts != st.session_state.search_all_precincts):
+                suggestion_precinct = None if search_all_precincts else precinct_id
+                st.session_state.search_suggestions = generate_search_suggestions(address_dataset, suggestion_precinct, search_query)
             
             # Display suggestions if available
             if st.session_state.search_suggestions and search_query:
@@ -846,12 +1085,14 @@ if st.session_state.current_page == "home":
                 with suggestion_container:
                     st.markdown("### Suggestions:")
                     for suggestion in st.session_state.search_suggestions:
-                        if st.button(f"🔍 {suggestion}", key=f"suggestion_{suggestion}"):
-                            search_query = suggestion
-                            st.session_state.search_query = suggestion
-                            st.rerun()
+                        st.button(f"🔍 {suggestion}", key=f"suggestion_{suggestion}", on_click=use_search_suggestion, args=(suggestion,))
             
             st.session_state.search_query = search_query
+            st.session_state.search_all_precincts = search_all_precincts
+            
+            # District-wide search looks through every precinct's addresses
+            if search_all_precincts and search_query:
+                precinct_addresses = address_table.all_positions()
         
         with col2:
             show_visited = st.checkbox("Show Visited", value=True)
@@ -862,11 +1103,23 @@ if st.session_state.current_page == "home":
         with col4:
             property_type = st.selectbox("Property Type:", ["All", "Residential", "Business"])
         
-        # Toggle between clustered and individual view
-        st.session_state.cluster_view = st.checkbox("Group addresses by building/neighborhood", value=st.session_state.cluster_view)
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            # Toggle between clustered and individual view
+            st.session_state.cluster_view = st.checkbox("Group addresses by building/neighborhood", value=st.session_state.cluster_view)
+            if not st.session_state.cluster_view:
+                st.session_state.sort_by_priority = st.checkbox("Highest priority first", value=st.session_state.sort_by_priority)
+            if st.session_state.user_location and not st.session_state.cluster_view:
+                st.session_state.sort_by_distance = st.checkbox("Sort by distance from me", value=st.session_state.sort_by_distance)
+        
+        with col2:
+            # Only one page of the address list is built per rerun
+            st.session_state.page_size = st.selectbox("Per page:", PAGE_SIZE_OPTIONS, index=PAGE_SIZE_OPTIONS.index(st.session_state.page_size))
         
         # Filter addresses based on search and filters
         filtered_addresses = filter_addresses(
+            address_dataset,
             precinct_addresses, 
             search_query=search_query,
             show_visited=show_visited,
@@ -875,232 +1128,116 @@ if st.session_state.current_page == "home":
             geographic_section=st.session_state.geographic_section
         )
         
+        # Settings that make up this list; a new list starts on its first page and needs its own route
+        list_state = (precinct_id, st.session_state.turf_packets, st.session_state.turf_packet, search_query, search_all_precincts, show_visited, show_not_visited, property_type, st.session_state.geographic_section, st.session_state.cluster_view, st.session_state.sort_by_distance, st.session_state.sort_by_priority)
+        
         # Display map of addresses
-        if filtered_addresses:
+        if len(filtered_addresses) > 0:
             st.subheader("Map View")
             
-            # Extract coordinates for map
-            map_data = []
-            for address in filtered_addresses:
-                # Use the LAT and LON fields we added during processing
-                lat = address.get('LAT')
-                lon = address.get('LON')
-                
-                if lat and lon:
-                    map_data.append({
-                        "lat": lat, 
-                        "lon": lon,
-                        "name": address.get('OWNER1', ''),
-                        "address": address.get('SITE_ADDRESS', '')
-                    })
+            # Nearby doors are merged into one point per cluster, colored by their most common status
+            st.session_state.map_detail = st.select_slider("Map detail:", options=list(MAP_DETAIL_LEVELS), value=st.session_state.map_detail)
+            map_df = get_map_layer(address_dataset, filtered_addresses, st.session_state.map_detail)
             
             # Add user's location to the map if available
             if st.session_state.user_location:
-                map_data.append({
+                map_df = pd.concat([map_df, pd.DataFrame([{
                     "lat": st.session_state.user_location["lat"],
                     "lon": st.session_state.user_location["lon"],
-                    "name": "YOUR LOCATION",
-                    "address": "You are here"
-                })
+                    "count": 0,
+                    "color": USER_LOCATION_COLOR,
+                    "size": map_df["size"].max() if len(map_df) > 0 else 10.0,
+                    "label": "You are here"
+                }])], ignore_index=True)
             
-            # Convert to DataFrame for Streamlit's map
-            if map_data:
-                map_df = pd.DataFrame(map_data)
-                st.map(map_df)
+            if len(map_df) > 0:
+                # Doors over the District 6 precinct boundaries, framed like st.map would
+                map_zoom = fit_zoom(map_df["lat"], map_df["lon"])
+                st.pydeck_chart(pdk.Deck(
+                    map_style=None,
+                    initial_view_state=pdk.ViewState(latitude=float(map_df["lat"].mean()), longitude=float(map_df["lon"].mean()), zoom=map_zoom),
+                    layers=[
+                        pdk.Layer("PathLayer", data=get_outline_paths(map_zoom, precinct_id), get_path="path", get_color="color", get_width="width", width_units="pixels", pickable=True),
+                        pdk.Layer("ScatterplotLayer", data=map_df, get_position=["lon", "lat"], get_fill_color="color", get_radius="size", radius_units="meters", radius_min_pixels=3, pickable=True)
+                    ],
+                    tooltip={"text": "{label}"}
+                ))
+                st.caption(f"{int(map_df['count'].sum())} addresses in {int((map_df['count'] > 0).sum())} map points. Blue: not visited; green to red: support level; light gray: visited, support unknown.")
             else:
                 st.warning("No map data available for these addresses.")
         
+        # Walking order for the doors still to knock
+        if len(filtered_addresses) > 0:
+            with st.expander("🚶 Walk Route"):
+                st.write("Orders the unvisited addresses shown above into a walking route, starting from your location if it has been found. Units in the same building are one stop.")
+                if st.button("Plan Walking Route"):
+                    plan_route(address_dataset, filtered_addresses, st.session_state.user_location, list_state)
+                # Later reruns keep the planned order and only drop the doors visited since
+                route = get_walk_route(address_dataset, list_state)
+                if route is not None:
+                    stops, distance, left_out = route
+                    if left_out:
+                        st.caption(f"Planned the first {MAX_ROUTE_STOPS} stops of this list; {left_out} more addresses are not in the route. Narrow the list to plan the rest.")
+                    if stops:
+                        st.write(f"{len(stops)} stops left of a {distance / 1000:.1f} km route")
+                        firsts = np.array([stop[0] for stop in stops])
+                        st.dataframe(pd.DataFrame({
+                            "Stop": np.arange(1, len(stops) + 1),
+                            "Address": address_table.values('SITE_ADDRESS', firsts),
+                            "Doors": [len(stop) for stop in stops],
+                            "Owner": address_table.values('OWNER1', firsts)
+                        }), hide_index=True, use_container_width=True)
+                    else:
+                        st.info("Every address in this list has been visited.")
+        
         # Display addresses
-        if filtered_addresses:
+        if len(filtered_addresses) > 0:
             st.subheader("Address List")
             
+            # Start from the first page whenever the list itself changes
+            if st.session_state.address_list_state != list_state:
+                st.session_state.address_list_state = list_state
+                st.session_state.address_page = 0
+                st.session_state.expanded_buildings = {}
+            
             if st.session_state.cluster_view:
-                # Group addresses by building/neighborhood using simple method
-                if len(filtered_addresses) > 0:
-                    # First try to group by building name if available
-                    buildings = defaultdict(list)
-                    
-                    # Group addresses by building
-                    for address in filtered_addresses:
-                        # For multi-unit buildings (condos, apartments)
-                        if 'BUILDING_NAME' in address:
-                            building_key = f"{address.get('STR_NUM')}-{address.get('STR_NAME')}-{address.get('BUILDING_NAME')}"
-                            buildings[building_key].append(address)
-                        # For single-family homes, group by street
-                        else:
-                            street_key = f"{address.get('STR_NAME')}-HOMES"
-                            buildings[street_key].append(address)
-                    
-                    # Sort buildings by number of addresses (descending)
-                    sorted_buildings = sorted(buildings.items(), key=lambda x: len(x[1]), reverse=True)
-                else:
-                    sorted_buildings = []
+                # Group addresses by building/neighborhood
+                sorted_buildings = get_building_groups(address_dataset, filtered_addresses)
                 
-                # Display buildings
-                for building_key, building_addresses in sorted_buildings:
+                # Display only this page's buildings
+                page_buildings, _ = paginate(sorted_buildings, "buildings")
+                for building_key, building_positions in page_buildings:
                     # Extract building name or street name
                     if "-HOMES" in building_key:
                         street_name = building_key.split("-HOMES")[0]
-                        building_display = f"{street_name} Street ({len(building_addresses)} homes)"
+                        building_display = f"{street_name} Street ({len(building_positions)} homes)"
                         is_building = False
                     else:
-                        building_name = building_addresses[0].get('BUILDING_NAME', 'Building')
-                        building_display = f"{building_name} ({len(building_addresses)} units)"
+                        building_name = address_table.values('BUILDING_NAME', building_positions[:1])[0] or 'Building'
+                        building_display = f"{building_name} ({len(building_positions)} units)"
                         is_building = True
                     
-                    # Create an expander for each building
-                    with st.expander(building_display):
-                        # Display addresses in this building
-                        for i, address in enumerate(building_addresses):
-                            address_key = address.get('PARCEL_NUMBER', '')
-                            is_visited = address_key in st.session_state.visited_addresses
-                            
-                            # Get support level if available
-                            support_level = st.session_state.support_levels.get(address_key, "unknown")
-                            support_label = get_support_level_label(support_level)
-                            support_color = get_support_level_color(support_level)
-                            
-                            # Check if this is Ariel's address
-                            is_ariel = False
-                            owner1 = str(address.get('OWNER1', ''))
-                            if "FERNANDEZ, ARIEL" in owner1:
-                                is_ariel = True
-                            
-                            # Create a card-like display for each address
-                            col1, col2, col3 = st.columns([3, 1, 1])
-                            
-                            with col1:
-                                # Format address display
-                                site_address = address.get('SITE_ADDRESS', '')
-                                site_cityzip = address.get('SITE_CITYZIP', '')
-                                owner1 = address.get('OWNER1', '')
-                                owner2 = address.get('OWNER2', '')
-                                section = address.get('SECTION', '')
-                                
-                                # Highlight Ariel's address
-                                if is_ariel:
-                                    st.markdown(f"⭐ **{owner1}** ⭐")
-                                    st.markdown(f"**{site_address}**  \n{site_cityzip}")
-                                    st.markdown(f"Section: {section}")
-                                else:
-                                    st.markdown(f"**{owner1}**{' & ' + owner2 if owner2 else ''}")
-                                    st.markdown(f"{site_address}  \n{site_cityzip}")
-                                    st.markdown(f"Section: {section}")
-                                
-                                # Show property type
-                                property_use = address.get('PROPERTY_USE', '')
-                                st.markdown(f"*{property_use}*")
-                                
-                                # Show support level if available
-                                if support_level != "unknown":
-                                    st.markdown(f"Support Level: <span style='color:{support_color};font-weight:bold'>{support_label}</span>", unsafe_allow_html=True)
-                                
-                                # Show donation amount if available
-                                donation = st.session_state.donations.get(address_key, 0)
-                                if donation > 0:
-                                    st.markdown(f"Donation: **${donation:.2f}**")
-                            
-                            with col2:
-                                # Contact button
-                                if st.button(f"Contact {i}", key=f"contact_{address_key}"):
-                                    navigate_to("contact", address)
-                            
-                            with col3:
-                                # Mark as visited/not visited
-                                if is_visited:
-                                    if st.button(f"✓ Visited {i}", key=f"visited_{address_key}"):
-                                        st.session_state.visited_addresses.remove(address_key)
-                                        st.rerun()
-                                else:
-                                    col3a, col3b = st.columns(2)
-                                    with col3a:
-                                        if st.button(f"Not Home {i}", key=f"nothome_{address_key}"):
-                                            st.session_state.visited_addresses.add(address_key)
-                                            st.session_state.interaction_notes[address_key] = "Not home"
-                                            st.rerun()
-                                    with col3b:
-                                        if st.button(f"Skip {i}", key=f"skip_{address_key}"):
-                                            st.session_state.visited_addresses.add(address_key)
-                                            st.session_state.interaction_notes[address_key] = "Skipped"
-                                            st.rerun()
+                    # Addresses are only built once the volunteer opens the building
+                    shown = st.session_state.expanded_buildings.get(building_key, 0)
+                    with st.expander(building_display, expanded=shown > 0):
+                        if shown == 0:
+                            st.button(f"Show {len(building_positions)} addresses", key=f"expand_{building_key}", on_click=show_building_addresses, args=(building_key, st.session_state.page_size))
+                        else:
+                            # Display addresses in this building
+                            for i, address in enumerate(address_table.records(building_positions[:shown])):
+                                render_address_card(address, i)
                             
-                            st.markdown("---")
+                            if shown < len(building_positions):
+                                st.button(f"Show more ({len(building_positions) - shown} remaining)", key=f"more_{building_key}", on_click=show_building_addresses, args=(building_key, shown + st.session_state.page_size))
             else:
-                # Display individual addresses
-                for i, address in enumerate(filtered_addresses):
-                    address_key = address.get('PARCEL_NUMBER', '')
-                    is_visited = address_key in st.session_state.visited_addresses
-                    
-                    # Get support level if available
-                    support_level = st.session_state.support_levels.get(address_key, "unknown")
-                    support_label = get_support_level_label(support_level)
-                    support_color = get_support_level_color(support_level)
-                    
-                    # Check if this is Ariel's address
-                    is_ariel = False
-                    owner1 = str(address.get('OWNER1', ''))
-                    if "FERNANDEZ, ARIEL" in owner1:
-                        is_ariel = True
-                    
-                    # Create a card-like display for each address
-                    col1, col2, col3 = st.columns([3, 1, 1])
-                    
-                    with col1:
-                        # Format address display
-                        site_address = address.get('SITE_ADDRESS', '')
-                        site_cityzip = address.get('SITE_CITYZIP', '')
-                        owner1 = address.get('OWNER1', '')
-                        owner2 = address.get('OWNER2', '')
-                        section = address.get('SECTION', '')
-                        
-                        # Highlight Ariel's address
-                        if is_ariel:
-                            st.markdown(f"⭐ **{owner1}** ⭐")
-                            st.markdown(f"**{site_address}**  \n{site_cityzip}")
-                            st.markdown(f"Section: {section}")
-                        else:
-                            st.markdown(f"**{owner1}**{' & ' + owner2 if owner2 else ''}")
-                            st.markdown(f"{site_address}  \n{site_cityzip}")
-                            st.markdown(f"Section: {section}")
-                        
-                        # Show property type
-                        property_use = address.get('PROPERTY_USE', '')
-                        st.markdown(f"*{property_use}*")
-                        
-                        # Show support level if available
-                        if support_level != "unknown":
-                            st.markdown(f"Support Level: <span style='color:{support_color};font-weight:bold'>{support_label}</span>", unsafe_allow_html=True)
-                        
-                        # Show donation amount if available
-                        donation = st.session_state.donations.get(address_key, 0)
-                        if donation > 0:
-                            st.markdown(f"Donation: **${donation:.2f}**")
-                    
-                    with col2:
-                        # Contact button
-                        if st.button(f"Contact {i}", key=f"contact_{address_key}"):
-                            navigate_to("contact", address)
-                    
-                    with col3:
-                        # Mark as visited/not visited
-                        if is_visited:
-                            if st.button(f"✓ Visited {i}", key=f"visited_{address_key}"):
-                                st.session_state.visited_addresses.remove(address_key)
-                                st.rerun()
-                        else:
-                            col3a, col3b = st.columns(2)
-                            with col3a:
-                                if st.button(f"Not Home {i}", key=f"nothome_{address_key}"):
-                                    st.session_state.visited_addresses.add(address_key)
-                                    st.session_state.interaction_notes[address_key] = "Not home"
-                                    st.rerun()
-                            with col3b:
-                                if st.button(f"Skip {i}", key=f"skip_{address_key}"):
-                                    st.session_state.visited_addresses.add(address_key)
-                                    st.session_state.interaction_notes[address_key] = "Skipped"
-                                    st.rerun()
-                    
-                    st.markdown("---")
+                # Display only this page's addresses
+                if st.session_state.user_location and st.session_state.sort_by_distance:
+                    filtered_addresses = sort_by_distance(address_dataset, filtered_addresses, st.session_state.user_location)
+                elif st.session_state.sort_by_priority:
+                    filtered_addresses = sort_by_priority(address_dataset, filtered_addresses)
+                page_addresses, page_start = paginate(filtered_addresses, "addresses")
+                for i, address in enumerate(address_table.records(page_addresses), start=page_start):
+                    render_address_card(address, i)
         else:
             st.warning("No addresses found matching your criteria.")
 
@@ -1133,8 +1270,7 @@ elif st.session_state.current_page == "contact":
         
         with col2:
             # Back button
-            if st.button("Back to List"):
-                navigate_to("home")
+            st.button("Back to List", on_click=open_page, args=("home",))
         
         # Support level selection
         st.subheader("Support Level")
@@ -1188,21 +1324,19 @@ elif st.session_state.current_page == "contact":
         notes = st.text_area("Notes:", value=current_notes, height=150)
         
         # Follow-up checkbox
-        follow_up = st.checkbox("Flag for follow-up")
+        follow_up = st.checkbox("Flag for follow-up", value=address_key in st.session_state.follow_ups)
         
         # Save button
         if st.button("Save Contact Information"):
-            # Save all the information
-            st.session_state.support_levels[address_key] = support_level
-            st.session_state.donations[address_key] = donation_amount
-            st.session_state.interaction_notes[address_key] = notes
-            
-            # Mark as visited
-            st.session_state.visited_addresses.add(address_key)
-            
-            # Add follow-up tag if checked
-            if follow_up and "[Follow Up]" not in notes:
-                st.session_state.interaction_notes[address_key] += " [Follow Up]"
+            # Save all the information and mark as visited, as one logged contact
+            record_result(
+                address_key,
+                visited=True,
+                support_level=support_level,
+                donation=donation_amount,
+                notes=notes,
+                follow_up=follow_up
+            )
             
             st.success("Contact information saved!")
             
@@ -1210,8 +1344,22 @@ elif st.session_state.current_page == "contact":
             navigate_to("home")
     else:
         st.error("No address selected for contact.")
-        if st.button("Return to Home"):
-            navigate_to("home")
+        st.button("Return to Home", on_click=open_page, args=("home",))
+
+# District-wide progress in the sidebar
+with st.sidebar.expander("Campaign Progress"):
+    district_progress = get_progress()
+    st.metric("Doors Visited", f"{district_progress['visited']}/{district_progress['addresses']}")
+    st.metric("Donations", f"${district_progress['donation_total']:.2f}", f"{district_progress['donors']} donors", delta_color="off")
+    st.write(f"Flagged for follow-up: {district_progress['follow_ups']}")
+    for level, count in sorted(district_progress['support_levels'].items(), key=lambda x: -x[1]):
+        st.write(f"{get_support_level_label(level)}: {count}")
+    
+    # Per-section totals
+    for section in ["North", "South", "East", "West"]:
+        section_progress = get_progress(section=section)
+        if section_progress['addresses']:
+            st.write(f"{section}: {section_progress['visited']}/{section_progress['addresses']} visited")
 
 # Add debug information in sidebar
 with st.sidebar.expander("Debug Information"):
@@ -1239,7 +1387,7 @@ with st.sidebar.expander("Debug Information"):
     # Show sample data checkbox
     use_sample_data = st.checkbox("Use Sample Data", value=True)
     if use_sample_data and not st.session_state.data_loaded:
-        st.session_state.address_data = generate_sample_addresses()
+        st.session_state.uploaded_dataset = ("sample", build_address_dataset(process_address_data(generate_sample_addresses()), is_sample=True))
         st.session_state.data_loaded = True
         st.success("Using sample data with all addresses")
         st.rerun()
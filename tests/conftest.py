@@ -0,0 +1,10 @@
+import pytest
+
+from canvass_store import CanvassStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CanvassStore(str(tmp_path / 'canvass.db'))
+    yield store
+    store.close()
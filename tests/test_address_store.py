@@ -0,0 +1,207 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import address_store
+from address_store import (
+    COMPILED_FORMAT_VERSION, DEFAULT_PRECINCT, DEFAULT_SECTION, AddressDataset, AddressTable, ParcelMask,
+    building_group_keys, compiled_dataset_is_stale, iter_json_records, normalize_frame, prepare_frame,
+    read_compiled_dataset, write_compiled_dataset
+)
+from canvass_store import ParcelSetOverlay
+
+
+def make_table():
+    return AddressTable(prepare_frame(pd.DataFrame({
+        'PARCEL_NUMBER': ['P1', 'P2', 'P3', 'P4'],
+        'OWNER1': ['SMITH JOHN', 'DOE JANE', None, 'Smithers LLC'],
+        'STR_NUM': ['100', '102', 'x', 104],
+        'STR_NAME': ['OAK ST', 'OAK ST', 'ELM AVE', 'OAK ST'],
+        'PRECINCT': ['106', '106', '108', '108'],
+        'LAT': ['27.7', None, 27.8, 27.9]
+    })))
+
+
+def test_prepare_frame_fills_and_types_columns():
+    df = make_table().df
+    assert df['STR_NUM'].tolist() == [100, 102, 0, 104]
+    assert df['LAT'].dtype == np.float64 and np.isnan(df['LAT'][1])
+    assert np.isnan(df['LON']).all()
+    assert df['OWNER1'][2] == "" and df['SITE_ADDRESS'].tolist() == [""] * 4
+    assert isinstance(df['STR_NAME'].dtype, pd.CategoricalDtype)
+
+
+def test_values_and_records():
+    table = make_table()
+    assert len(table) == 4
+    assert table.values('PARCEL_NUMBER', [3, 0]).tolist() == ['P4', 'P1']
+    record = table.record(1)
+    assert record['PARCEL_NUMBER'] == 'P2' and record['STR_NUM'] == 102 and record['LAT'] is None
+    assert isinstance(record['STR_NUM'], int)
+    assert [record['PARCEL_NUMBER'] for record in table.records([2, 0])] == ['P3', 'P1']
+
+
+def test_equals_uses_codes_for_categoricals():
+    table = make_table()
+    assert table.equals('STR_NAME', 'OAK ST').tolist() == [True, True, False, True]
+    assert table.equals('STR_NAME', 'PINE ST').tolist() == [False] * 4
+    assert table.equals('PARCEL_NUMBER', 'P3').tolist() == [False, False, True, False]
+    assert table.equals('PRECINCT', '108', np.array([0, 3])).tolist() == [False, True]
+
+
+def test_isin():
+    table = make_table()
+    assert table.isin('PRECINCT', {'108'}).tolist() == [False, False, True, True]
+    assert table.isin('PARCEL_NUMBER', ['P1', 'P9'], [1, 0]).tolist() == [False, True]
+
+
+def test_contains_is_case_insensitive_across_columns():
+    table = make_table()
+    assert table.contains(['OWNER1'], 'smith').tolist() == [True, False, False, True]
+    assert table.contains(['OWNER1', 'STR_NAME'], 'elm').tolist() == [False, False, True, False]
+    assert table.contains(['STR_NUM'], '10', [0, 2]).tolist() == [True, False]
+    assert table.contains(['STR_NAME'], 'o.k').tolist() == [False] * 4
+
+
+def parse(text, chunk_size=7, **options):
+    data = text.encode()
+    chunks = [data[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+    return list(iter_json_records(chunks, **options))
+
+
+def test_iter_json_records_reads_an_array_across_chunks():
+    text = json.dumps([{'PARCEL_NUMBER': 'P1', 'OWNER1': 'JOSÉ'}, {'PARCEL_NUMBER': 'P2', 'nested': {'a': [1, 2]}}])
+    assert parse(text) == json.loads(text)
+    assert parse(text, chunk_size=1) == json.loads(text)
+
+
+def test_iter_json_records_accepts_damaged_exports():
+    text = 'garbage {"a": 1}\n{"a": 2},,{"a": 3} 7 {"a": 4'
+    assert parse(text) == [{'a': 1}, {'a': 2}, {'a': 3}]
+
+
+def test_iter_json_records_skips_a_malformed_record(monkeypatch):
+    monkeypatch.setattr(address_store, 'MAX_RECORD_CHARS', 32)
+    text = '[{"a": 1}, {"a": 2 "b": 3, "padding": "' + 'x' * 100 + '"}, {"a": 3}]'
+    skipped = []
+    assert parse(text, skipped=skipped) == [{'a': 1}, {'a': 3}]
+    assert len(skipped) == 1 and skipped[0].startswith('{"a": 2 "b"')
+
+    # A record cut off by the end of the export is reported too
+    skipped = []
+    assert parse('[{"a": 1}, {"a": 4', skipped=skipped) == [{'a': 1}]
+    assert skipped == ['{"a": 4']
+
+
+def test_iter_json_records_resyncs_on_the_next_record_of_the_array(monkeypatch):
+    monkeypatch.setattr(address_store, 'MAX_RECORD_CHARS', 16)
+    text = '[{"a": 1}, {"a": 2 "b": {"c": [3, {"d": 4}]}, "e": "}, {\\"x\\": 5}"},\n{"a": 6}, {"a": 7 "f": ["{"]}]'
+    skipped = []
+    assert parse(text, skipped=skipped) == [{'a': 1}, {'a': 6}]
+    assert [record[:7] for record in skipped] == ['{"a": 2', '{"a": 7']
+    assert parse(text, chunk_size=1) == [{'a': 1}, {'a': 6}]
+
+
+def test_normalize_frame_fills_derived_columns():
+    df = normalize_frame(pd.DataFrame({
+        'PROPERTY_USE': ['0300 Condo', '0300 Condo', 'Commercial Office', '0100 Single Family', 'Vacant'],
+        'STR_NUM': ['470', '470', '250', '650', ''],
+        'STR_NAME': ['3RD ST S', '3RD ST S', 'MAIN ST', 'OAK AVE', 'OAK AVE'],
+        'STR_ZIP': ['33701', '33701', '33705', '33705', '99999'],
+        'PRECINCT': ['', '', '', '121', ''],
+        'SECTION': ['', '', '', 'South', ''],
+        'LAT': [None, None, 27.8, 27.7, None],
+        'LON': [None, None, -82.6, -82.7, None]
+    }), {'108': 'East', '121': 'West'})
+    assert df['PROPERTY_USE'].tolist() == ['Residential', 'Residential', 'Business', 'Residential', 'Residential']
+    assert df['PRECINCT'].tolist() == ['121', '121', '108', '121', DEFAULT_PRECINCT]
+    assert df['BUILDING_NAME'].tolist() == ['3Rd St S 470 Condos', '3Rd St S 470 Condos', '', '', '']
+    assert df['SECTION'].tolist() == ['West', 'West', 'East', 'South', DEFAULT_SECTION]
+    assert not np.isnan(df['LAT']).any() and df['LAT'][2] == 27.8
+    assert df['LAT'][0] == df['LAT'][1]
+
+
+def test_compiled_dataset_roundtrip(tmp_path):
+    path = str(tmp_path / 'addresses.arrow')
+    source = tmp_path / 'addresses.json'
+    source.write_text('[]')
+    stat = os.stat(source)
+    metadata = {'source': str(source), 'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+    assert write_compiled_dataset(make_table().df, path, metadata) == 4
+
+    df, compiled = read_compiled_dataset(path)
+    assert compiled['format'] == COMPILED_FORMAT_VERSION and compiled['records'] == '4'
+    # Rows come back grouped by precinct, categoricals still categorical
+    assert df['PRECINCT'].astype(str).tolist() == ['106', '106', '108', '108']
+    assert df['PARCEL_NUMBER'].tolist() == ['P1', 'P2', 'P3', 'P4']
+    assert isinstance(df['STR_NAME'].dtype, pd.CategoricalDtype)
+    assert AddressTable(df).record(0)['OWNER1'] == 'SMITH JOHN'
+
+    assert not compiled_dataset_is_stale(compiled)
+    source.write_text('[{}]')
+    assert compiled_dataset_is_stale(compiled)
+
+
+def test_read_compiled_dataset_rejects_other_formats(tmp_path):
+    path = str(tmp_path / 'addresses.arrow')
+    write_compiled_dataset(make_table().df, path, {'format': 'old'})
+    with pytest.raises(ValueError, match="format"):
+        read_compiled_dataset(path)
+
+
+def make_dataset():
+    table = make_table()
+    return AddressDataset(table, {'106': np.array([0, 1]), '108': np.array([2, 3])})
+
+
+def test_dataset_positions_are_read_only():
+    dataset = make_dataset()
+    with pytest.raises(ValueError):
+        dataset.positions('106')[0] = 3
+    assert not dataset.positions('999').flags.writeable
+
+
+def test_dataset_masks_are_shared_and_read_only():
+    dataset = make_dataset()
+    mask = dataset.mask('STR_NAME', 'OAK ST')
+    assert mask.tolist() == [True, True, False, True]
+    assert dataset.mask('STR_NAME', 'OAK ST') is mask
+    assert not mask.flags.writeable
+    assert dataset.positions('108').tolist() == [2, 3] and dataset.positions('999').tolist() == []
+    assert dataset.parcel_positions(['P4', 'P9', 'P1']).tolist() == [3, 0]
+
+
+def test_building_groups_key_buildings_and_streets():
+    table = AddressTable(prepare_frame(pd.DataFrame({
+        'STR_NUM': [470, 470, 12, 14, 470],
+        'STR_NAME': ['3RD ST S', '3RD ST S', 'OAK AVE', 'OAK AVE', '3RD ST S'],
+        'BUILDING_NAME': ['Tower', 'Tower', '', '', 'Annex']
+    })))
+    assert building_group_keys(table).tolist() == ['470-3RD ST S-Tower', '470-3RD ST S-Tower', 'OAK AVE-HOMES', 'OAK AVE-HOMES', '470-3RD ST S-Annex']
+    assert building_group_keys(table, [4, 2]).tolist() == ['470-3RD ST S-Annex', 'OAK AVE-HOMES']
+
+    dataset = AddressDataset(table, {'106': np.arange(5)})
+    codes, keys = dataset.building_groups
+    assert keys[codes].tolist() == building_group_keys(table).tolist()
+    assert codes.tolist() == [0, 0, 1, 1, 2] and not codes.flags.writeable
+    assert dataset.building_groups[0] is codes
+
+
+def test_parcel_mask_follows_sets_and_overlays():
+    dataset = make_dataset()
+    mask = ParcelMask(dataset)
+    base = frozenset({'P1', 'P3'})
+    steps = [
+        base,
+        ParcelSetOverlay(base, added={'P2'}),
+        ParcelSetOverlay(base, removed={'P1'}),
+        ParcelSetOverlay(base, added={'P4', 'P9'}, removed={'P3'}),
+        {'P4'},
+        frozenset()
+    ]
+    for parcels in steps:
+        expected = np.isin(dataset.table.values('PARCEL_NUMBER'), list(parcels))
+        assert mask.sync(parcels).tolist() == expected.tolist()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from address_store import AddressDataset, AddressTable, prepare_frame
+from canvass_stats import CanvassStats
+
+SECTIONS = {'106': 'North', '108': 'North', '121': 'South'}
+
+
+@pytest.fixture
+def stats():
+    table = AddressTable(prepare_frame(pd.DataFrame({'PARCEL_NUMBER': ['P1', 'P2', 'P3', 'P4', 'P5']})))
+    dataset = AddressDataset(table, {'106': np.array([0, 1]), '108': np.array([2]), '121': np.array([3, 4])})
+    return CanvassStats(dataset, SECTIONS)
+
+
+def test_counters_follow_changed_results(store, stats):
+    store.update('P1', visited=True, support_level='undecided', donation=20.0)
+    store.update('P3', visited=True, support_level='undecided', follow_up=True)
+    store.update('P4', visited=True)
+    store.update('P9', visited=True)
+    stats.sync(store)
+    assert stats.stats() == {
+        'addresses': 5, 'visited': 3, 'support_levels': {'undecided': 2},
+        'donation_total': 20.0, 'donors': 1, 'follow_ups': 1
+    }
+
+    # A result replaced later moves the counters by the difference only
+    store.update('P1', support_level='strong_support')
+    store.update('P3', visited=False)
+    store.compact()
+    store.update('P4', follow_up=True)
+    stats.sync(store)
+    north = stats.stats(section='North')
+    assert (north['addresses'], north['visited'], north['support_levels'], north['donation_total'], north['donors']) == (
+        3, 1, {'strong_support': 1, 'undecided': 1}, 20.0, 1
+    )
+    assert stats.stats('121')['follow_ups'] == 1
+    assert stats.stats('108')['visited'] == 0
+
+
+def test_unflushed_updates_are_counted_without_being_kept(store, stats):
+    store.update('P2', visited=True)
+    stats.sync(store)
+    unflushed = [('P2', {'visited': False}), ('P5', {'visited': True, 'support_level': 'lean_against'})]
+    assert stats.stats(unflushed=unflushed)['visited'] == 1
+    assert stats.stats('121', unflushed=unflushed)['support_levels'] == {'lean_against': 1}
+    assert stats.stats()['visited'] == 1 and stats.stats('106')['visited'] == 1
+    assert stats.stats('121')['support_levels'] == {}
@@ -0,0 +1,257 @@
+import sqlite3
+
+import pytest
+
+from canvass_store import CanvassResults, CanvassStore, WriteBehindQueue
+
+
+# Plain-value view of a snapshot, for comparisons
+def contents(results):
+    return (
+        set(results.visited), dict(results.support_levels), dict(results.donations),
+        dict(results.notes), set(results.follow_ups)
+    )
+
+
+def test_update_keeps_fields_it_does_not_name(store):
+    store.update('P1', volunteer='ann', visited=True, support_level='undecided')
+    store.update('P1', volunteer='ann', donation=25.0, notes='Call back')
+    store.update('P2', visited=True, follow_up=True)
+    store.update('P2', visited=False)
+    assert contents(store.snapshot()) == (
+        {'P1'}, {'P1': 'undecided'}, {'P1': 25.0}, {'P1': 'Call back'}, {'P2'}
+    )
+
+
+def test_snapshot_is_reused_until_a_commit(store, tmp_path):
+    store.update('P1', visited=True)
+    snapshot = store.snapshot()
+    assert store.snapshot() is snapshot
+
+    # A commit from another connection (another app process) is picked up too
+    other = CanvassStore(str(tmp_path / 'canvass.db'))
+    other.update('P2', visited=True)
+    other.close()
+    assert store.snapshot() is not snapshot
+    assert store.snapshot().visited == {'P1', 'P2'}
+
+
+def test_snapshot_is_read_only(store):
+    store.update('P1', visited=True, support_level='lean_support')
+    snapshot = store.snapshot()
+    assert isinstance(snapshot.visited, frozenset)
+    with pytest.raises(TypeError):
+        snapshot.support_levels['P2'] = 'undecided'
+
+
+def test_with_updates_leaves_the_original_alone():
+    results = CanvassResults({'P1'}, {'P1': 'undecided'})
+    updated = results.with_updates([('P1', {'visited': False}), ('P2', {'support_level': 'strong_support'})])
+    assert contents(updated)[:2] == (set(), {'P1': 'undecided', 'P2': 'strong_support'})
+    assert contents(results)[:2] == ({'P1'}, {'P1': 'undecided'})
+
+
+@pytest.fixture
+def queue(store):
+    # A long interval keeps the background thread out of the way; tests flush by hand
+    queue = WriteBehindQueue(store, flush_interval=60, max_pending=1000)
+    yield queue
+    queue.flush()
+
+
+def test_queue_coalesces_taps_into_one_write(store, queue, monkeypatch):
+    writes = []
+    update_many = store.update_many
+
+    def record(updates, volunteer=""):
+        writes.append((list(updates), volunteer))
+        return update_many(updates, volunteer=volunteer)
+    monkeypatch.setattr(store, 'update_many', record)
+    queue.put('P1', volunteer='ann', visited=True)
+    queue.put('P1', volunteer='ann', support_level='undecided')
+    queue.put('P1', volunteer='ann', support_level='lean_support')
+    assert store.snapshot().visited == frozenset()
+
+    queue.flush()
+    assert writes == [([('P1', {'visited': True, 'support_level': 'lean_support'})], 'ann')]
+    assert store.snapshot().support_levels['P1'] == 'lean_support'
+
+
+def test_queue_credits_each_volunteer_with_their_own_taps(store, queue):
+    queue.put('P1', volunteer='ann', visited=True, notes='Dog')
+    queue.put('P1', volunteer='bob', support_level='undecided', notes='Gate')
+    queue.put('P1', volunteer='ann', donation=10.0)
+    expected = ({'P1'}, {'P1': 'undecided'}, {'P1': 10.0}, {'P1': 'Gate'}, set())
+    assert contents(queue.snapshot()) == expected
+
+    queue.flush()
+    assert contents(store.snapshot()) == expected
+    events = {event['volunteer']: event for event in store.events()}
+    assert (events['ann']['visited'], events['ann']['donation'], events['ann']['notes']) == (1, 10.0, None)
+    assert (events['bob']['support_level'], events['bob']['notes']) == ('undecided', 'Gate')
+
+
+def test_unflushed_lists_queued_taps(queue):
+    queue.put('P1', volunteer='ann', visited=True)
+    queue.put('P1', volunteer='ann', support_level='undecided')
+    assert queue.unflushed() == [('P1', {'visited': True, 'support_level': 'undecided'})]
+    queue.flush()
+    assert queue.unflushed() == []
+
+
+def test_queue_snapshot_overlays_unflushed_taps(store, queue):
+    store.update_many([('P1', {'visited': True, 'follow_up': True, 'notes': 'Dog'}), ('P2', {'visited': True})])
+    queue.put('P1', visited=False, support_level='undecided')
+    queue.put('P3', visited=True, follow_up=True)
+    snapshot = queue.snapshot()
+    assert contents(snapshot) == ({'P2', 'P3'}, {'P1': 'undecided'}, {}, {'P1': 'Dog'}, {'P1', 'P3'})
+    assert len(snapshot.visited) == 2 and 'P1' not in snapshot.visited
+    assert queue.snapshot() is snapshot
+
+    queue.flush()
+    assert contents(queue.snapshot()) == contents(snapshot)
+    assert queue.snapshot() is store.snapshot()
+
+
+def test_queue_snapshot_reads_the_store_outside_its_lock(store, queue, monkeypatch):
+    queue.put('P1', visited=True)
+    snapshot = store.snapshot
+
+    # A flush that commits while the stored results are being read
+    def flush_then_read():
+        assert not queue._lock.locked()
+        queue.flush()
+        return snapshot()
+    monkeypatch.setattr(store, 'snapshot', flush_then_read)
+    assert queue.snapshot().visited == {'P1'}
+
+
+def test_overlay_matches_with_updates():
+    results = CanvassResults({'P1', 'P2'}, {'P1': 'undecided'}, {'P2': 10.0}, {}, {'P2'})
+    updates = [
+        ('P1', {'visited': False}), ('P3', {'visited': True, 'donation': 5.0}),
+        ('P3', {'visited': False}), ('P2', {'follow_up': False, 'support_level': 'strong_against'}),
+        ('P4', {'follow_up': True, 'notes': 'Gate code 12'})
+    ]
+    overlay = results.overlay(updates)
+    assert contents(overlay) == contents(results.with_updates(updates))
+    assert overlay.visited.base is results.visited
+    assert overlay.visited - {'P2'} == frozenset()
+
+
+def test_failed_flush_keeps_the_batch(store, queue, monkeypatch):
+    queue.put('P1', visited=True)
+
+    def fail(updates, volunteer=""):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(store, 'update_many', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        queue.flush()
+    queue.put('P1', support_level='undecided')
+
+    monkeypatch.undo()
+    queue.flush()
+    assert contents(store.snapshot())[:2] == ({'P1'}, {'P1': 'undecided'})
+
+
+def test_failed_flush_keeps_only_the_batches_not_written(store, queue, monkeypatch):
+    queue.put('P1', volunteer='ann', visited=True)
+    queue.put('P2', volunteer='bob', visited=True)
+    update_many = store.update_many
+
+    def fail_for_bob(updates, volunteer=""):
+        if volunteer == 'bob':
+            raise sqlite3.OperationalError("database is locked")
+        return update_many(updates, volunteer=volunteer)
+    monkeypatch.setattr(store, 'update_many', fail_for_bob)
+    with pytest.raises(sqlite3.OperationalError):
+        queue.flush()
+    assert queue.unflushed() == [('P2', {'visited': True})]
+
+    monkeypatch.undo()
+    queue.flush()
+    assert [(event['parcel_number'], event['volunteer']) for event in store.events()] == [('P1', 'ann'), ('P2', 'bob')]
+
+
+def log_history(store):
+    store.update_many([('P1', {'visited': True}), ('P2', {'visited': True, 'support_level': 'undecided'})], volunteer='ann')
+    store.update('P1', volunteer='bob', support_level='lean_support', follow_up=True)
+    store.update('P2', volunteer='bob', visited=False, notes='Moved out')
+    store.update('P3', volunteer='ann', donation=20.0)
+
+
+def test_compaction_keeps_the_replayed_state(store):
+    log_history(store)
+    before = contents(store.snapshot())
+    assert before == contents(store.replay())
+
+    assert store.compact() == 5
+    assert store.compact() == 0
+    assert contents(store.snapshot()) == before
+
+    # Events logged after a compaction are read on top of the compacted results
+    store.update('P1', visited=False)
+    store.update('P4', visited=True)
+    assert contents(store.snapshot()) == contents(store.replay())
+    assert store.compact() == 2
+    assert contents(store.snapshot()) == contents(store.replay())
+    assert len(store.events()) == 7
+
+
+def test_replay_through_an_event(store):
+    log_history(store)
+    assert [event['volunteer'] for event in store.events('P1')] == ['ann', 'bob']
+    through = store.events()[2]['event_id']
+    assert contents(store.replay(through)) == ({'P1', 'P2'}, {'P1': 'lean_support', 'P2': 'undecided'}, {}, {}, {'P1'})
+
+
+def test_changes_continue_across_compaction(store):
+    log_history(store)
+    updates, last = store.changes()
+    assert len(updates) == 5 and last == store.events()[-1]['event_id']
+    assert store.changes(last) == ([], last)
+
+    store.compact()
+    store.update('P2', support_level='strong_against')
+    updates, last = store.changes(last)
+    assert updates == [('P2', {'support_level': 'strong_against'})]
+
+    # From scratch: one row per compacted parcel, then the new event
+    updates, _ = store.changes()
+    assert sorted(parcel for parcel, _ in updates[:-1]) == ['P1', 'P2', 'P3']
+    assert updates[-1] == ('P2', {'support_level': 'strong_against'})
+    assert dict(updates[:-1])['P2'] == {'visited': False, 'support_level': 'undecided', 'notes': 'Moved out', 'follow_up': False}
+
+
+def test_snapshot_reads_only_the_events_since_the_last_one(store, monkeypatch):
+    log_history(store)
+    snapshot = store.snapshot()
+    calls = []
+    changes = store.changes
+
+    def record(after=None):
+        calls.append(after)
+        return changes(after)
+    monkeypatch.setattr(store, 'changes', record)
+    store.compact()
+    assert store.snapshot() is snapshot
+    store.update('P2', visited=True, support_level='strong_support')
+    assert contents(store.snapshot()) == contents(store.replay())
+    assert calls == [store.events()[-2]['event_id']] * 2
+
+
+def test_updated_at_spans_compacted_and_new_events(store):
+    store.update_many([('P1', {'visited': True}, 100.0), ('P2', {'visited': True}, 200.0)])
+    store.compact()
+    store.update_many([('P1', {'notes': 'Late entry'}, 50.0), ('P2', {'notes': 'Newer'}, 300.0)])
+    assert store.updated_at() == {'P1': 100.0, 'P2': 300.0}
+
+
+def test_compact_if_due(store):
+    store.update('P1', visited=True)
+    assert store.compact_if_due(every=2, interval=60) == 0
+    store.update('P2', visited=True)
+    assert store.compact_if_due(every=2, interval=60) == 2
+    store.update('P3', visited=True)
+    assert store.compact_if_due(every=100, interval=0) == 1
+    assert store.compact_if_due(every=100, interval=0) == 0
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from address_store import AddressDataset, AddressTable, prepare_frame
+from door_priority import HEAP_SLACK, OUTCOME_WEIGHTS, SCORE_WEIGHTS, DoorPriority, outcome_weight, turnout_fraction
+
+PRECINCTS = [{'id': '106', 'turnout': '60.5%'}, {'id': '108', 'turnout': '40%'}]
+TARGETS = {'106': {'priority_score': 80.0, 'target_households': 50.0}, '108': {'priority_score': 20.0, 'target_households': 500.0}}
+
+
+@pytest.fixture
+def priority():
+    rng = np.random.default_rng(0)
+    count = 300
+    table = AddressTable(prepare_frame(pd.DataFrame({
+        'PARCEL_NUMBER': [f"P{i}" for i in range(count)],
+        'HX_YN': rng.choice(['YES', 'NO', ''], count),
+        'CNTY_JST_VALUE': rng.uniform(50_000, 900_000, count).round(),
+        'PROPERTY_USE': rng.choice(['Residential', 'Business'], count)
+    })))
+    dataset = AddressDataset(table, {'106': np.arange(0, 200), '108': np.arange(200, 300)})
+    return DoorPriority(dataset, PRECINCTS, TARGETS)
+
+
+# The top count rows of a precinct by a full sort, skipping rows in skip
+def brute_force(priority, precinct_id, count, skip=()):
+    positions = np.array([position for position in priority.dataset.positions(precinct_id) if position not in skip])
+    return priority.order(positions)[:count].tolist()
+
+
+def test_outcome_weights():
+    assert turnout_fraction('88.55%') == pytest.approx(0.8855) and turnout_fraction(None) == 0.0
+    assert outcome_weight((None, False)) == 0.0
+    assert outcome_weight(('undecided', True)) == OUTCOME_WEIGHTS['undecided'] + 1.0
+
+
+def test_base_scores(priority):
+    table = priority.dataset.table
+    in_106 = np.arange(300) < 200
+    expected = (
+        SCORE_WEIGHTS['turnout'] * np.where(in_106, 0.605, 0.40) +
+        SCORE_WEIGHTS['priority'] * np.where(in_106, 0.8, 0.2) +
+        SCORE_WEIGHTS['target_share'] * np.where(in_106, 50 / 200, 1.0) +
+        SCORE_WEIGHTS['homestead'] * (table.values('HX_YN').astype(str) == 'YES') +
+        SCORE_WEIGHTS['value'] * pd.Series(table.values('CNTY_JST_VALUE')).rank(pct=True).to_numpy() +
+        SCORE_WEIGHTS['residential'] * (table.values('PROPERTY_USE').astype(str) == 'Residential')
+    )
+    assert np.allclose(priority.base, expected)
+
+
+def test_top_matches_a_full_sort_as_outcomes_change(priority, store):
+    rng = np.random.default_rng(1)
+    levels = list(OUTCOME_WEIGHTS)
+    for _ in range(5):
+        parcels = rng.choice(300, 40)
+        store.update_many([
+            (f"P{parcel}", {'support_level': str(rng.choice(levels)), 'follow_up': bool(rng.random() < 0.3)})
+            for parcel in parcels
+        ])
+        priority.sync(store)
+        for precinct_id in ('106', '108'):
+            rows, scores = priority.top(precinct_id, 15)
+            assert rows.tolist() == brute_force(priority, precinct_id, 15)
+            assert scores.tolist() == priority.scores[rows].tolist()
+            assert len(priority._heaps[precinct_id]) <= HEAP_SLACK * len(priority.dataset.positions(precinct_id)) + 40
+
+
+def test_visited_doors_leave_until_undone(priority, store):
+    best = priority.top('106', 3)[0].tolist()
+    store.update_many([(f"P{best[0]}", {'visited': True}), (f"P{best[1]}", {'visited': True, 'support_level': 'undecided'})])
+    priority.sync(store)
+    assert priority.top('106', 10)[0].tolist() == brute_force(priority, '106', 10, skip=best[:2])
+
+    store.update(f"P{best[0]}", visited=False)
+    priority.sync(store)
+    assert priority.top('106', 10)[0].tolist() == brute_force(priority, '106', 10, skip=best[1:2])
+
+
+def test_exclude_skips_rows_without_dropping_them(priority):
+    best = priority.top('108', 5)[0].tolist()
+    exclude = np.zeros(300, dtype=bool)
+    exclude[best[:2]] = True
+    assert priority.top('108', 5, exclude)[0].tolist() == brute_force(priority, '108', 5, skip=best[:2])
+    assert priority.top('108', 5)[0].tolist() == best
+    assert priority.top('999', 5)[0].tolist() == []
@@ -0,0 +1,124 @@
+import pandas as pd
+import pytest
+
+from households import deduplicate_households, find_households, number_key, owner_key, street_key, unit_key
+
+COLUMNS = [
+    'PARCEL_NUMBER', 'STR_NUM', 'STR_NAME', 'STR_UNIT', 'STR_ZIP', 'PRECINCT',
+    'OWNER1', 'OWNER2', 'MAILING_ADDRESS_1', 'TOTAL_LIVING_UNITS', 'HX_YN'
+]
+
+
+def frame(*rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# Rows grouped into households, as sorted tuples of row numbers
+def groups(df):
+    households = {}
+    for row, label in enumerate(find_households(df)):
+        households.setdefault(label, []).append(row)
+    return sorted(tuple(rows) for rows in households.values())
+
+
+@pytest.mark.parametrize("key, value, expected", [
+    (owner_key, "SMITH, JOHN ETAL", "JOHN SMITH"),
+    (owner_key, "John Smith Jr. Trustee", "JOHN SMITH"),
+    (street_key, "3rd Street South", "3RD ST S"),
+    (street_key, "100 Oak Avenue N.E.", "100 OAK AVE N E"),
+    (number_key, "0315.0", "315"),
+    (number_key, "0", ""),
+    (unit_key, "# 404", "404"),
+    (unit_key, "Apt. 2-B", "2B"),
+    (unit_key, "", "")
+])
+def test_keys(key, value, expected):
+    assert key(value) == expected
+
+
+def test_same_parcel_is_one_household():
+    df = frame(
+        ('P1', '100', 'OAK ST', '', '33701', '106', 'SMITH JOHN', '', '', 1, ''),
+        ('P1', '100', 'OAK ST', '', '33701', '106', 'DOE JANE', '', '', 1, '')
+    )
+    assert groups(df) == [(0, 1)]
+
+
+def test_same_unit_and_owner_in_either_column():
+    df = frame(
+        ('P1', '470', '3RD ST S', '# 404', '33701', '121', 'SMITH, JOHN', 'DOE JANE', '', 1, ''),
+        ('P2', '470', '3rd Street South', 'UNIT 404', '33701', '121', 'JANE DOE', '', '', 1, ''),
+        ('P3', '470', '3RD ST S', '405', '33701', '121', 'JOHN SMITH', '', '', 1, ''),
+        ('P4', '470', '3RD ST S', '404', '33701', '121', 'ROE RICHARD', '', '', 1, '')
+    )
+    # Another unit with the same owner, or the same unit with another owner, stays apart
+    assert groups(df) == [(0, 1), (2,), (3,)]
+
+
+def test_same_unit_and_mailing_address():
+    df = frame(
+        ('P1', '12', 'OAK AVE', '', '33705', '108', 'SMITH JOHN', '', '200 Main Street North', 1, ''),
+        ('P2', '12', 'OAK AVENUE', '', '33705', '108', 'SMITH MARY', '', '200 MAIN ST N', 1, ''),
+        ('P3', '12', 'OAK AVE', '', '33705', '108', 'DOE JANE', '', '', 1, ''),
+        ('P4', '12', 'OAK AVE', '', '33705', '108', 'ROE RICHARD', '', '', 1, '')
+    )
+    # A blank mailing address is not shared with anyone
+    assert groups(df) == [(0, 1), (2,), (3,)]
+
+
+def test_rows_without_living_units_attach_to_an_owner_in_the_block():
+    df = frame(
+        ('P1', '470', '3RD ST S', '404', '33701', '121', 'SMITH JOHN', '', '', 1, ''),
+        ('P2', '470', '3RD ST S', 'P-17', '33701', '121', 'JOHN SMITH', '', '', 0, ''),
+        ('P3', '470', '3RD ST S', 'S-3', '33701', '121', 'DOE JANE', 'SMITH JOHN', '', 0, ''),
+        ('P4', '470', '3RD ST S', 'P-18', '33701', '121', 'ROE RICHARD', '', '', 0, ''),
+        ('P5', '470', '3RD ST S', '405', '33701', '121', 'ROE RICHARD', '', '', '', '')
+    )
+    # Unknown living units count as living, so P4 joins P5
+    assert groups(df) == [(0, 1, 2), (3, 4)]
+
+
+def test_blocks_keep_streets_zips_and_precincts_apart():
+    df = frame(
+        ('P1', '100', 'OAK ST', '', '33701', '106', 'SMITH JOHN', '', 'PO BOX 1', 1, ''),
+        ('P2', '102', 'OAK ST', '', '33701', '106', 'SMITH JOHN', '', 'PO BOX 1', 1, ''),
+        ('P3', '100', 'ELM ST', '', '33701', '106', 'SMITH JOHN', '', 'PO BOX 1', 1, ''),
+        ('P4', '100', 'OAK ST', '', '33705', '106', 'SMITH JOHN', '', 'PO BOX 1', 1, ''),
+        ('P5', '100', 'OAK ST', '', '33701', '108', 'SMITH JOHN', '', 'PO BOX 1', 1, ''),
+        ('P6', '0100', 'OAK ST', '', '33701-1234', '106', 'SMITH JOHN', '', '', 1, '')
+    )
+    assert groups(df) == [(0, 5), (1,), (2,), (3,), (4,)]
+
+
+def test_links_are_transitive():
+    df = frame(
+        ('P1', '12', 'OAK AVE', '', '33705', '108', 'SMITH JOHN', '', 'PO BOX 10', 1, ''),
+        ('P2', '12', 'OAK AVE', '', '33705', '108', 'DOE JANE', '', 'PO BOX 10', 1, ''),
+        ('P3', '12', 'OAK AVE', '', '33705', '108', 'JANE DOE', '', '', 1, ''),
+        ('P3', '14', 'OAK AVE', '', '33705', '108', '', '', '', 1, '')
+    )
+    assert groups(df) == [(0, 1, 2, 3)]
+
+
+def test_deduplicate_keeps_the_homestead_row_and_lists_folded_parcels():
+    df = frame(
+        ('P1', '470', '3RD ST S', '404', '33701', '121', 'SMITH JOHN', '', '', 0, ''),
+        ('P2', '470', '3RD ST S', '404', '33701', '121', 'SMITH JOHN', '', '', 1, ''),
+        ('P3', '470', '3RD ST S', '404', '33701', '121', 'SMITH JOHN', '', '', 1, 'YES'),
+        ('P3', '470', '3RD ST S', '404', '33701', '121', 'SMITH JOHN', '', '', 1, ''),
+        ('P4', '12', 'OAK AVE', '', '33705', '108', 'DOE JANE', '', '', 0, ''),
+        ('P5', '12', 'OAK AVE', '', '33705', '108', 'DOE JANE', '', '', 1, ''),
+        ('P6', '14', 'OAK AVE', '', '33705', '108', 'ROE RICHARD', '', '', 1, '')
+    )
+    result, removed = deduplicate_households(df)
+    assert removed == 4
+    assert result['PARCEL_NUMBER'].tolist() == ['P3', 'P5', 'P6']
+    assert result['HX_YN'].tolist() == ['YES', '', '']
+    assert [sorted(filter(None, parcels.split(';'))) for parcels in result['HOUSEHOLD_PARCELS']] == [['P1', 'P2'], ['P4'], []]
+
+
+def test_deduplicate_without_duplicates():
+    df = frame(('P1', '100', 'OAK ST', '', '33701', '106', 'SMITH JOHN', '', '', 1, ''))
+    result, removed = deduplicate_households(df)
+    assert removed == 0 and result['HOUSEHOLD_PARCELS'].tolist() == ['']
+    assert find_households(pd.DataFrame({'PARCEL_NUMBER': ['P1', 'P1']})).tolist() == [0, 1]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from map_layers import DEFAULT_ZOOM, DOOR_ZOOM, PointPyramid, fit_zoom
+
+PALETTE = [[0, 100, 0], [255, 0, 0]]
+
+
+def make_pyramid():
+    rng = np.random.default_rng(0)
+    lats = 27.77 + rng.uniform(-0.02, 0.02, 5000)
+    lons = -82.64 + rng.uniform(-0.02, 0.02, 5000)
+    lats[0] = np.nan
+    return PointPyramid(lats, lons)
+
+
+def test_clusters_count_every_located_row_once():
+    pyramid = make_pyramid()
+    positions = np.arange(5000)
+    statuses = (positions % 3 == 0).astype(int)
+    previous = 0
+    for zoom in (10, 13, 16, DOOR_ZOOM):
+        clusters = pyramid.cluster(positions, statuses, PALETTE, zoom)
+        assert clusters['count'].sum() == 4999
+        assert (clusters['lat'].between(27.75, 27.79)).all() and (clusters['lon'].between(-82.66, -82.62)).all()
+        # Deeper zooms split clusters, never merge them
+        assert len(clusters) >= previous
+        previous = len(clusters)
+
+
+def test_cluster_color_is_the_most_common_status():
+    pyramid = PointPyramid([27.77, 27.77001, 27.77002, 28.5], [-82.64, -82.64, -82.64, -82.64])
+    clusters = pyramid.cluster([0, 1, 2, 3], [1, 1, 0, 0], PALETTE, 12).sort_values('lat')
+    assert clusters['count'].tolist() == [3, 1]
+    assert clusters['color'].tolist() == [[255, 0, 0], [0, 100, 0]]
+    assert pyramid.cluster(np.array([], dtype=np.int64), [], PALETTE, 12).empty
+
+
+def test_auto_zoom_is_the_finest_within_the_point_budget():
+    pyramid = make_pyramid()
+    positions = np.arange(5000)
+    assert pyramid.auto_zoom(positions[:100]) == DOOR_ZOOM
+    zoom = pyramid.auto_zoom(positions, max_points=300)
+    assert len(pyramid.cluster(positions, np.zeros(5000, dtype=int), PALETTE, zoom)) <= 300
+    assert len(pyramid.cluster(positions, np.zeros(5000, dtype=int), PALETTE, zoom + 1)) > 300
+
+
+def test_fit_zoom():
+    assert fit_zoom([], []) == DEFAULT_ZOOM
+    assert fit_zoom([27.77], [-82.64]) == DEFAULT_ZOOM
+    assert fit_zoom([27.0, 28.0], [-82.0, -82.0]) == 8
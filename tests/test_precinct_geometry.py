@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from precinct_geometry import (
+    GEOJSON_PATH, SHAPEFILE_PATH, PrecinctIndex, PrecinctOutlines, normalize_precinct_id,
+    points_in_polygon, read_geojson, read_shapefile, simplify_ring
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Two unit squares side by side; "B" has a square hole in its middle
+SHAPES = [
+    ("A", [[(0, 0), (1, 0), (1, 1), (0, 1)]]),
+    ("B", [[(1, 0), (2, 0), (2, 1), (1, 1), (1, 0)], [(1.4, 0.4), (1.6, 0.4), (1.6, 0.6), (1.4, 0.6), (1.4, 0.4)]])
+]
+
+
+@pytest.mark.parametrize("value, expected", [("106", "106"), ("106.0", "106"), (" 106 ", "106"), (106.0, "106"), (None, "")])
+def test_normalize_precinct_id(value, expected):
+    assert normalize_precinct_id(value) == expected
+
+
+def test_points_in_polygon_square():
+    x1, y1 = np.array([0.0, 1.0, 1.0, 0.0]), np.array([0.0, 0.0, 1.0, 1.0])
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    inside = points_in_polygon(np.array([0.5, 1.5, -0.1, 0.99]), np.array([0.5, 0.5, 0.5, 0.01]), x1, y1, x2, y2)
+    assert inside.tolist() == [True, False, False, True]
+
+
+def test_assign_uses_rings_and_holes():
+    index = PrecinctIndex(SHAPES, cell_size=0.25)
+    lons = [0.5, 1.2, 1.5, 3.0, np.nan]
+    lats = [0.5, 0.5, 0.5, 0.5, 0.5]
+    assert index.assign(lons, lats).tolist() == ["A", "B", "", "", ""]
+    assert index.locate(0.25, 0.75) == "A"
+
+
+def test_assign_matches_a_point_by_point_check():
+    index = PrecinctIndex(SHAPES, cell_size=0.1)
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(-0.5, 2.5, 500)
+    lats = rng.uniform(-0.5, 1.5, 500)
+    expected = [index.assign([lon], [lat])[0] for lon, lat in zip(lons, lats)]
+    assert index.assign(lons, lats).tolist() == expected
+
+
+def test_empty_index_assigns_nothing():
+    assert PrecinctIndex([]).assign([0.5], [0.5]).tolist() == [""]
+
+
+def test_bundled_shapefile_and_geojson_agree():
+    shapefile = PrecinctIndex(read_shapefile(os.path.join(REPO_DIR, SHAPEFILE_PATH)))
+    geojson = PrecinctIndex(read_geojson(os.path.join(REPO_DIR, GEOJSON_PATH)))
+    min_x, min_y = shapefile.bboxes[:, :2].min(axis=0)
+    max_x, max_y = shapefile.bboxes[:, 2:].max(axis=0)
+    rng = np.random.default_rng(1)
+    lons = rng.uniform(min_x, max_x, 1000)
+    lats = rng.uniform(min_y, max_y, 1000)
+    from_shapefile = shapefile.assign(lons, lats)
+    located = from_shapefile != ""
+    assert located.sum() > 100
+    assert (geojson.assign(lons, lats)[located] == from_shapefile[located]).all()
+
+
+def test_simplify_ring_drops_only_points_within_tolerance():
+    ring = np.array([(0, 0), (1, 0.01), (2, 0), (2, 2), (1, 2.5), (0, 2), (0, 0)], dtype=float)
+    simplified = simplify_ring(ring, 0.1)
+    assert simplified.tolist() == [[0, 0], [2, 0], [2, 2], [1, 2.5], [0, 2], [0, 0]]
+    assert len(simplify_ring(ring, 10.0)) < len(simplified)
+    assert simplify_ring(ring, 0.0).tolist() == ring.tolist()
+
+
+def test_outlines_keep_requested_precincts_and_simplify_per_zoom():
+    shapes = read_shapefile(os.path.join(REPO_DIR, SHAPEFILE_PATH))
+    wanted = [shapes[0][0], shapes[1][0] + ".0"]
+    outlines = PrecinctOutlines(shapes, wanted)
+    assert {precinct_id for precinct_id, _ in outlines.rings} == {shapes[0][0], shapes[1][0]}
+
+    coarse = outlines.at_zoom(10)
+    fine = outlines.at_zoom(16)
+    assert outlines.at_zoom(10) is coarse
+    assert sum(len(ring) for _, ring in coarse) < sum(len(ring) for _, ring in fine)
+    # Simplification keeps each ring's endpoints
+    for (_, ring), (_, original) in zip(coarse, outlines.rings):
+        assert ring[0].tolist() == original[0].tolist()
+        assert ring[-1].tolist() == original[-1].tolist()
@@ -0,0 +1,121 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from remote_fetch import HttpCache, RemoteFetcher
+
+BODY = b'[{"PARCEL_NUMBER": "1"}]'
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so a pooled session can send several requests over one connection
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address, dict(self.headers)))
+        if self.path.startswith("/slow"):
+            time.sleep(server.delay)
+        if self.path.endswith("/missing.json"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    httpd.delay = 1.0
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return RemoteFetcher(cache=HttpCache(str(tmp_path / "cache")), timeout=(1.0, 0.3))
+
+
+def test_fetch_downloads_into_cache(server, fetcher):
+    path, status = fetcher.fetch(server.base_url + "/addresses.json")
+    assert status == 200
+    with open(path, "rb") as f:
+        assert f.read() == BODY
+
+
+def test_session_reuses_one_connection(server, fetcher):
+    for _ in range(3):
+        fetcher.fetch(server.base_url + "/addresses.json")
+    assert len(server.requests) == 3
+    assert len({client for _, client, _ in server.requests}) == 1
+
+
+def test_revalidation_uses_etag_and_304(server, fetcher):
+    url = server.base_url + "/addresses.json"
+    first_path, _ = fetcher.fetch(url)
+    path, status = fetcher.fetch(url)
+    assert status == 304
+    assert path == first_path
+    assert server.requests[-1][2].get("If-None-Match") == ETAG
+
+
+def test_missing_file_is_unavailable(server, fetcher):
+    assert fetcher.fetch(server.base_url + "/missing.json") is None
+
+
+def test_timeout_falls_back_to_cached_copy(server, fetcher):
+    url = server.base_url + "/slow/addresses.json"
+    server.delay = 0
+    cached_path, _ = fetcher.fetch(url)
+    # Longer than every retry of the read timeout together
+    server.delay = 5.0
+    start = time.monotonic()
+    assert fetcher.fetch(url) == (cached_path, None)
+    assert time.monotonic() - start < server.delay
+
+
+def test_unreachable_server_falls_back_to_cached_copy(server, fetcher):
+    url = server.base_url + "/addresses.json"
+    cached_path, _ = fetcher.fetch(url)
+    server.shutdown()
+    server.server_close()
+    fetcher.session.close()
+    assert fetcher.fetch(url) == (cached_path, None)
+    assert fetcher.fetch(server.base_url + "/never_fetched.json") is None
+
+
+def test_fetch_first_prefers_earliest_available(server, fetcher):
+    urls = [server.base_url + "/missing.json", server.base_url + "/fixed_addresses.json", server.base_url + "/addresses.json"]
+    url, path, status = fetcher.fetch_first(urls)
+    assert url == urls[1]
+    assert status == 200
+
+
+def test_fetch_first_skips_candidates_past_the_deadline(server, fetcher):
+    urls = [server.base_url + "/slow/addresses.json", server.base_url + "/addresses.json"]
+    start = time.monotonic()
+    url, _, status = fetcher.fetch_first(urls, deadline=0.2)
+    assert url == urls[1]
+    assert status == 200
+    assert time.monotonic() - start < server.delay
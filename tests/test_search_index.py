@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from address_store import AddressTable, prepare_frame
+from search_index import SHORT_PREFIX_TOP, SuggestionIndex
+
+
+def make_index(rows, groups):
+    table = AddressTable(prepare_frame(pd.DataFrame(rows, columns=['OWNER1', 'SITE_ADDRESS'])))
+    return SuggestionIndex(table, {group: np.array(positions) for group, positions in groups.items()})
+
+
+def test_suggestions_rank_exact_then_prefix_then_word_then_substring():
+    index = make_index([
+        ('OAKLEY ANN', '10 ELM ST'),
+        ('OAK', '12 OAK ST'),
+        ('SMITH OAKES', '14 ELM ST'),
+        ('SOAKER LLC', '16 ELM ST'),
+        ('OAKLEY ANN', '18 ELM ST')
+    ], {'106': [0, 1, 2, 3, 4]})
+    assert index.suggest('oak') == ['OAK', 'OAKLEY ANN', '12 OAK ST', 'SMITH OAKES', 'SOAKER LLC']
+    assert index.suggest('oak', limit=2) == ['OAK', 'OAKLEY ANN']
+    assert index.suggest(' Elm ') == ['10 ELM ST', '14 ELM ST', '16 ELM ST', '18 ELM ST']
+    assert index.suggest('o') == [] and index.suggest('zzz') == []
+
+
+def test_suggestions_are_limited_to_a_group():
+    index = make_index([('SMITH JOHN', '1 OAK ST'), ('SMITHSON AMY', '2 OAK ST')], {'106': [0], '108': [1]})
+    assert index.suggest('smith', '106') == ['SMITH JOHN']
+    assert index.suggest('smith', '108') == ['SMITHSON AMY']
+    assert index.suggest('smith') == ['SMITH JOHN', 'SMITHSON AMY']
+    assert index.suggest('smith', '999') == []
+
+
+def test_short_prefixes_match_the_uncached_ranking():
+    rng = np.random.default_rng(0)
+    words = ['OAK', 'OAKS', 'OLIVE', 'OWENS', 'ORTIZ', 'ONEAL', 'OSBORN', 'OPAL']
+    owners = [f"{rng.choice(words)} {rng.choice(words)}{rng.integers(10)}" for _ in range(400)]
+    index = make_index([(owner, '') for owner in owners], {'106': np.arange(200), '108': np.arange(200, 400)})
+    for query in ('oa', 'oak', 'os', 'op'):
+        for group in (None, '106', '108'):
+            for limit in (5, SHORT_PREFIX_TOP + 5):
+                expected = index.suggest(query, group, limit)
+                saved, index.short_prefixes = index.short_prefixes, {}
+                assert index.suggest(query, group, limit) == expected
+                index.short_prefixes = saved
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from spatial_index import GridIndex
+from walk_routes import to_meters
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    lats = 27.77 + rng.uniform(-0.01, 0.01, 2000)
+    lons = -82.64 + rng.uniform(-0.01, 0.01, 2000)
+    # Rows without coordinates are never returned
+    lats[:20] = np.nan
+    lons[20:40] = 0
+    return lats, lons
+
+
+# Distances in meters from (lat, lon) to every row, as GridIndex measures them
+def brute_force(index, lats, lons, lat, lon):
+    center = to_meters(np.array([lat]), np.array([lon]), index.origin_lat)[0]
+    distances = np.hypot(*(to_meters(lats, lons, index.origin_lat) - center).T)
+    distances[:40] = np.inf
+    return distances
+
+
+def test_within_matches_brute_force(points):
+    lats, lons = points
+    index = GridIndex(lats, lons)
+    assert len(index) == 1960
+    for lat, lon, radius in [(27.77, -82.64, 150), (27.765, -82.645, 400), (27.76, -82.63, 50), (27.9, -82.64, 300)]:
+        positions, distances = index.within(lat, lon, radius)
+        expected = brute_force(index, lats, lons, lat, lon)
+        assert sorted(positions.tolist()) == np.flatnonzero(expected <= radius).tolist()
+        assert np.allclose(distances, expected[positions]) and (np.diff(distances) >= 0).all()
+
+
+def test_nearest_matches_brute_force(points):
+    lats, lons = points
+    index = GridIndex(lats, lons)
+    exclude = np.zeros(len(lats), dtype=bool)
+    exclude[::3] = True
+    for lat, lon in [(27.77, -82.64), (27.761, -82.649), (27.80, -82.60)]:
+        expected = brute_force(index, lats, lons, lat, lon)
+        positions, distances = index.nearest(lat, lon, 25)
+        assert positions.tolist() == np.argsort(expected, kind='stable')[:25].tolist()
+
+        expected[exclude] = np.inf
+        positions, _ = index.nearest(lat, lon, 25, exclude=exclude)
+        assert positions.tolist() == np.argsort(expected, kind='stable')[:25].tolist()
+
+        positions, distances = index.nearest(lat, lon, 1000, radius=200, exclude=exclude)
+        assert sorted(positions.tolist()) == np.flatnonzero(expected <= 200).tolist()
+
+
+def test_empty_index():
+    index = GridIndex([np.nan], [np.nan])
+    assert len(index) == 0
+    assert index.within(27.77, -82.64, 1000)[0].tolist() == []
+    assert index.nearest(27.77, -82.64, 5)[0].tolist() == []
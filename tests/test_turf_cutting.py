@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from address_store import AddressDataset, AddressTable, prepare_frame
+from turf_cutting import TurfCutter, hilbert_distance
+
+
+def test_hilbert_curve_visits_each_cell_once_by_neighbor_steps():
+    x, y = np.meshgrid(np.arange(8), np.arange(8))
+    d = hilbert_distance(x.ravel(), y.ravel(), order=3)
+    assert sorted(d.tolist()) == list(range(64))
+    order = np.argsort(d)
+    steps = np.abs(np.diff(x.ravel()[order])) + np.abs(np.diff(y.ravel()[order]))
+    assert (steps == 1).all()
+
+
+# A 20 x 20 grid of houses plus a 40-unit building in one corner
+def grid_dataset():
+    rng = np.random.default_rng(0)
+    rows = [(f"P{i}", 100 + i, 'OAK ST', "", 27.0 + (i // 20) * 0.0002, -82.0 + (i % 20) * 0.0002) for i in range(400)]
+    rows += [(f"T{i}", 1, 'BAY DR', "Tower", 27.0, -82.0) for i in range(40)]
+    rows = [rows[i] for i in rng.permutation(len(rows))]
+    table = AddressTable(prepare_frame(pd.DataFrame(rows, columns=['PARCEL_NUMBER', 'STR_NUM', 'STR_NAME', 'BUILDING_NAME', 'LAT', 'LON'])))
+    return AddressDataset(table, {'106': np.arange(len(rows))})
+
+
+def make_cutter(dataset):
+    return TurfCutter(dataset.table, dataset.positions('106'), dataset.building_groups[0][dataset.positions('106')])
+
+
+def test_packets_are_balanced_and_keep_buildings_together():
+    dataset = grid_dataset()
+    packets = make_cutter(dataset).cut(4)
+    assert len(packets) == 4
+    assert sorted(np.concatenate(packets).tolist()) == list(range(440))
+    assert max(map(len, packets)) - min(map(len, packets)) <= 40
+
+    tower = dataset.table.equals('BUILDING_NAME', 'Tower')
+    assert sum(tower[packet].any() for packet in packets) == 1
+
+
+def test_packets_are_compact():
+    dataset = grid_dataset()
+    lats = dataset.table.values('LAT')
+    lons = dataset.table.values('LON')
+    area = np.ptp(lats) * np.ptp(lons)
+    for packet in make_cutter(dataset).cut(4):
+        # A quarter of the doors is one patch of the grid, not scattered across all of it
+        assert np.ptp(lats[packet]) * np.ptp(lons[packet]) <= area / 2
+
+
+def test_cut_skips_visited_doors():
+    dataset = grid_dataset()
+    cutter = make_cutter(dataset)
+    visited = np.zeros(440, dtype=bool)
+    visited[:300] = True
+    packets = cutter.cut(3, visited)
+    assert sorted(np.concatenate(packets).tolist()) == list(range(300, 440))
+    assert cutter.cut(3, np.ones(440, dtype=bool)) == []
+    assert TurfCutter(dataset.table, [], []).cut(3) == []
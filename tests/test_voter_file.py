@@ -0,0 +1,129 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from voter_file import column_index, door_key, iter_voters, join_voters, sheet_row_values, unitless_key
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Notes" sheetId="1" r:id="rId1"/><sheet name="Voters" sheetId="2" r:id="rId2"/></sheets>
+</workbook>"""
+
+RELATIONSHIPS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="worksheet" Target="/xl/worksheets/sheet2.xml"/>
+</Relationships>"""
+
+SHARED_STRINGS = """<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<si><t>Residence Address Line 1</t></si><si><t>Residence Zipcode</t></si>
+<si><t>First Name</t></si><si><r><t>Last </t></r><r><t>Name</t></r></si>
+<si><t>470 3RD ST S # 404</t></si><si><t>DOE</t></si>
+</sst>"""
+
+NOTES_SHEET = """<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>
+<row r="1"><c r="A1" t="inlineStr"><is><t>Exported for District 6</t></is></c></row>
+</sheetData></worksheet>"""
+
+# Header on the second row; attributes in either order, a formula, an empty row and an escaped name
+VOTER_SHEET = """<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>
+<row r="1"><c r="A1" t="inlineStr"><is><t>Voter roll</t></is></c></row>
+<row r="2"><c r="A2" t="s"><v>0</v></c><c t="s" r="C2"><v>1</v></c><c s="1" r="D2" t="s"><v>2</v></c><c r="E2" t="s"><v>3</v></c></row>
+<row r="3"><c r="A3" t="s"><v>4</v></c><c r="C3"><f>33700+1</f><v>33701</v></c><c r="D3" t="inlineStr"><is><t>JANE</t></is></c><c r="E3" t="s"><v>5</v></c></row>
+<row r="4"/>
+<row r="5"><c t="inlineStr" r="A5"><is><t>12 Oak Avenue</t></is></c><c r="C5"><v>33705</v></c><c r="E5" t="inlineStr"><is><t>O&apos;NEIL &amp; SON</t></is></c></row>
+<row r="6"><c r="D6" t="inlineStr"><is><t>NO ADDRESS</t></is></c></row>
+</sheetData></worksheet>"""
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'voters.xlsx'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('xl/workbook.xml', WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', RELATIONSHIPS)
+        archive.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+        archive.writestr('xl/worksheets/sheet1.xml', NOTES_SHEET)
+        archive.writestr('xl/worksheets/sheet2.xml', VOTER_SHEET)
+    return str(path)
+
+
+def test_iter_voters_reads_the_voter_sheet(workbook):
+    assert list(iter_voters(workbook)) == [
+        ('470 3RD ST S # 404', '', '33701', 'Jane Doe'),
+        ('12 Oak Avenue', '', '33705', "O'Neil & Son")
+    ]
+
+
+def test_iter_voters_needs_an_address_column(tmp_path):
+    path = tmp_path / 'notes.xlsx'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('xl/workbook.xml', WORKBOOK.replace('<sheet name="Voters" sheetId="2" r:id="rId2"/>', ''))
+        archive.writestr('xl/_rels/workbook.xml.rels', RELATIONSHIPS)
+        archive.writestr('xl/worksheets/sheet1.xml', NOTES_SHEET)
+    with pytest.raises(ValueError, match="address column"):
+        list(iter_voters(str(path)))
+
+
+@pytest.mark.parametrize("row", [
+    '<c r="B1" t="s"><v>1</v></c><c r="D1"><v>7</v></c>',
+    '<c t="s" r="B1"><v>1</v></c><c r="D1"><v>7</v></c>',
+    '<c s="3" t="s" r="B1" x="1"><v>1</v></c><c r = "D1" ><v>7</v></c>',
+    "<c t='s' r='B1'><v>1</v></c><c r='D1' s='2'><v>7</v></c>"
+])
+def test_sheet_cells_in_any_attribute_order(row):
+    assert sheet_row_values(row, ['zero', 'one'], {}) == ['', 'one', '', '7']
+
+
+def test_shared_formula_cells_keep_their_own_values():
+    row = (
+        '<c r="A2"><f t="shared" si="0"/><v>1</v></c>'
+        '<c r="B2"><f t="shared" ref="B2:B9" si="1">SUM(A1)</f><v>2</v></c><c r="C2"><f>A2+B2</f><v>3</v></c>'
+    )
+    assert sheet_row_values(row, [], {}) == ['1', '2', '3']
+
+
+def test_cells_without_a_reference_follow_the_cell_before():
+    row = '<c t="s"><v>0</v></c><c><v>7</v></c><c r="D1"><v>9</v></c><c><v>10</v></c>'
+    assert sheet_row_values(row, ['zero'], {}) == ['zero', '7', '', '9', '10']
+    assert sheet_row_values(row, ['zero'], {}, keep={1, 2, 4}) == ['', '7', '', '', '10']
+
+
+def test_column_index():
+    assert [column_index(reference) for reference in ('A1', 'Z9', 'AA10', 'AB')] == [0, 25, 26, 27]
+
+
+def test_door_key_normalizes_address_unit_and_zip():
+    assert door_key('470 3rd Street South # 404', '', '33701-1234') == '470 3RD ST S|404|33701'
+    assert door_key('470 3RD ST S', 'Unit 404', '33701') == '470 3RD ST S|404|33701'
+    # A unit given on its own wins over one on the address line
+    assert door_key('470 3RD ST S APT 12', '404', '33701') == '470 3RD ST S|404|33701'
+
+
+def test_join_voters_falls_back_to_the_address_without_a_unit():
+    doors = pd.DataFrame({
+        'PARCEL_NUMBER': ['P1', 'P2', 'P3', 'P4', 'P5'],
+        'SITE_ADDRESS': ['470 3RD ST S', '470 3RD ST S', '12 OAK AVE', '14 OAK AVE', '14 OAK AVE'],
+        'STR_UNIT': ['404', '405', '', '', ''],
+        'STR_ZIP': ['33701', '33701', '33705', '33705', '33705']
+    })
+    voters = [
+        ('470 3rd St S #404', '', '33701', 'Jane Doe'),
+        ('470 3RD ST S', '', '33701', 'No Unit'),
+        ('12 Oak Avenue', '', '33705', 'John Roe'),
+        ('12 OAK AVE', 'Apt 1', '33705', 'Unit Voter'),
+        ('14 OAK AVE', '', '33705', 'Ann Poe'),
+        ('99 ELM ST', '', '33705', 'Nobody')
+    ]
+    assert unitless_key('470 3RD ST S|404|33701') == '470 3RD ST S||33701'
+    result, matched, unmatched = join_voters(doors, voters)
+    # A unit not on file finds the address's only door; a building's units do not answer for it
+    assert (matched, unmatched) == (4, 2)
+    assert result['VOTER_COUNT'].tolist() == [1, 0, 2, 1, 0]
+    assert result['VOTER_NAMES'].tolist() == ['Jane Doe', '', 'John Roe; Unit Voter', 'Ann Poe', '']
+    assert 'VOTER_COUNT' not in doors.columns
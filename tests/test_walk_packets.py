@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from address_store import AddressTable, prepare_frame
+from walk_packets import (
+    FORMAT_VERSION, PACKET_FORMAT, RESULTS_FORMAT, build_walk_packet, merge_results, read_results,
+    render_packet_html
+)
+
+
+def results_file(results, version=FORMAT_VERSION):
+    return json.dumps({'format': RESULTS_FORMAT, 'version': version, 'volunteer': 'ann', 'results': results})
+
+
+def test_packet_lists_doors_in_stop_order(store):
+    table = AddressTable(prepare_frame(pd.DataFrame({
+        'PARCEL_NUMBER': ['P1', 'P2', 'P3'],
+        'SITE_ADDRESS': ['10 OAK ST', '12 OAK ST', '10 OAK ST'],
+        'OWNER1': ['SMITH', '</script>', None]
+    })))
+    store.update('P3', visited=True, support_level='undecided')
+    packet = build_walk_packet(table, [np.array([0, 2]), np.array([1])], store.snapshot(), 'turf-1', 'Turf 1', {'unknown': 'Unknown'})
+    assert packet['format'] == PACKET_FORMAT
+    stop, parcel, owner = (packet['columns'].index(name) for name in ('STOP', 'PARCEL_NUMBER', 'OWNER1'))
+    assert [(door[stop], door[parcel], door[owner]) for door in packet['doors']] == [(1, 'P1', 'SMITH'), (1, 'P3', ''), (2, 'P2', '</script>')]
+    assert packet['results']['P3'] == {'visited': True, 'follow_up': False, 'support_level': 'undecided'}
+    assert packet['results']['P1'] == {'visited': False, 'follow_up': False}
+
+    page = render_packet_html(packet)
+    assert page.count('</script>') == 2
+    embedded = page.split('id="packet">', 1)[1].split('</script>', 1)[0]
+    assert json.loads(embedded) == json.loads(json.dumps(packet))
+
+
+def test_read_results_keeps_the_latest_record_per_parcel():
+    volunteer, updates = read_results(results_file([
+        {'parcel_number': 'P1', 'visited': True, 'notes': 'Not home', 'recorded_at': 200},
+        {'parcel_number': 'P1', 'support_level': 'lean_support', 'donation': '25', 'recorded_at': 300.5},
+        {'parcel_number': 'P1', 'notes': 'Dog', 'recorded_at': 100},
+        {'parcel_number': 'P2', 'visited': 1, 'follow_up': 0, 'extra': 'ignored'},
+        {'parcel_number': ''}
+    ]))
+    assert volunteer == 'ann'
+    assert updates == [
+        ('P2', {'visited': True, 'follow_up': False}, None),
+        ('P1', {'notes': 'Not home', 'visited': True, 'support_level': 'lean_support', 'donation': 25.0}, 300.5)
+    ]
+
+
+@pytest.mark.parametrize("data", [
+    "not json",
+    json.dumps([]),
+    json.dumps({'format': 'something-else', 'version': FORMAT_VERSION}),
+    results_file([], version=99),
+    results_file({'P1': {}}),
+    results_file(['P1']),
+    results_file([{'visited': True}]),
+    results_file([{'parcel_number': 'P1', 'recorded_at': 'yesterday'}]),
+    results_file([{'parcel_number': 'P1', 'recorded_at': True}]),
+    results_file([{'parcel_number': 'P1', 'donation': 'lots'}])
+])
+def test_read_results_rejects_bad_files(data):
+    with pytest.raises(ValueError):
+        read_results(data)
+
+
+def test_merge_results_writes_only_newer_changes(store):
+    store.update_many([('P1', {'visited': True, 'support_level': 'undecided'}, 1000.0), ('P2', {'visited': True}, 1000.0)])
+    updates = [
+        ('P1', {'visited': True, 'support_level': 'strong_support'}, 2000.0),
+        ('P2', {'visited': False}, 500.0),
+        ('P3', {'visited': True, 'notes': 'Gate'}, None),
+        ('P4', {'visited': False}, 3000.0)
+    ]
+    assert merge_results(store, updates, volunteer='ann') == (2, 2)
+    results = store.snapshot()
+    assert results.visited == {'P1', 'P2', 'P3'}
+    assert dict(results.support_levels) == {'P1': 'strong_support'}
+    # Only the changed fields are logged, at the time they were recorded offline
+    new_events = store.events()[2:]
+    assert [event['parcel_number'] for event in new_events] == ['P1', 'P3']
+    assert (new_events[0]['recorded_at'], new_events[0]['visited'], new_events[0]['volunteer']) == (2000.0, None, 'ann')
+
+    # Importing the same file again writes nothing
+    assert merge_results(store, updates) == (0, 4)
+    assert len(store.events()) == 4
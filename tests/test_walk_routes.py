@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from address_store import AddressTable, prepare_frame
+from walk_routes import collapse_stops, nearest_neighbor_order, plan_walk_route, route_length, two_opt
+
+# About 11 m of latitude
+STEP = 0.0001
+
+
+def make_table(rows):
+    return AddressTable(prepare_frame(pd.DataFrame(rows, columns=['STR_NUM', 'STR_NAME', 'STR_ZIP', 'LAT', 'LON'])))
+
+
+# Houses along one street, listed out of order, with a two-unit building and a house without coordinates
+def street_table():
+    return make_table([
+        (30, 'OAK ST', '33701', 27.0 + 3 * STEP, -82.0),
+        (10, 'OAK ST', '33701', 27.0 + 1 * STEP, -82.0),
+        (40, 'OAK ST', '33701', 27.0 + 4 * STEP, -82.0),
+        (20, 'OAK ST', '33701', 27.0 + 2 * STEP, -82.0),
+        (10, 'OAK ST', '33701', 27.0 + 1 * STEP, -82.0),
+        (50, 'OAK ST', '33701', None, None)
+    ])
+
+
+def test_collapse_stops_groups_units_of_a_door():
+    stops = collapse_stops(street_table(), [5, 4, 0, 1, 3])
+    assert [stop.tolist() for stop in stops] == [[5], [4, 1], [0], [3]]
+    assert collapse_stops(street_table(), []) == []
+
+
+def test_plan_walks_the_street_in_order():
+    table = street_table()
+    stops, distance = plan_walk_route(table, np.arange(6), start={'lat': 27.0, 'lon': -82.0})
+    assert [stop.tolist() for stop in stops] == [[1, 4], [3], [0], [2], [5]]
+    assert abs(distance - 4 * STEP * 111_320) < 1
+
+    # Without a start the walk begins at an end of the street
+    stops, _ = plan_walk_route(table, np.arange(5))
+    assert [stop[0] for stop in stops] in ([1, 3, 0, 2], [2, 0, 3, 1])
+
+
+def test_max_stops_plans_the_first_stops_only():
+    stops, _ = plan_walk_route(street_table(), [2, 0, 3, 1, 5], start={'lat': 27.0, 'lon': -82.0}, max_stops=2)
+    assert sorted(stop[0] for stop in stops) == [0, 2]
+
+
+def test_out_of_time_stops_keep_their_order():
+    points = np.random.default_rng(0).uniform(0, 1000, (50, 2))
+    order = nearest_neighbor_order(points, np.zeros(2), time_limit=0)
+    assert order.tolist() == list(range(50))
+    assert two_opt(points, order, np.zeros(2), time_limit=0).tolist() == list(range(50))
+
+
+def test_two_opt_never_lengthens_a_route():
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        points = rng.uniform(0, 1000, (40, 2))
+        start = rng.uniform(0, 1000, 2)
+        greedy = nearest_neighbor_order(points, start)
+        improved = two_opt(points, greedy, start)
+        assert sorted(improved.tolist()) == list(range(40))
+        assert route_length(points, improved, start) <= route_length(points, greedy, start) + 1e-6
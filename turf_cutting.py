@@ -0,0 +1,108 @@
+"""Cutting a precinct into walk packets of roughly equal door count."""
+import numpy as np
+import pandas as pd
+
+from walk_routes import stop_codes, to_meters
+
+# Cells per side of the Hilbert curve grid, as a power of two
+HILBERT_ORDER = 16
+
+
+# Position of each (x, y) grid cell along a Hilbert curve, vectorized
+def hilbert_distance(x, y, order=HILBERT_ORDER):
+    x = np.asarray(x, dtype=np.int64).copy()
+    y = np.asarray(y, dtype=np.int64).copy()
+    n = 1 << order
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve inside it runs the same way
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+class TurfCutter:
+    """A precinct's doors in Hilbert-curve order, cut into packets on demand.
+
+    Units that must go to one volunteer (a named building, or the units
+    sharing a door) are ordered once along a Hilbert curve over their
+    location, so any run of consecutive units is a compact patch of map.
+    cut() then only weighs each unit by its doors still to knock and
+    splits the running total into equal shares, so re-cutting as doors
+    are visited is a bincount and a cumsum.
+    """
+
+    def __init__(self, table, positions, building_codes):
+        positions = np.asarray(positions)
+        self.unit_count = 0
+        self.positions = positions
+        self.units = np.zeros(0, dtype=np.int64)
+        if len(positions) == 0:
+            return
+
+        # Rows in a named building stay together; other rows are grouped by door
+        named = table.values('BUILDING_NAME', positions).astype(str) != ""
+        keys = np.where(named, np.asarray(building_codes, dtype=np.int64), -1 - stop_codes(table, positions))
+        unit_codes, unit_keys = pd.factorize(keys)
+        self.unit_count = len(unit_keys)
+
+        # Each unit sits at the mean location of its rows with coordinates
+        lats = table.values('LAT', positions).astype(float)
+        lons = table.values('LON', positions).astype(float)
+        located = np.isfinite(lats) & np.isfinite(lons) & (lats != 0) & (lons != 0)
+        located_count = np.bincount(unit_codes[located], minlength=self.unit_count)
+        unit_located = located_count > 0
+        unit_lat = np.bincount(unit_codes[located], weights=lats[located], minlength=self.unit_count)
+        unit_lon = np.bincount(unit_codes[located], weights=lons[located], minlength=self.unit_count)
+        unit_lat = unit_lat[unit_located] / located_count[unit_located]
+        unit_lon = unit_lon[unit_located] / located_count[unit_located]
+
+        # Scale both axes alike onto the curve grid so distances keep their shape
+        rank = np.empty(self.unit_count, dtype=np.int64)
+        if unit_located.any():
+            points = to_meters(unit_lat, unit_lon, unit_lat.mean())
+            points -= points.min(axis=0)
+            extent = max(points.max(), 1.0)
+            cells = np.minimum((points / extent * (1 << HILBERT_ORDER)).astype(np.int64), (1 << HILBERT_ORDER) - 1)
+            curve = hilbert_distance(cells[:, 0], cells[:, 1])
+            located_units = np.flatnonzero(unit_located)
+            rank[located_units[np.argsort(curve, kind='stable')]] = np.arange(len(located_units))
+        # Units without coordinates follow, in the order they were listed
+        unlocated_units = np.flatnonzero(~unit_located)
+        rank[unlocated_units] = np.arange(len(unlocated_units)) + unit_located.sum()
+
+        # Rows in curve order, units contiguous
+        row_rank = rank[unit_codes]
+        order = np.argsort(row_rank, kind='stable')
+        self.positions = positions[order]
+        self.units = row_rank[order]
+
+    def cut(self, packets, visited=None):
+        """Split the doors not yet visited into at most packets packets.
+
+        visited is a boolean mask over the whole table. Returns a list of
+        row-position arrays in curve order; each unit lands in the packet
+        holding the middle of its doors, so shares differ by at most about
+        one building.
+        """
+        remaining = np.ones(len(self.positions), dtype=bool) if visited is None else ~visited[self.positions]
+        weights = np.bincount(self.units, weights=remaining, minlength=self.unit_count)
+        total = weights.sum()
+        if total == 0 or packets < 1:
+            return []
+
+        middles = np.cumsum(weights) - weights / 2
+        unit_packet = np.minimum((middles * packets / total).astype(np.int64), packets - 1)
+        row_packet = unit_packet[self.units][remaining]
+        positions = self.positions[remaining]
+
+        # Rows are already in curve order, so each packet is one slice
+        bounds = np.searchsorted(row_packet, np.arange(1, packets))
+        return [packet for packet in np.split(positions, bounds) if len(packet)]
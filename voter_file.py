@@ -0,0 +1,253 @@
+"""Streaming voter workbook reader and the join of voters onto parcel doors."""
+import codecs
+import functools
+import html
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from address_store import DEFAULT_CHUNK_SIZE, iter_file_chunks
+from households import street_key, text_column, text_words, unit_key
+
+# SpreadsheetML namespaces
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Header names (upper case, punctuation as underscores) each voter field may appear under
+VOTER_COLUMN_ALIASES = {
+    'address': ['RESIDENCE_ADDRESS_LINE_1', 'RESIDENCE_ADDRESS', 'ADDRESS_LINE_1', 'ADDRESS', 'STREET_ADDRESS', 'SITE_ADDRESS'],
+    'unit': ['RESIDENCE_ADDRESS_LINE_2', 'ADDRESS_LINE_2', 'UNIT', 'APT'],
+    'zip': ['RESIDENCE_ZIPCODE', 'RESIDENCE_ZIP', 'ZIPCODE', 'ZIP_CODE', 'ZIP'],
+    'first_name': ['NAME_FIRST', 'FIRST_NAME', 'FIRST'],
+    'last_name': ['NAME_LAST', 'LAST_NAME', 'LAST'],
+    'name': ['VOTER_NAME', 'FULL_NAME', 'NAME']
+}
+
+# Rows searched for the header at the top of each sheet
+HEADER_SEARCH_ROWS = 10
+
+# Names listed per door; the count covers everyone
+MAX_VOTER_NAMES = 10
+
+# A unit at the end of an address line: "470 3RD ST S # 404", "12 OAK AVE APT 2B"
+TRAILING_UNIT = re.compile(r'\s+(?:#|UNIT\b|APT\b|STE\b|SUITE\b)\s*(\S+)\s*$', re.IGNORECASE)
+
+# Pieces of worksheet XML: rows, cells, a cell's column letters and type, and its text
+# (r= and t= are each found by a lookahead over the whole tag, so attributes may come in any order)
+SHEET_ROW = re.compile(r'<row\b[^>]*?(?:/>|>(.*?)</row>)', re.DOTALL)
+SHEET_CELL = re.compile(
+    r'<c\b(?=(?:[^>]*?\sr\s*=\s*["\']([A-Z]+))?)(?=(?:[^>]*?\st\s*=\s*["\'](\w+))?)[^>]*?'
+    r'(?:/>|>(?:<f\b[^>]*?(?:/>|>.*?</f>))?(?:<v>(.*?)</v>|<is>(.*?)</is>)?.*?</c>)',
+    re.DOTALL
+)
+INLINE_TEXT = re.compile(r'<t\b[^>]*>(.*?)</t>', re.DOTALL)
+
+# Distinct voter addresses whose door keys are remembered (households repeat an address)
+DOOR_KEY_CACHE_SIZE = 65536
+
+# Joins the fields of a door into one factorizable value (never found in addresses)
+FIELD_SEPARATOR = '\x1f'
+
+HEADER_CHARACTERS = re.compile(r'[^A-Z0-9]+')
+
+
+# Column index of a cell reference such as "AB12" (0 for column A)
+def column_index(reference):
+    index = 0
+    for character in reference:
+        if not character.isalpha():
+            break
+        index = index * 26 + ord(character.upper()) - 64
+    return index - 1
+
+
+# Shared strings table of a workbook, read as a stream
+def read_shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == MAIN_NS + 'si':
+                strings.append(''.join(text.text or '' for text in element.iter(MAIN_NS + 't')))
+                element.clear()
+    return strings
+
+
+# (sheet name, archive path) of every worksheet, in workbook order
+def xlsx_sheets(archive):
+    targets = {}
+    for relationship in ET.fromstring(archive.read('xl/_rels/workbook.xml.rels')).iter(PACKAGE_RELATIONSHIP_NS + 'Relationship'):
+        target = relationship.get('Target', '')
+        path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        targets[relationship.get('Id')] = path
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    return [(sheet.get('name'), targets.get(sheet.get(RELATIONSHIP_NS + 'id'))) for sheet in workbook.iter(MAIN_NS + 'sheet')]
+
+
+def iter_sheet_rows(archive, sheet_path, shared_strings, keep=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield each row of a worksheet as a list of cell texts, without loading the sheet.
+
+    The sheet XML is decompressed a chunk at a time and complete <row>
+    elements are cut out of it with regular expressions, so only one
+    chunk is held in memory however long the sheet is. Empty cells are "".
+    keep is an optional set of column indexes; once it is non-empty
+    (it may be filled in while iterating, after the header is found)
+    other cells are left blank without being decoded.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    columns = {}
+    buffer = ""
+    with archive.open(sheet_path) as f:
+        for chunk in iter_file_chunks(f, chunk_size):
+            buffer += utf8.decode(chunk)
+            # Only rows closed within the buffer are parsed; the rest waits for the next chunk
+            last_row = buffer.rfind('</row>')
+            if last_row < 0:
+                continue
+            complete, buffer = buffer[:last_row + 6], buffer[last_row + 6:]
+            for row in SHEET_ROW.finditer(complete):
+                yield sheet_row_values(row.group(1) or "", shared_strings, columns, keep)
+
+
+# Cell texts of one row's XML, placed by their column letters (a cell without any follows the one before)
+def sheet_row_values(row, shared_strings, columns, keep=None):
+    values = []
+    index = -1
+    for letters, cell_type, value, inline in SHEET_CELL.findall(row):
+        if not letters:
+            index += 1
+        else:
+            index = columns.get(letters)
+            if index is None:
+                index = columns[letters] = column_index(letters)
+        if keep and index not in keep:
+            continue
+        text = ''.join(INLINE_TEXT.findall(inline)) if inline else value
+        if '&' in text:
+            text = html.unescape(text)
+        if cell_type == 's' and text:
+            text = shared_strings[int(text)]
+        values.extend([''] * (index - len(values)))
+        values.append(text)
+    return values
+
+
+# Voter fields found in a header row, as {field: column index}
+def voter_columns(header):
+    names = [HEADER_CHARACTERS.sub('_', str(value).upper()).strip('_') for value in header]
+    columns = {}
+    for field, aliases in VOTER_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    return columns
+
+
+def iter_voters(path):
+    """Yield (address line, unit, ZIP, name) for every voter in a workbook.
+
+    The first sheet with an address column in its first HEADER_SEARCH_ROWS
+    rows is read, streaming. Raises ValueError when no sheet has one.
+    """
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = read_shared_strings(archive)
+        for _, sheet_path in xlsx_sheets(archive):
+            if sheet_path is None:
+                continue
+            keep = set()
+            rows = iter_sheet_rows(archive, sheet_path, shared_strings, keep)
+            for _, header in zip(range(HEADER_SEARCH_ROWS), rows):
+                columns = voter_columns(header)
+                if 'address' in columns:
+                    break
+            else:
+                continue
+            # Only the voter columns are decoded from here on
+            keep.update(columns.values())
+
+            def cell(row, field):
+                index = columns.get(field)
+                return row[index].strip() if index is not None and index < len(row) else ''
+
+            for row in rows:
+                address = cell(row, 'address')
+                if not address:
+                    continue
+                name = cell(row, 'name') or ' '.join(part for part in (cell(row, 'first_name'), cell(row, 'last_name')) if part)
+                yield address, cell(row, 'unit'), cell(row, 'zip'), name.title()
+            return
+    raise ValueError(f"No sheet in {path} has a voter address column")
+
+
+# Door key of an address line, unit and ZIP; a unit written at the end of the line is split off and used when unit is blank
+@functools.lru_cache(maxsize=DOOR_KEY_CACHE_SIZE)
+def door_key(address, unit, zip_code):
+    match = TRAILING_UNIT.search(address)
+    if match:
+        address, unit = address[:match.start()], unit or match.group(1)
+    return f"{street_key(address)}|{unit_key(unit)}|{''.join(text_words(zip_code))[:5]}"
+
+
+# A door key with its unit left out
+def unitless_key(key):
+    street, _, zip5 = key.split('|')
+    return f"{street}||{zip5}"
+
+
+def join_voters(address_df, voters):
+    """Attach VOTER_COUNT and VOTER_NAMES to each door of address_df; returns (frame, matched, unmatched).
+
+    The doors are indexed once by door key (address line, unit and ZIP,
+    normalized as in households), then voters stream past and are looked
+    up in that index, so each side is read once. A voter whose unit is
+    not on file, or who gives none, falls back to the address without a
+    unit: a parcel with no unit there, or the address's only door.
+    """
+    count = len(address_df)
+    address = text_column(address_df, 'SITE_ADDRESS')
+    unit = text_column(address_df, 'STR_UNIT')
+    zip_code = text_column(address_df, 'STR_ZIP')
+
+    # Key each distinct (address, unit, ZIP) once; the first door with a key wins
+    codes, uniques = pd.factorize(address + FIELD_SEPARATOR + unit + FIELD_SEPARATOR + zip_code)
+    keys = [door_key(*value.split(FIELD_SEPARATOR)) for value in uniques]
+    first_row = np.full(len(uniques), -1, dtype=np.int64)
+    first_row[codes[::-1]] = np.arange(count)[::-1]
+    index = dict(zip(keys, first_row.tolist()))
+
+    # Addresses with a single door also answer for voters without a matching unit
+    unitless = pd.Series([unitless_key(key) for key in keys])
+    single = unitless.map(unitless.value_counts()) == 1
+    for key, row in zip(unitless[single], first_row[single.to_numpy()]):
+        index.setdefault(key, int(row))
+
+    voter_counts = np.zeros(count, dtype=np.int64)
+    names = {}
+    matched = unmatched = 0
+    for address_line, voter_unit, voter_zip, name in voters:
+        key = door_key(address_line, voter_unit, voter_zip)
+        row = index.get(key)
+        if row is None:
+            row = index.get(unitless_key(key))
+        if row is None:
+            unmatched += 1
+            continue
+        matched += 1
+        voter_counts[row] += 1
+        if name:
+            names.setdefault(row, []).append(name)
+
+    result = address_df.copy()
+    result['VOTER_COUNT'] = voter_counts
+    voter_names = np.full(count, "", dtype=object)
+    for row, row_names in names.items():
+        voter_names[row] = '; '.join(row_names[:MAX_VOTER_NAMES])
+    result['VOTER_NAMES'] = voter_names
+    return result, matched, unmatched
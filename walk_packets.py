@@ -0,0 +1,296 @@
+"""Offline walk packets: export a turf for use without signal, and merge the results back."""
+import html
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from canvass_store import RESULT_FIELDS, FLAG_FIELDS
+
+PACKET_FORMAT = "district6-walk-packet"
+RESULTS_FORMAT = "district6-walk-results"
+FORMAT_VERSION = 1
+
+# Address fields copied into a packet for each door
+PACKET_COLUMNS = ['PARCEL_NUMBER', 'OWNER1', 'OWNER2', 'SITE_ADDRESS', 'STR_UNIT', 'BUILDING_NAME', 'PROPERTY_USE']
+
+
+# Current result fields of one parcel in a CanvassResults snapshot
+def parcel_result(results, parcel_number):
+    fields = {
+        'visited': parcel_number in results.visited,
+        'follow_up': parcel_number in results.follow_ups
+    }
+    for field, values in (('support_level', results.support_levels), ('donation', results.donations), ('notes', results.notes)):
+        if parcel_number in values:
+            fields[field] = values[parcel_number]
+    return fields
+
+
+def build_walk_packet(table, stops, results, packet_id, title, support_levels, volunteer=""):
+    """A JSON-ready packet of doors in walking order, with their results so far.
+
+    stops is a list of row-position arrays, one per door, as returned by
+    plan_walk_route. Addresses are stored as rows of PACKET_COLUMNS values
+    to keep the packet small.
+    """
+    positions = np.concatenate(stops) if stops else np.zeros(0, dtype=np.int64)
+    stop_numbers = np.repeat(np.arange(1, len(stops) + 1), [len(stop) for stop in stops])
+    columns = [stop_numbers.tolist()]
+    for column in PACKET_COLUMNS:
+        if column in table.columns:
+            values = pd.Series(table.values(column, positions), dtype=object)
+            columns.append(values.where(values.notna(), "").astype(str).tolist())
+        else:
+            columns.append([""] * len(positions))
+    doors = [list(door) for door in zip(*columns)]
+
+    parcels = columns[1]
+    return {
+        "format": PACKET_FORMAT,
+        "version": FORMAT_VERSION,
+        "packet_id": packet_id,
+        "title": title,
+        "volunteer": volunteer,
+        "created_at": time.time(),
+        "support_levels": support_levels,
+        "columns": ["STOP"] + PACKET_COLUMNS,
+        "doors": doors,
+        "results": {parcel: parcel_result(results, parcel) for parcel in dict.fromkeys(parcels)}
+    }
+
+
+# A single HTML file that shows the packet and records results in the browser's storage
+def render_packet_html(packet):
+    # "</" would end the script element early
+    data = json.dumps(packet, separators=(',', ':')).replace("</", "<\\/")
+    return PACKET_TEMPLATE.replace("{{title}}", html.escape(packet["title"])).replace("{{packet}}", data)
+
+
+def read_results(data):
+    """Parse a results file exported from a walk packet into (parcel_number, fields, recorded_at) updates.
+
+    Only result fields are kept, and when a parcel appears more than once
+    its latest record wins; recorded_at is the time of that record, or
+    None if the file has none. Raises ValueError for anything that is not
+    a results file.
+    """
+    try:
+        document = json.loads(data)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Not a walk packet results file: {e}")
+    if not isinstance(document, dict) or document.get("format") != RESULTS_FORMAT:
+        raise ValueError("Not a walk packet results file")
+    if document.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported results file version: {document.get('version')}")
+
+    results = document.get("results", [])
+    if not isinstance(results, list):
+        raise ValueError("Results file has no list of results")
+    for record in results:
+        if not isinstance(record, dict) or "parcel_number" not in record:
+            raise ValueError(f"Not a door result: {str(record)[:80]}")
+        recorded_at = record.get("recorded_at")
+        if recorded_at is not None and (isinstance(recorded_at, bool) or not isinstance(recorded_at, (int, float))):
+            raise ValueError(f"Bad recorded_at for parcel {record['parcel_number']}: {recorded_at!r}")
+
+    latest = {}
+    recorded = {}
+    for record in sorted(results, key=lambda record: record.get("recorded_at") or 0):
+        parcel_number = str(record.get("parcel_number") or "")
+        if not parcel_number:
+            continue
+        if record.get("recorded_at") is not None:
+            recorded[parcel_number] = float(record["recorded_at"])
+        fields = {}
+        for field in RESULT_FIELDS:
+            if field not in record or record[field] is None:
+                continue
+            value = record[field]
+            if field in FLAG_FIELDS:
+                value = bool(value)
+            elif field == 'donation':
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Bad donation for parcel {parcel_number}: {value!r}")
+            else:
+                value = str(value)
+            fields[field] = value
+        latest.setdefault(parcel_number, {}).update(fields)
+    return document.get("volunteer", ""), [(parcel_number, fields, recorded.get(parcel_number)) for parcel_number, fields in latest.items()]
+
+
+def merge_results(store, updates, volunteer=""):
+    """Write the fields of updates that differ from the stored results; returns (changed, unchanged) counts.
+
+    An update only applies when it was recorded after the parcel's stored
+    result last changed, so an old packet cannot overwrite a newer tap;
+    it is logged at the time it was recorded offline. Fields that already
+    match are skipped, so importing the same file twice writes nothing
+    the second time. Skipped updates count as unchanged.
+    """
+    current = store.snapshot()
+    updated_at = store.updated_at()
+    changes = []
+    for parcel_number, fields, recorded_at in updates:
+        if parcel_number in updated_at and (recorded_at is None or recorded_at <= updated_at[parcel_number]):
+            continue
+        stored = parcel_result(current, parcel_number)
+        changed = {field: value for field, value in fields.items() if stored.get(field, False if field in FLAG_FIELDS else None) != value}
+        if changed:
+            changes.append((parcel_number, changed, recorded_at))
+    store.update_many(changes, volunteer=volunteer)
+    return len(changes), len(updates) - len(changes)
+
+
+PACKET_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{{title}}</title>
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 40em; padding: 0.5em; }
+.stop { border-bottom: 1px solid #ddd; padding: 0.5em 0; }
+.door { margin: 0.4em 0 0.4em 0.5em; }
+.door.visited .address { color: #888; text-decoration: line-through; }
+.owner { color: #555; font-size: 0.9em; }
+button { margin: 0.2em 0.2em 0.2em 0; padding: 0.4em 0.8em; }
+details { margin-top: 0.3em; }
+input, select, textarea { display: block; margin: 0.2em 0; width: 100%; box-sizing: border-box; }
+#bar { position: sticky; top: 0; background: #fff; padding: 0.5em 0; border-bottom: 2px solid #333; }
+</style>
+</head>
+<body>
+<div id="bar">
+<strong>{{title}}</strong><br>
+<span id="progress"></span><br>
+<button id="export">Download results</button>
+</div>
+<div id="doors"></div>
+<script type="application/json" id="packet">{{packet}}</script>
+<script>
+var packet = JSON.parse(document.getElementById("packet").textContent);
+var storageKey = "walk-packet:" + packet.packet_id;
+var local = JSON.parse(localStorage.getItem(storageKey) || "{}");
+var column = {};
+packet.columns.forEach(function (name, i) { column[name] = i; });
+
+function state(parcel) {
+  return Object.assign({}, packet.results[parcel] || {}, local[parcel] || {});
+}
+
+function record(parcel, fields) {
+  local[parcel] = Object.assign(local[parcel] || {}, fields, {recorded_at: Date.now() / 1000});
+  localStorage.setItem(storageKey, JSON.stringify(local));
+  render();
+}
+
+function element(tag, text, className) {
+  var node = document.createElement(tag);
+  if (text) node.textContent = text;
+  if (className) node.className = className;
+  return node;
+}
+
+function button(label, onclick) {
+  var node = element("button", label);
+  node.onclick = onclick;
+  return node;
+}
+
+function contactForm(parcel, current) {
+  var form = element("details");
+  form.appendChild(element("summary", "Record contact"));
+  var support = element("select");
+  Object.keys(packet.support_levels).forEach(function (level) {
+    var option = element("option", packet.support_levels[level]);
+    option.value = level;
+    option.selected = level === (current.support_level || "unknown");
+    support.appendChild(option);
+  });
+  var donation = element("input");
+  donation.type = "number";
+  donation.min = "0";
+  donation.step = "5";
+  donation.placeholder = "Donation ($)";
+  donation.value = current.donation || "";
+  var notes = element("textarea");
+  notes.placeholder = "Notes";
+  notes.value = current.notes || "";
+  var followUp = element("input");
+  followUp.type = "checkbox";
+  followUp.checked = !!current.follow_up;
+  var followLabel = element("label", " Flag for follow-up");
+  followLabel.prepend(followUp);
+  form.append(support, donation, notes, followLabel, button("Save", function () {
+    record(parcel, {
+      visited: true,
+      support_level: support.value,
+      donation: parseFloat(donation.value) || 0,
+      notes: notes.value,
+      follow_up: followUp.checked
+    });
+  }));
+  return form;
+}
+
+function render() {
+  var container = document.getElementById("doors");
+  container.textContent = "";
+  var visited = 0;
+  var stop = null;
+  var stopNode = null;
+  packet.doors.forEach(function (door) {
+    if (door[column.STOP] !== stop) {
+      stop = door[column.STOP];
+      stopNode = element("div", null, "stop");
+      var heading = "Stop " + stop + ": " + door[column.SITE_ADDRESS];
+      if (door[column.BUILDING_NAME]) heading += " (" + door[column.BUILDING_NAME] + ")";
+      stopNode.appendChild(element("strong", heading));
+      container.appendChild(stopNode);
+    }
+    var parcel = door[column.PARCEL_NUMBER];
+    var current = state(parcel);
+    if (current.visited) visited += 1;
+    var doorNode = element("div", null, current.visited ? "door visited" : "door");
+    var address = door[column.SITE_ADDRESS] + (door[column.STR_UNIT] ? " #" + door[column.STR_UNIT] : "");
+    doorNode.appendChild(element("div", address, "address"));
+    var owners = [door[column.OWNER1], door[column.OWNER2]].filter(Boolean).join(" & ");
+    doorNode.appendChild(element("div", owners + (current.notes ? " | " + current.notes : ""), "owner"));
+    if (current.visited) {
+      doorNode.appendChild(button("Undo visit", function () { record(parcel, {visited: false}); }));
+    } else {
+      doorNode.appendChild(button("Not Home", function () { record(parcel, {visited: true, notes: "Not home"}); }));
+      doorNode.appendChild(button("Skip", function () { record(parcel, {visited: true, notes: "Skipped"}); }));
+    }
+    doorNode.appendChild(contactForm(parcel, current));
+    stopNode.appendChild(doorNode);
+  });
+  document.getElementById("progress").textContent = visited + " of " + packet.doors.length + " doors visited";
+}
+
+document.getElementById("export").onclick = function () {
+  var results = Object.keys(local).map(function (parcel) {
+    return Object.assign({parcel_number: parcel}, local[parcel]);
+  });
+  var blob = new Blob([JSON.stringify({
+    format: "district6-walk-results",
+    version: 1,
+    packet_id: packet.packet_id,
+    volunteer: packet.volunteer,
+    results: results
+  })], {type: "application/json"});
+  var link = element("a");
+  link.href = URL.createObjectURL(blob);
+  link.download = packet.packet_id + "-results.json";
+  link.click();
+};
+
+render();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,145 @@
+"""Walking-order planning for a volunteer's list of doors."""
+import time
+
+import numpy as np
+import pandas as pd
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111_320.0
+
+# Seconds a route may take to plan, shared by the greedy pass and 2-opt
+DEFAULT_TIME_LIMIT = 1.0
+
+
+# Project coordinates onto a flat plane in meters (fine at neighborhood scale)
+def to_meters(lats, lons, origin_lat):
+    scale = np.cos(np.radians(origin_lat))
+    return np.column_stack([lons * METERS_PER_DEGREE * scale, lats * METERS_PER_DEGREE])
+
+
+# Stop number of each row: units sharing a street number, street and ZIP are one door
+def stop_codes(table, positions):
+    keys = pd.DataFrame({
+        'num': table.values('STR_NUM', positions),
+        'name': table.values('STR_NAME', positions),
+        'zip': table.values('STR_ZIP', positions)
+    })
+    return keys.groupby(['num', 'name', 'zip'], sort=False, observed=True, dropna=False).ngroup().to_numpy()
+
+
+# Group row positions into stops, in order of first appearance
+def collapse_stops(table, positions):
+    positions = np.asarray(positions)
+    if len(positions) == 0:
+        return []
+    codes = stop_codes(table, positions)
+    order = np.argsort(codes, kind='stable')
+    return np.split(positions[order], np.cumsum(np.bincount(codes))[:-1])
+
+
+# Greedy route: always walk to the closest stop not yet visited; past the time limit the rest keep their order
+def nearest_neighbor_order(points, start, time_limit=DEFAULT_TIME_LIMIT):
+    deadline = time.perf_counter() + time_limit
+    remaining = np.ones(len(points), dtype=bool)
+    order = np.empty(len(points), dtype=np.int64)
+    current = start
+    for step in range(len(points)):
+        if time.perf_counter() >= deadline:
+            order[step:] = np.flatnonzero(remaining)
+            break
+        distances = np.hypot(points[:, 0] - current[0], points[:, 1] - current[1])
+        distances[~remaining] = np.inf
+        nearest = int(np.argmin(distances))
+        order[step] = nearest
+        remaining[nearest] = False
+        current = points[nearest]
+    return order
+
+
+# Improve an open route from a fixed start by reversing segments that shorten it
+def two_opt(points, order, start, time_limit=DEFAULT_TIME_LIMIT):
+    """2-opt on a path that starts at start and may end anywhere.
+
+    Each i is tested against every later j at once with NumPy: reversing
+    route[i+1..j] replaces edges (i, i+1) and (j, j+1) with (i, j) and
+    (i+1, j+1), and the best such move for i is applied if it helps.
+    Passes repeat until none improves or the time limit is reached.
+    """
+    deadline = time.perf_counter() + time_limit
+    route = np.vstack([start, points[order]])
+    order = order.copy()
+    n = len(route)
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(n - 2):
+            a = route[i]
+            b = route[i + 1]
+            c = route[i + 2:]
+            # The last stop has no outgoing edge, so its "next" point costs nothing
+            d = np.vstack([route[i + 3:], route[-1:]])
+            closes = np.ones(len(c), dtype=bool)
+            closes[-1] = False
+
+            ab = np.hypot(*(a - b))
+            ac = np.hypot(c[:, 0] - a[0], c[:, 1] - a[1])
+            bd = np.where(closes, np.hypot(d[:, 0] - b[0], d[:, 1] - b[1]), 0.0)
+            cd = np.where(closes, np.hypot(d[:, 0] - c[:, 0], d[:, 1] - c[:, 1]), 0.0)
+            gain = ab + cd - ac - bd
+
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-6:
+                j = i + 2 + best
+                route[i + 1:j + 1] = route[i + 1:j + 1][::-1].copy()
+                order[i:j] = order[i:j][::-1].copy()
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+
+    return order
+
+
+# Total walking distance of a route, in meters
+def route_length(points, order, start):
+    path = np.vstack([start, points[order]])
+    return float(np.hypot(*np.diff(path, axis=0).T).sum())
+
+
+def plan_walk_route(table, positions, start=None, time_limit=DEFAULT_TIME_LIMIT, max_stops=None):
+    """Order doors for walking, starting from start (a {"lat", "lon"} dict) if given.
+
+    Returns a list of stops, each an array of row positions that share a
+    door, in walking order, followed by any stops without coordinates;
+    plus the walking distance in meters. With max_stops only the first
+    max_stops stops of positions are planned. Planning takes about
+    time_limit seconds at most; stops the greedy pass has not reached by
+    then keep their list order.
+    """
+    deadline = time.perf_counter() + time_limit
+    stops = collapse_stops(table, positions)[:max_stops]
+    if not stops:
+        return [], 0.0
+
+    firsts = np.array([stop[0] for stop in stops])
+    lats = table.values('LAT', firsts).astype(float)
+    lons = table.values('LON', firsts).astype(float)
+    located = np.isfinite(lats) & np.isfinite(lons) & (lats != 0) & (lons != 0)
+    located_stops = np.flatnonzero(located)
+    unlocated_stops = [stops[k] for k in np.flatnonzero(~located)]
+    if len(located_stops) == 0:
+        return unlocated_stops, 0.0
+
+    origin_lat = start['lat'] if start else lats[located].mean()
+    points = to_meters(lats[located], lons[located], origin_lat)
+    if start:
+        start_point = to_meters(np.array([start['lat']]), np.array([start['lon']]), origin_lat)[0]
+    else:
+        # Without a location, begin at the stop farthest from the middle (an end of the turf)
+        middle = points.mean(axis=0)
+        start_point = points[int(np.argmax(np.hypot(*(points - middle).T)))]
+
+    order = nearest_neighbor_order(points, start_point, time_limit=time_limit)
+    order = two_opt(points, order, start_point, time_limit=max(deadline - time.perf_counter(), 0.0))
+
+    return [stops[k] for k in located_stops[order]] + unlocated_stops, route_length(points, order, start_point)